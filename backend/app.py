@@ -1,9 +1,20 @@
 from flask import Flask, send_from_directory # type: ignore
 from config import Config
 from models import db
+from auth import init_token_cache
+from passwords import init_password_hasher
+from rate_limit import init_rate_limiter
+from memberships import init_membership_versions
+from identity_map import init_identity_map
+from hobbies import init_hobby_tags
 from routes import register_routes
+from commands import register_commands
+from response_cache import init_response_cache
+from realtime import init_event_broker
+from unread_counters import init_unread_counters
 from flask_cors import CORS # type: ignore
 from werkzeug.exceptions import HTTPException # type: ignore
+from werkzeug.middleware.proxy_fix import ProxyFix # type: ignore
 from flask import jsonify  # type: ignore
 import os
 
@@ -12,7 +23,7 @@ from flask import render_template
 
 
 
-def create_app():
+def create_app(config_overrides=None):
     app = Flask(__name__)
     # CORS MINDEN HTTP metódusra (OPTIONS, POST, GET stb.)
     CORS(app, 
@@ -20,7 +31,7 @@ def create_app():
          methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"],
          allow_headers=["Content-Type", "Authorization"],
          supports_credentials=True,
-         expose_headers=["Content-Type"])
+         expose_headers=["Content-Type", "X-Next-Cursor", "ETag"])
 
     @app.errorhandler(HTTPException)
     def handle_http_error(e):
@@ -38,9 +49,25 @@ def create_app():
         }), 404
 
     app.config.from_object(Config)
+    if config_overrides:
+        app.config.update(config_overrides)
+
+    # Proxy mögött a remote_addr a proxy címe lenne: az X-Forwarded-* headerekből állítjuk vissza
+    hops = app.config.get("PROXY_FIX_HOPS", 0)
+    if hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
 
     # SQLAlchemy inicializálás
     db.init_app(app)
+    init_token_cache(app)
+    init_password_hasher(app)
+    init_rate_limiter(app)
+    init_membership_versions(app)
+    init_identity_map(app)
+    init_hobby_tags(app)
+    init_response_cache(app)
+    init_event_broker(app)
+    init_unread_counters(app)
 
     @app.route("/")
     def home():
@@ -68,6 +95,9 @@ def create_app():
     # Route-ok regisztrálása külön file-ból
     register_routes(app)
 
+    # CLI parancsok (flask interests rebuild/check, ...)
+    register_commands(app)
+
     # Adatbázis létrehozása, ha nem létezik
     with app.app_context():
         db.create_all()
@@ -0,0 +1,179 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+
+import jwt  # pyright: ignore[reportMissingImports]
+from flask import current_app, g, jsonify, request  # pyright: ignore[reportMissingImports]
+from config import Config
+
+
+def create_jwt_token(user_id, claims=None):
+    """Rövid életű access token; `claims` pl. a tagsági claim-ek (memberships.membership_claims)."""
+    expiration = datetime.now(timezone.utc) + timedelta(minutes=Config.ACCESS_TOKEN_MINUTES)
+    payload = {
+        "user_id": user_id,
+        "exp": expiration,
+        **(claims or {})
+    }
+
+    token = jwt.encode(payload, Config.SECRET_KEY, algorithm="HS256")
+    return token
+
+
+def create_refresh_token(user_id):
+    """Hosszú életű token, ami csak a /token/refresh végponton fogadható el."""
+    expiration = datetime.now(timezone.utc) + timedelta(days=Config.REFRESH_TOKEN_DAYS)
+    payload = {
+        "user_id": user_id,
+        "type": "refresh",
+        "exp": expiration
+    }
+    return jwt.encode(payload, Config.SECRET_KEY, algorithm="HS256")
+
+
+def verify_refresh_token(token):
+    payload = decode_jwt_token(token)
+    if not payload or payload.get("type") != "refresh":
+        return None
+    return payload
+
+
+def decode_jwt_token(token):
+    """Teljes HS256 ellenőrzés (aláírás + exp), cache nélkül."""
+    try:
+        return jwt.decode(token, Config.SECRET_KEY, algorithms=["HS256"])
+    except jwt.ExpiredSignatureError:
+        return None
+    except jwt.InvalidTokenError:
+        return None
+
+
+class TokenCache:
+    """Már ellenőrzött tokenek korlátos LRU cache-e: sha256(token) -> (payload, exp).
+
+    A token maga nem kerül a memóriába, csak a lenyomata. A bejegyzés a token
+    `exp` idejéig él, utána a token újra a teljes ellenőrzésen megy át (és elbukik).
+    Érvénytelen tokent nem tárolunk.
+    """
+
+    def __init__(self, max_entries=10000, clock=time.time):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token):
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= self.clock():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, token, payload):
+        exp = payload.get("exp")
+        if exp is None:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (payload, exp)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+def init_token_cache(app):
+    cache = TokenCache(app.config.get("TOKEN_CACHE_SIZE", 10000))
+    app.extensions["token_cache"] = cache
+
+    @app.teardown_request
+    def forget_identity(_exc):
+        # Egy már meglévő app contextben (tesztek, CLI) a g túléli a kérést
+        for name in ("auth_payload", "auth_error", "user_id"):
+            g.pop(name, None)
+
+    return cache
+
+
+def verify_jwt_token(token):
+    """A token payloadja, vagy None; az ismert (még nem lejárt) tokeneket a cache-ből adja."""
+    cache = current_app.extensions["token_cache"]
+    payload = cache.get(token)
+    if payload is None:
+        payload = decode_jwt_token(token)
+        if payload is not None:
+            cache.set(token, payload)
+    return payload
+
+
+def verify_access_token(token):
+    """Access token payloadja, vagy None; a refresh token és a user_id nélküli token nem fogadható el."""
+    payload = verify_jwt_token(token)
+    if not payload or not payload.get("user_id") or payload.get("type") == "refresh":
+        return None
+    return payload
+
+
+def current_identity():
+    """A kérés Bearer tokenjének payloadja, kérésenként egyszer ellenőrizve (g.auth_payload).
+
+    Hiányzó vagy hibás token esetén None; az okát g.auth_error tartalmazza.
+    """
+    if "auth_payload" in g:
+        return g.auth_payload
+
+    payload, error = None, None
+    auth_header = request.headers.get("Authorization")
+    if not auth_header:
+        error = "Hiányzó token"
+    elif len(auth_header.split(" ")) < 2:
+        error = "Hibás token"
+    else:
+        payload = verify_access_token(auth_header.split(" ")[1])
+        if payload is None:
+            error = "Érvénytelen vagy lejárt token"
+
+    g.auth_payload = payload
+    g.auth_error = error
+    if payload is not None:
+        g.user_id = payload["user_id"]
+    return payload
+
+
+def current_user_id():
+    """A @require_auth által ellenőrzött user ID."""
+    return g.user_id
+
+
+def require_auth(view):
+    """Route dekorátor: érvényes token nélkül 401, különben g.user_id a bejelentkezett user.
+
+    Az OPTIONS (CORS preflight) kéréseket ellenőrzés nélkül átengedi.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != "OPTIONS" and current_identity() is None:
+            return jsonify({"error": g.auth_error}), 401
+        return view(*args, **kwargs)
+    return wrapper
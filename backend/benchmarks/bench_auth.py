@@ -0,0 +1,76 @@
+"""Kérésenkénti auth overhead: teljes HS256 jwt.decode vs. ellenőrzött-token cache.
+
+A pollerek (pl. 5 mp-es unread-count) ugyanazt a tokent küldik újra és újra; a mérés
+`--users` különböző tokennel, körbe-körbe `--requests` kérést szimulál egy üres
+view-n, így csak az auth útvonal ideje látszik. Futtatás a backend mappából:
+    python benchmarks/bench_auth.py [--requests 50000] [--users 1000]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flask import Flask, jsonify, request  # noqa: E402
+from auth import create_jwt_token, current_user_id, decode_jwt_token, init_token_cache, require_auth  # noqa: E402
+
+
+def legacy_view():
+    """A korábbi route-okban ismételt blokk: header parse + teljes jwt.decode minden kérésnél."""
+    auth_header = request.headers.get("Authorization")
+    if not auth_header:
+        return jsonify({"error": "Hiányzó token"}), 401
+    try:
+        token = auth_header.split(" ")[1]
+        decoded = decode_jwt_token(token)
+    except Exception:
+        return jsonify({"error": "Hibás token"}), 401
+    if not decoded:
+        return jsonify({"error": "Érvénytelen vagy lejárt token"}), 401
+    return decoded["user_id"]
+
+
+@require_auth
+def cached_view():
+    return current_user_id()
+
+
+def run(app, view, tokens, requests):
+    latencies = []
+    for i in range(requests):
+        headers = {"Authorization": f"Bearer {tokens[i % len(tokens)]}"}
+        with app.test_request_context("/groups/unread-counts", headers=headers):
+            start = time.perf_counter()
+            view()
+            latencies.append((time.perf_counter() - start) * 1_000_000)
+    latencies.sort()
+    return {
+        "mean_us": statistics.fmean(latencies),
+        "p50_us": statistics.median(latencies),
+        "p99_us": latencies[int(len(latencies) * 0.99) - 1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=50000)
+    parser.add_argument("--users", type=int, default=1000)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    init_token_cache(app)
+    tokens = [create_jwt_token(user_id) for user_id in range(1, args.users + 1)]
+
+    print(f"{args.requests} kérés, {args.users} különböző token")
+    print(f"{'változat':<14}{'átlag µs':>10}{'p50 µs':>10}{'p99 µs':>10}")
+    for name, view in (("jwt.decode", legacy_view), ("token cache", cached_view)):
+        stats = run(app, view, tokens, args.requests)
+        print(f"{name:<14}{stats['mean_us']:>10.1f}{stats['p50_us']:>10.1f}{stats['p99_us']:>10.1f}")
+
+    print("cache:", app.extensions["token_cache"].stats())
+
+
+if __name__ == "__main__":
+    main()
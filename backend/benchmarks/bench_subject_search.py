@@ -0,0 +1,104 @@
+"""Tárgynév-keresés: régi `ILIKE '%q%'` vs. trigram index.
+
+Futtatás a backend mappából:
+    python benchmarks/bench_subject_search.py [--groups 100000] [--db sqlite:////tmp/bench.db]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flask import Flask  # noqa: E402
+from models import db, User, Group, SubjectTrigram  # noqa: E402
+from search import normalize_subject, subject_trigrams, subject_search_filter  # noqa: E402
+
+# 40 x 50 = 2000 különböző tárgynév, tárgyanként azonos számú csoporttal
+SUBJECT_PREFIXES = [
+    "Bevezetés", "Haladó", "Alkalmazott", "Elméleti", "Gyakorlati", "Numerikus", "Diszkrét",
+    "Formális", "Kísérleti", "Általános", "Speciális", "Modern", "Klasszikus", "Kvantum",
+    "Statisztikai", "Matematikai", "Számítógépes", "Elosztott", "Párhuzamos", "Funkcionális",
+    "Logikai", "Objektumelvű", "Nemlineáris", "Sztochasztikus", "Kombinatorikus", "Geometriai",
+    "Topologikus", "Algebrai", "Analitikus", "Valószínűségi", "Optimalizációs", "Biztonsági",
+    "Hálózati", "Grafikus", "Beágyazott", "Adatvezérelt", "Kognitív", "Szimbolikus",
+    "Intelligens", "Fejlett",
+]
+SUBJECT_TOPICS = [
+    "Analízis", "Algebra", "Programozás", "Adatbázisok", "Operációs rendszerek",
+    "Hálózatok", "Szoftvertechnológia", "Valószínűségszámítás", "Módszerek", "Logika",
+    "Fizika", "Kémia", "Intelligencia", "Algoritmusok", "Adatszerkezetek", "Webfejlesztés",
+    "Gráfelmélet", "Számelmélet", "Kriptográfia", "Fordítóprogramok", "Számításelmélet",
+    "Geometria", "Topológia", "Differenciálegyenletek", "Statisztika", "Optimalizálás",
+    "Gépi tanulás", "Képfeldolgozás", "Robotika", "Szimuláció", "Modellezés", "Rendszerek",
+    "Architektúrák", "Típuselmélet", "Verifikáció", "Tesztelés", "Projektmenedzsment",
+    "Ergonómia", "Adatbányászat", "Jelfeldolgozás", "Irányításelmélet", "Játékelmélet",
+    "Közgazdaságtan", "Pénzügyek", "Bioinformatika", "Nyelvtechnológia", "Hardver",
+    "Mikrovezérlők", "Felhőszolgáltatások", "Kódelmélet",
+]
+SUBJECTS = [f"{p} {t}" for p in SUBJECT_PREFIXES for t in SUBJECT_TOPICS]
+QUERIES = ["Haladó Analízis", "kvantum kripto", "Objektumelvű Programozás", "Gépi tanulás", "hálózat"]
+
+
+def seed(group_count, batch_size=5000):
+    creator = User(email="bench@elte.hu", password_hash="x", major="Informatika")
+    db.session.add(creator)
+    db.session.commit()
+
+    groups_table = Group.__table__
+    trigrams_table = SubjectTrigram.__table__
+    for start in range(1, group_count + 1, batch_size):
+        group_rows, trigram_rows = [], []
+        for group_id in range(start, min(start + batch_size, group_count + 1)):
+            subject = SUBJECTS[group_id % len(SUBJECTS)]
+            key = normalize_subject(subject)
+            group_rows.append({
+                "id": group_id,
+                "name": f"{subject} Study Group #{group_id // len(SUBJECTS) + 1}",
+                "subject": subject,
+                "subject_key": key,
+                "creator_id": creator.id,
+            })
+            trigram_rows.extend({"trigram": t, "group_id": group_id} for t in subject_trigrams(key))
+        db.session.execute(groups_table.insert(), group_rows)
+        db.session.execute(trigrams_table.insert(), trigram_rows)
+    db.session.commit()
+
+
+def timed(build_filter, query, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = db.session.query(Group.id).filter(build_filter(query)).all()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--groups", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--db", default="sqlite:///:memory:")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = args.db
+    db.init_app(app)
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seed(args.groups)
+
+        legacy = lambda q: Group.subject.ilike(f"%{q}%")  # noqa: E731
+        print(f"{args.groups} csoport, median {args.repeat} futásból")
+        print(f"{'keresés':<22}{'ILIKE ms':>10}{'trigram ms':>12}{'találat':>10}")
+        for query in QUERIES:
+            legacy_ms, _ = timed(legacy, query, args.repeat)
+            indexed_ms, hits = timed(subject_search_filter, query, args.repeat)
+            print(f"{query:<22}{legacy_ms:>10.1f}{indexed_ms:>12.1f}{hits:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""/groups/unread-counts: régi csoportonkénti ciklus vs. egyetlen csoportosított lekérdezés.
+
+5000 párhuzamos poller (minden user egyszer kérdez), egy szálkészlet a szerver workerjeit
+modellezi. Futtatás a backend mappából:
+    python benchmarks/bench_unread_counts.py [--pollers 5000] [--workers 32] [--db sqlite:////tmp/bench_unread.db]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from flask import Flask  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from models import db, User, Group, GroupMember, Post, PostView  # noqa: E402
+from unread_counters import unread_post_counts  # noqa: E402
+
+
+def seed(users, groups, groups_per_user, posts_per_group, view_ratio, batch_size=20000):
+    rng = random.Random(42)
+    base = datetime(2026, 1, 1)
+
+    db.session.execute(User.__table__.insert(), [
+        {"id": i, "email": f"u{i}@elte.hu", "password_hash": "x", "major": "Informatika"}
+        for i in range(1, users + 1)
+    ])
+    db.session.execute(Group.__table__.insert(), [
+        {"id": g, "name": f"Bench group {g}", "subject": "Bench", "subject_key": "bench", "creator_id": 1}
+        for g in range(1, groups + 1)
+    ])
+
+    memberships = {u: rng.sample(range(1, groups + 1), groups_per_user) for u in range(1, users + 1)}
+    db.session.execute(GroupMember.__table__.insert(), [
+        {"user_id": u, "group_id": g, "joined_at": base}
+        for u, group_ids in memberships.items() for g in group_ids
+    ])
+
+    post_rows, posts_by_group = [], {}
+    post_id = 0
+    for g in range(1, groups + 1):
+        for i in range(posts_per_group):
+            post_id += 1
+            post_rows.append({
+                "id": post_id, "title": "t", "content": "c", "group_id": g,
+                "author_id": rng.randint(1, users), "created_at": base + timedelta(minutes=post_id),
+            })
+            posts_by_group.setdefault(g, []).append(post_id)
+    for start in range(0, len(post_rows), batch_size):
+        db.session.execute(Post.__table__.insert(), post_rows[start:start + batch_size])
+
+    view_rows = []
+    for u, group_ids in memberships.items():
+        for g in group_ids:
+            for p in posts_by_group[g]:
+                if rng.random() < view_ratio:
+                    view_rows.append({"user_id": u, "post_id": p, "viewed_at": base})
+    for start in range(0, len(view_rows), batch_size):
+        db.session.execute(PostView.__table__.insert(), view_rows[start:start + batch_size])
+    db.session.commit()
+    return len(post_rows), len(view_rows)
+
+
+def legacy_unread_counts(user_id):
+    """A korábbi implementáció: tagságonként egy Post lekérdezés + az összes PostView újratöltése."""
+    unread_counts = {}
+    for membership in GroupMember.query.filter_by(user_id=user_id).all():
+        all_posts = (
+            Post.query
+            .filter_by(group_id=membership.group_id, deleted_at=None)
+            .filter(Post.created_at >= membership.joined_at)
+            .filter(Post.author_id != user_id)
+            .all()
+        )
+        viewed_post_ids = {pv.post_id for pv in PostView.query.filter_by(user_id=user_id).all()}
+        unread_counts[membership.group_id] = sum(1 for p in all_posts if p.id not in viewed_post_ids)
+    return unread_counts
+
+
+def aggregated_unread_counts(user_id):
+    return dict(unread_post_counts(user_id).all())
+
+
+def run(app, poll, pollers, workers):
+    queries = [0]
+
+    def count(*_):
+        queries[0] += 1
+
+    def one_poll(user_id):
+        with app.app_context():
+            start = time.perf_counter()
+            result = poll(user_id)
+            elapsed = (time.perf_counter() - start) * 1000
+            db.session.remove()
+            return elapsed, result
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(one_poll, range(1, pollers + 1)))
+        wall = time.perf_counter() - start
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    latencies = sorted(r[0] for r in results)
+    return {
+        "wall_s": wall,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "queries_per_poll": queries[0] / pollers,
+        "results": [r[1] for r in results],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pollers", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--groups", type=int, default=500)
+    parser.add_argument("--groups-per-user", type=int, default=5)
+    parser.add_argument("--posts-per-group", type=int, default=20)
+    parser.add_argument("--view-ratio", type=float, default=0.5)
+    parser.add_argument("--db", default="sqlite:////tmp/bench_unread.db")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = args.db
+    # Workerenként egy kapcsolat, mint egy valódi connection pool-nál
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"pool_size": args.workers, "max_overflow": 0}
+    db.init_app(app)
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        posts, views = seed(args.pollers, args.groups, args.groups_per_user,
+                            args.posts_per_group, args.view_ratio)
+
+    print(f"{args.pollers} poller, {args.workers} worker, {posts} poszt, {views} PostView")
+    print(f"{'változat':<14}{'össz s':>9}{'p50 ms':>9}{'p95 ms':>9}{'query/poll':>12}")
+    outcomes = {}
+    for name, poll in (("régi ciklus", legacy_unread_counts), ("aggregált", aggregated_unread_counts)):
+        stats = run(app, poll, args.pollers, args.workers)
+        outcomes[name] = stats.pop("results")
+        print(f"{name:<14}{stats['wall_s']:>9.2f}{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}"
+              f"{stats['queries_per_poll']:>12.1f}")
+
+    assert outcomes["régi ciklus"] == outcomes["aggregált"], "eltérő eredmények"
+
+
+if __name__ == "__main__":
+    main()
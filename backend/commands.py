@@ -0,0 +1,55 @@
+import click  # pyright: ignore[reportMissingImports]
+from hobbies import rebuild_interest_histogram, check_interest_histogram
+from search import reindex_subjects
+from counters import reconcile_comment_counts, reconcile_member_counts
+from unread_counters import rebuild_unread_counters
+
+
+def register_commands(app):
+
+    @app.cli.group("interests")
+    def interests():
+        """Csoportonkénti érdeklődési hisztogram karbantartása."""
+
+    @interests.command("rebuild")
+    @click.option("--group-id", type=int, default=None, help="Csak ezt a csoportot építi újra.")
+    def rebuild(group_id):
+        rebuild_interest_histogram(group_id)
+        click.echo("Érdeklődési hisztogram újraépítve.")
+
+    @interests.command("check")
+    @click.option("--group-id", type=int, default=None, help="Csak ezt a csoportot ellenőrzi.")
+    def check(group_id):
+        mismatches = check_interest_histogram(group_id)
+        for g, mask, expected, stored in mismatches:
+            click.echo(f"group={g} mask={mask} elvárt={expected} tárolt={stored}")
+        if mismatches:
+            raise SystemExit(1)
+        click.echo("Az érdeklődési hisztogram konzisztens.")
+
+    @app.cli.group("subjects")
+    def subjects():
+        """Tárgynév-keresés indexének karbantartása."""
+
+    @subjects.command("reindex")
+    def reindex():
+        count = reindex_subjects()
+        click.echo(f"{count} csoport tárgyneve újraindexelve.")
+
+    @app.cli.group("counters")
+    def counters():
+        """Denormalizált számlálók egyeztetése a tényleges sorokkal."""
+
+    @counters.command("reconcile")
+    def reconcile():
+        fixed = reconcile_member_counts()
+        click.echo(f"member_count javítva {fixed} csoportnál.")
+        fixed = reconcile_comment_counts()
+        click.echo(f"comment_count javítva {fixed} posztnál.")
+
+
+    @counters.command("rebuild-unread")
+    def rebuild_unread():
+        """Az olvasatlan számláló store újratöltése a DB-ből."""
+        rebuilt = rebuild_unread_counters()
+        click.echo(f"Olvasatlan számlálók újraépítve {rebuilt} userre.")
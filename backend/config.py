@@ -1,6 +1,11 @@
 import os
 
 class Config:
+    SECRET_KEY = os.environ.get("SECRET_KEY", "dev-secret-key-change-me")
+    # Access token élettartama; lejárat (vagy join/leave) után a refresh tokennel kérhető új
+    ACCESS_TOKEN_MINUTES = int(os.getenv('ACCESS_TOKEN_MINUTES', '60'))
+    REFRESH_TOKEN_DAYS = int(os.getenv('REFRESH_TOKEN_DAYS', '30'))
+
     # ENV-ből olvassa (Render/Railway), local fallback
     db_url = os.getenv('DATABASE_URL') or os.getenv('MYSQL_URL') or 'mysql+pymysql://user:password@db:3306/studybuddy'
     
@@ -8,3 +13,50 @@ class Config:
         db_url = db_url.replace('mysql://', 'mysql+pymysql://', 1)
     
     SQLALCHEMY_DATABASE_URI = db_url
+
+    # Fórum válasz-cache (response_cache.py); Redis URL esetén a workerek közösen használják
+    RESPONSE_CACHE_SIZE = int(os.getenv('RESPONSE_CACHE_SIZE', '1024'))
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', '30'))
+    RESPONSE_CACHE_REDIS_URL = os.getenv('RESPONSE_CACHE_REDIS_URL')
+
+    # SSE (/events/stream): több worker esetén Redis pub/sub, különben folyamaton belüli broker
+    EVENT_PUBSUB_REDIS_URL = os.getenv('EVENT_PUBSUB_REDIS_URL')
+    SSE_KEEPALIVE_SECONDS = int(os.getenv('SSE_KEEPALIVE_SECONDS', '15'))
+    SSE_QUEUE_SIZE = int(os.getenv('SSE_QUEUE_SIZE', '100'))
+
+    # Gunicorn workerek száma (gunicorn.conf.py): 1-nél több esetén a folyamaton belüli
+    # számláló cache nem használható, csak UNREAD_COUNTER_REDIS_URL-lel
+    WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '1'))
+
+    # Olvasatlan számlálók (unread_counters.py): fan-out-on-write legfeljebb ekkora csoportig
+    UNREAD_COUNTER_REDIS_URL = os.getenv('UNREAD_COUNTER_REDIS_URL')
+    UNREAD_COUNTER_TTL = int(os.getenv('UNREAD_COUNTER_TTL', '600'))
+    UNREAD_FANOUT_MAX_MEMBERS = int(os.getenv('UNREAD_FANOUT_MAX_MEMBERS', '500'))
+
+    # Ellenőrzött JWT-k cache-e (auth.py): ennyi token lenyomata fér el workerenként
+    TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', '10000'))
+
+    # Jelszó hash (passwords.py): bcrypt cost és a request workeren kívüli process pool
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', '16'))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', '5'))
+    PASSWORD_HASH_RETRY_AFTER = int(os.getenv('PASSWORD_HASH_RETRY_AFTER', '2'))
+
+    # Rate limit (rate_limit.py): "osztály=vödörméret/token per mp", userenként és IP-nként
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', '1') == '1'
+    RATE_LIMIT_REDIS_URL = os.getenv('RATE_LIMIT_REDIS_URL')
+    RATE_LIMITS_PER_USER = os.getenv('RATE_LIMITS_PER_USER', 'search=30/0.5,write=60/1,poll=30/1,read=120/4')
+    RATE_LIMITS_PER_IP = os.getenv('RATE_LIMITS_PER_IP', 'search=150/2.5,write=300/5,poll=300/10,read=600/20')
+    # Megbízható reverse proxy-k száma (Render/Railway: 1); az IP vödör az X-Forwarded-For
+    # ennyiedik hátulról számolt címét használja. 0, ha az app közvetlenül elérhető.
+    PROXY_FIX_HOPS = int(os.getenv('PROXY_FIX_HOPS', '1'))
+    # Ha a DB pool checkout átlagos várakozása ennyi ms fölé megy, a nem író kéréseket 503-mal elutasítjuk (0 = ki)
+    DB_POOL_SHED_WAIT_MS = int(os.getenv('DB_POOL_SHED_WAIT_MS', '250'))
+
+    # Tagsági claim-ek a tokenben (memberships.py): a user membership_version cache-e
+    MEMBERSHIP_VERSION_REDIS_URL = os.getenv('MEMBERSHIP_VERSION_REDIS_URL')
+    MEMBERSHIP_VERSION_TTL = int(os.getenv('MEMBERSHIP_VERSION_TTL', '5'))
+
+    # Kérésenkénti identity map (identity_map.py): X-Identity-Map-Avoided header a megspórolt lekérésekkel
+    IDENTITY_MAP_DEBUG = os.getenv('IDENTITY_MAP_DEBUG', '0') == '1'
@@ -0,0 +1,79 @@
+from sqlalchemy import func, select  # pyright: ignore[reportMissingImports]
+from models import db, Group, GroupMember, Post, Comment
+
+
+def bump_content_version(group_id):
+    """Atomikusan növeli a csoport tartalomverzióját (a hívó tranzakciójában)."""
+    Group.query.filter_by(id=group_id).update(
+        {Group.content_version: Group.content_version + 1}, synchronize_session=False
+    )
+
+
+def bump_post_content_version(post_id):
+    """Lépteti a poszt csoportjának verzióját, és a posztra írja az új értéket.
+
+    A poszt sync_version-je így a delta szinkron (?since=) kurzora lesz; poszt-,
+    komment- és csatolmányírások hívják.
+    """
+    group_id = select(Post.group_id).where(Post.id == post_id).scalar_subquery()
+    Group.query.filter(Group.id == group_id).update(
+        {Group.content_version: Group.content_version + 1}, synchronize_session=False
+    )
+    new_version = (
+        select(Group.content_version).where(Group.id == Post.group_id).correlate(Post).scalar_subquery()
+    )
+    Post.query.filter_by(id=post_id).update(
+        {Post.sync_version: new_version}, synchronize_session=False
+    )
+
+
+def assign_post_seq(post_id):
+    """Új poszt: a csoport post_seq-jét lépteti, és a posztra írja (az olvasási vízjel kulcsa).
+
+    A léptetés a csoport sorát a commitig zárolja, így a sorszámok a commit sorrendjét
+    követik: ha egy sorszám már látszik, az összes kisebb is commitolt. A created_at erre
+    nem alkalmas, mert a commit előtt (pl. fájlfeltöltés közben) kerül a posztra.
+    """
+    group_id = select(Post.group_id).where(Post.id == post_id).scalar_subquery()
+    Group.query.filter(Group.id == group_id).update(
+        {Group.post_seq: Group.post_seq + 1}, synchronize_session=False
+    )
+    new_seq = select(Group.post_seq).where(Group.id == Post.group_id).correlate(Post).scalar_subquery()
+    Post.query.filter_by(id=post_id).update({Post.group_seq: new_seq}, synchronize_session=False)
+
+
+def reconcile_member_counts():
+    """Kijavítja azokat a csoportokat, ahol a member_count eltér a tényleges tagszámtól.
+
+    Visszaadja a javított csoportok számát.
+    """
+    actual = (
+        select(func.count(GroupMember.user_id))
+        .where(GroupMember.group_id == Group.id)
+        .correlate(Group)
+        .scalar_subquery()
+    )
+    fixed = (
+        db.session.query(Group)
+        .filter(Group.member_count != actual)
+        .update({Group.member_count: actual}, synchronize_session=False)
+    )
+    db.session.commit()
+    return fixed
+
+
+def reconcile_comment_counts():
+    """Kijavítja azokat a posztokat, ahol a comment_count eltér a nem törölt kommentek számától."""
+    actual = (
+        select(func.count(Comment.id))
+        .where(Comment.post_id == Post.id, Comment.deleted_at.is_(None))
+        .correlate(Post)
+        .scalar_subquery()
+    )
+    fixed = (
+        db.session.query(Post)
+        .filter(Post.comment_count != actual)
+        .update({Post.comment_count: actual}, synchronize_session=False)
+    )
+    db.session.commit()
+    return fixed
@@ -0,0 +1,39 @@
+from sqlalchemy import insert  # pyright: ignore[reportMissingImports]
+from sqlalchemy.dialects import mysql, postgresql, sqlite  # pyright: ignore[reportMissingImports]
+from models import db
+
+
+def insert_ignore(table):
+    """Dialektusfüggő INSERT, ami egyedi kulcs ütközésnél csendben nem szúr be.
+
+    MySQL: INSERT IGNORE, SQLite/PostgreSQL: ON CONFLICT DO NOTHING.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "mysql":
+        return mysql.insert(table).prefix_with("IGNORE")
+    if dialect == "sqlite":
+        return sqlite.insert(table).on_conflict_do_nothing()
+    if dialect == "postgresql":
+        return postgresql.insert(table).on_conflict_do_nothing()
+    return insert(table)
+
+
+def insert_or_lock(table, values, key_columns):
+    """Egyetlen sor beszúrása; ha a kulcsa már megvan, a meglévő sort kizárólagosan zárolja.
+
+    MySQL: INSERT ... ON DUPLICATE KEY UPDATE k = k, SQLite/PostgreSQL: ON CONFLICT DO UPDATE.
+    Az INSERT IGNORE ütközéskor csak megosztott zárat ad; ha utána két tranzakció is
+    kizárólagos zárat kér ugyanarra a sorra (FOR UPDATE, UPDATE), InnoDB-n deadlock lesz.
+    Így a zár már a beszúráskor kizárólagos, a párhuzamos hívások itt sorba állnak.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == "mysql":
+        stmt = mysql.insert(table).values(**values)
+        return stmt.on_duplicate_key_update({k: table.c[k] for k in key_columns})
+    if dialect in ("sqlite", "postgresql"):
+        stmt = (sqlite if dialect == "sqlite" else postgresql).insert(table).values(**values)
+        return stmt.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={k: stmt.excluded[k] for k in key_columns}
+        )
+    return insert(table).values(**values)
@@ -0,0 +1,17 @@
+# Éles futtatás: gunicorn -c gunicorn.conf.py "app:create_app()"
+#
+# gevent worker: a long-poll (/groups/unread-counts?wait=) és az SSE (/events/stream)
+# várakozói greenletek, nem foglalnak OS szálat, és várakozás közben DB kapcsolatot sem.
+# Egynél több worker esetén az EVENT_PUBSUB_REDIS_URL kell, hogy minden worker lássa az eseményeket.
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+if workers > 1 and not os.getenv("EVENT_PUBSUB_REDIS_URL"):
+    # Folyamatonkénti broker mellett a másik workeren írt poszt eseménye soha nem érne
+    # el az itteni SSE kliensekhez és long-poll várakozókhoz
+    raise RuntimeError("WEB_CONCURRENCY > 1 esetén az EVENT_PUBSUB_REDIS_URL beállítása kötelező")
+worker_class = "gevent"
+worker_connections = int(os.getenv("WORKER_CONNECTIONS", "1000"))
+# Nagyobb, mint a leghosszabb long-poll (routes.MAX_LONG_POLL_SECONDS)
+timeout = 90
@@ -0,0 +1,212 @@
+from flask import g, has_request_context  # pyright: ignore[reportMissingImports]
+from sqlalchemy import and_, false, func, insert, select  # pyright: ignore[reportMissingImports]
+from sqlalchemy.exc import IntegrityError  # pyright: ignore[reportMissingImports]
+from sqlalchemy.orm import aliased  # pyright: ignore[reportMissingImports]
+from models import db, User, HobbyTag, UserHobby, GroupMember, GroupInterestCount
+
+# Előjeles BIGINT-be 63 bit fér el; a 63-nál nagyobb tag ID-k körbefordulnak
+HOBBY_MASK_BITS = 63
+
+# A választható hobbik (frontend: Register.jsx HOBBIES), kisbetűsen. Csak ezekből lesz tag,
+# így a tagkészlet nem nőhet a maszk fölé tetszőleges regisztrációs adatokkal; a user
+# hobbies szövege ettől még mindent megőriz.
+HOBBIES = frozenset(name.lower() for name in (
+    "Sport", "Olvasás", "Zene", "Film", "Fotózás", "Főzés", "Utazás", "Rajzolás", "Festés",
+    "Kertészkedés", "Tánc", "Színház", "Játék", "Programozás", "Matematika", "Tudomány",
+    "Nyelvtanulás", "Jóga", "Meditáció", "Kézműves", "Horgászat", "Kerékpározás", "Futás",
+    "Úszás", "Társasjáték",
+))
+
+
+def normalize_hobbies(raw):
+    """Listából vagy vesszővel elválasztott stringből egyedi, kisbetűs hobbinevek (sorrendtartó)."""
+    if raw is None:
+        return []
+    items = raw if isinstance(raw, (list, tuple, set)) else str(raw).split(",")
+
+    names = []
+    for item in items:
+        name = str(item).strip().lower()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def hobby_bit(tag_id):
+    return 1 << ((tag_id - 1) % HOBBY_MASK_BITS)
+
+
+def hobby_mask(tag_ids):
+    mask = 0
+    for tag_id in tag_ids:
+        mask |= hobby_bit(tag_id)
+    return mask
+
+
+def intern_hobby_tags(names):
+    """Visszaadja a nevekhez tartozó HobbyTag sorokat, a hiányzókat létrehozza."""
+    if not names:
+        return []
+
+    tags = {t.name: t for t in HobbyTag.query.filter(HobbyTag.name.in_(names)).all()}
+
+    for name in names:
+        if name in tags:
+            continue
+        try:
+            with db.session.begin_nested():
+                tag = HobbyTag(name=name)
+                db.session.add(tag)
+        except IntegrityError:
+            # Egy párhuzamos kérés közben már létrehozta
+            tag = HobbyTag.query.filter_by(name=name).one()
+        tags[name] = tag
+
+    return [tags[name] for name in names]
+
+
+def sync_user_hobby_tags(user):
+    """A `user.hobbies` szöveg alapján frissíti a tag kapcsolótáblát és a bitmaszkot.
+
+    A user-nek már ID-val kell rendelkeznie (flush után).
+    """
+    tags = intern_hobby_tags([name for name in normalize_hobbies(user.hobbies) if name in HOBBIES])
+
+    UserHobby.query.filter_by(user_id=user.id).delete(synchronize_session=False)
+    for tag in tags:
+        db.session.add(UserHobby(user_id=user.id, tag_id=tag.id))
+
+    old_mask = user.hobby_mask or 0
+    new_mask = hobby_mask(t.id for t in tags)
+    user.hobby_mask = new_mask
+
+    # A user csoportjainak hisztogramját át kell könyvelni az új maszkra
+    if new_mask != old_mask:
+        memberships = GroupMember.query.filter_by(user_id=user.id).all()
+        for m in memberships:
+            adjust_interest_histogram(m.group_id, old_mask, -1)
+            adjust_interest_histogram(m.group_id, new_mask, 1)
+
+    return tags
+
+
+def hobby_masks_exact():
+    """Igaz, ha minden tag saját bitet kapott, vagyis a maszkok között nincs ütközés.
+
+    Kérésen belül egyszer kérdezzük le.
+    """
+    if has_request_context() and "hobby_masks_exact" in g:
+        return g.hobby_masks_exact
+
+    max_tag_id = db.session.query(func.max(HobbyTag.id)).scalar() or 0
+    exact = max_tag_id <= HOBBY_MASK_BITS
+    if has_request_context():
+        g.hobby_masks_exact = exact
+    return exact
+
+
+def interest_match_clause(user):
+    """SQL feltétel: a sorban szereplő User-nek van-e közös hobbija `user`-rel.
+
+    Amíg a tagkészlet belefér a maszkba, egyetlen bitenkénti ÉS elég; utána a maszk
+    csak előszűrő, és a kapcsolótábla dönt.
+    """
+    if not user.hobby_mask:
+        return false()
+
+    mask_match = User.hobby_mask.bitwise_and(user.hobby_mask) != 0
+    if hobby_masks_exact():
+        return mask_match
+
+    theirs = aliased(UserHobby)
+    mine = aliased(UserHobby)
+    shared_tag = (
+        select(theirs.tag_id)
+        .where(
+            theirs.user_id == User.id,
+            theirs.tag_id.in_(select(mine.tag_id).where(mine.user_id == user.id))
+        )
+        .exists()
+    )
+    return and_(mask_match, shared_tag)
+
+
+def adjust_interest_histogram(group_id, mask, delta):
+    """Atomikusan módosítja egy (csoport, maszk) hisztogram-cella tagszámát."""
+    cell = GroupInterestCount.query.filter_by(group_id=group_id, hobby_mask=mask)
+    updated = cell.update(
+        {GroupInterestCount.member_count: GroupInterestCount.member_count + delta},
+        synchronize_session=False
+    )
+
+    if not updated and delta > 0:
+        try:
+            with db.session.begin_nested():
+                db.session.add(GroupInterestCount(group_id=group_id, hobby_mask=mask, member_count=delta))
+        except IntegrityError:
+            # Egy párhuzamos csatlakozás közben létrehozta a cellát
+            cell.update(
+                {GroupInterestCount.member_count: GroupInterestCount.member_count + delta},
+                synchronize_session=False
+            )
+
+    if delta < 0:
+        cell.filter(GroupInterestCount.member_count <= 0).delete(synchronize_session=False)
+
+
+def _expected_interest_histogram(group_id=None):
+    query = (
+        db.session.query(GroupMember.group_id, User.hobby_mask, func.count(GroupMember.user_id))
+        .join(User, User.id == GroupMember.user_id)
+        .group_by(GroupMember.group_id, User.hobby_mask)
+    )
+    if group_id is not None:
+        query = query.filter(GroupMember.group_id == group_id)
+    return query
+
+
+def rebuild_interest_histogram(group_id=None):
+    """Újraépíti a hisztogramot a group_members táblából (egy csoportra vagy mindre)."""
+    stale = GroupInterestCount.query
+    if group_id is not None:
+        stale = stale.filter_by(group_id=group_id)
+    stale.delete(synchronize_session=False)
+
+    expected = _expected_interest_histogram(group_id).subquery()
+    db.session.execute(
+        insert(GroupInterestCount).from_select(
+            ["group_id", "hobby_mask", "member_count"],
+            select(expected)
+        )
+    )
+    db.session.commit()
+
+
+def check_interest_histogram(group_id=None):
+    """Összeveti a hisztogramot a tényleges tagsággal.
+
+    Eltérések listája: (group_id, hobby_mask, elvárt, tárolt).
+    """
+    expected = {
+        (g, mask): count for g, mask, count in _expected_interest_histogram(group_id).all()
+    }
+
+    stored_query = db.session.query(
+        GroupInterestCount.group_id, GroupInterestCount.hobby_mask, GroupInterestCount.member_count
+    )
+    if group_id is not None:
+        stored_query = stored_query.filter(GroupInterestCount.group_id == group_id)
+    stored = {(g, mask): count for g, mask, count in stored_query.all()}
+
+    mismatches = []
+    for key in sorted(set(expected) | set(stored)):
+        if expected.get(key, 0) != stored.get(key, 0):
+            mismatches.append((key[0], key[1], expected.get(key, 0), stored.get(key, 0)))
+    return mismatches
+
+
+def init_hobby_tags(app):
+    @app.teardown_request
+    def drop_hobby_masks_exact(_exc):
+        # Egy már meglévő app contextben (tesztek, CLI) a g túléli a kérést
+        g.pop("hobby_masks_exact", None)
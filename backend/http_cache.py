@@ -0,0 +1,27 @@
+import hashlib
+from flask import request  # pyright: ignore[reportMissingImports]
+
+
+def content_etag(kind, scope_id, version):
+    """Erős ETag egy verziózott listához; a query string (lapozás) is része."""
+    etag = f"{kind}-{scope_id}-{version}"
+    if request.query_string:
+        etag += "-" + hashlib.sha1(request.query_string).hexdigest()[:12]
+    return etag
+
+
+def is_not_modified(etag):
+    """Igaz, ha a kliens If-None-Match headere már ezt az ETag-et tartalmazza."""
+    return request.if_none_match.contains(etag)
+
+
+def not_modified(etag):
+    """Üres 304 válasz, szerializálás nélkül."""
+    return "", 304, {"ETag": f'"{etag}"', "Cache-Control": "private, no-cache"}
+
+
+def with_etag(response, etag):
+    """ETag és revalidálást kérő Cache-Control a válaszra (a böngésző így küld If-None-Match-et)."""
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
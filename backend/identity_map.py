@@ -0,0 +1,74 @@
+from flask import current_app, g  # pyright: ignore[reportMissingImports]
+from models import db, User, Group, GroupMember
+
+
+class IdentityMap:
+    """Kérésenkénti memo: user, csoport és a user tagságai legfeljebb egyszer töltődnek be.
+
+    A SQLAlchemy session identity map-je csak PK alapú get-et spórol meg; ez a hiányzó
+    sorokat (None) és a tagsági halmazt is megjegyzi. `avoided` a megspórolt ismételt
+    lekérések száma (debug metrika).
+    """
+
+    def __init__(self):
+        self.users = {}
+        self.groups = {}
+        self.memberships = {}
+        self.avoided = 0
+
+    def _memo(self, cache, key, load):
+        if key in cache:
+            self.avoided += 1
+            return cache[key]
+        cache[key] = value = load()
+        return value
+
+    def user(self, user_id):
+        return self._memo(self.users, user_id, lambda: db.session.get(User, user_id))
+
+    def group(self, group_id):
+        return self._memo(self.groups, group_id, lambda: db.session.get(Group, group_id))
+
+    def group_ids_of(self, user_id):
+        return self._memo(self.memberships, user_id, lambda: {
+            group_id for (group_id,) in
+            db.session.query(GroupMember.group_id).filter(GroupMember.user_id == user_id).all()
+        })
+
+    def forget_memberships(self, user_id):
+        self.memberships.pop(user_id, None)
+
+
+def request_identity_map():
+    if "identity_map" not in g:
+        g.identity_map = IdentityMap()
+    return g.identity_map
+
+
+def load_user(user_id):
+    return request_identity_map().user(user_id)
+
+
+def load_group(group_id):
+    return request_identity_map().group(group_id)
+
+
+def user_group_ids(user_id):
+    """A user összes csoportjának ID-halmaza, kérésenként egy lekérdezéssel."""
+    return request_identity_map().group_ids_of(user_id)
+
+
+def init_identity_map(app):
+    @app.after_request
+    def report_avoided_lookups(response):
+        identity_map = g.get("identity_map")
+        if identity_map is not None and identity_map.avoided:
+            current_app.logger.debug("identity map: %d ismételt lekérés megspórolva", identity_map.avoided)
+            if app.config.get("IDENTITY_MAP_DEBUG"):
+                response.headers["X-Identity-Map-Avoided"] = str(identity_map.avoided)
+        return response
+
+    @app.teardown_request
+    def drop_identity_map(_exc):
+        # Egy már meglévő app contextben (tesztek, CLI) a g túléli a kérést
+        g.pop("identity_map", None)
@@ -0,0 +1,132 @@
+import threading
+import time
+
+from flask import current_app  # pyright: ignore[reportMissingImports]
+from auth import current_identity
+from identity_map import load_user, request_identity_map, user_group_ids
+from models import db, User
+
+# Ennél több csoport ID nem kerül a tokenbe (méret); ilyenkor csak a verzió, és a DB dönt
+MAX_TOKEN_GROUPS = 64
+
+
+def membership_claims(user_id):
+    """A tokenbe kerülő tagsági claim-ek: {"mv": verzió, "groups": [csoport ID-k]}.
+
+    A verziót olvassuk előbb: egy közben lezajló join/leave így legfeljebb régebbi
+    verziót ad a tokennek, amit az első ellenőrzés DB fallbackkel kezel.
+    """
+    user = load_user(user_id)
+    version = user.membership_version if user is not None else 0
+    group_ids = sorted(user_group_ids(user_id))
+    claims = {"mv": version or 0}
+    if len(group_ids) <= MAX_TOKEN_GROUPS:
+        claims["groups"] = group_ids
+    return claims
+
+
+class DictMembershipVersions:
+    """Folyamaton belüli user_id -> membership_version cache rövid lejárattal.
+
+    Több worker esetén egy másik folyamat join/leave-je legfeljebb `ttl` mp-ig nem
+    látszik itt; megosztott állapothoz MEMBERSHIP_VERSION_REDIS_URL kell.
+    """
+
+    def __init__(self, ttl=5, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._versions.get(user_id)
+            if entry is None or entry[1] <= self.clock():
+                self._versions.pop(user_id, None)
+                return None
+            return entry[0]
+
+    def remember(self, user_id, version):
+        """Csak nem régebbi verziót ír felül; a ténylegesen tárolt verziót adja vissza."""
+        with self._lock:
+            entry = self._versions.get(user_id)
+            if entry is not None and entry[1] > self.clock() and entry[0] > version:
+                return entry[0]
+            self._versions[user_id] = (version, self.clock() + self.ttl)
+            return version
+
+
+# Compare-and-set: régebbi verzió nem írhatja felül az újabbat
+_REMEMBER_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]))
+local version = tonumber(ARGV[1])
+if current and current > version then return current end
+redis.call('SET', KEYS[1], version, 'EX', ARGV[2])
+return version
+"""
+
+
+class RedisMembershipVersions:
+    """Workerek között megosztott verzió cache Redis-kompatibilis kliensen."""
+
+    def __init__(self, client, ttl=5, prefix="studybuddy:membership-version"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, user_id):
+        value = self.client.get(f"{self.prefix}:{user_id}")
+        return int(value) if value is not None else None
+
+    def remember(self, user_id, version):
+        return int(self.client.eval(_REMEMBER_SCRIPT, 1, f"{self.prefix}:{user_id}", version, self.ttl))
+
+
+def init_membership_versions(app):
+    ttl = app.config.get("MEMBERSHIP_VERSION_TTL", 5)
+    redis_url = app.config.get("MEMBERSHIP_VERSION_REDIS_URL")
+    if redis_url:
+        import redis  # pyright: ignore[reportMissingImports]
+        versions = RedisMembershipVersions(redis.Redis.from_url(redis_url, decode_responses=True), ttl)
+    else:
+        versions = DictMembershipVersions(ttl)
+    app.extensions["membership_versions"] = versions
+    return versions
+
+
+def membership_versions():
+    return current_app.extensions["membership_versions"]
+
+
+def current_membership_version(user_id):
+    versions = membership_versions()
+    version = versions.get(user_id)
+    if version is None:
+        version = db.session.query(User.membership_version).filter(User.id == user_id).scalar() or 0
+        # Egy közben lezajlott join/leave már újabb verziót tárolt: azt nem írjuk vissza régire
+        version = versions.remember(user_id, version)
+    return version
+
+
+def membership_changed(user_id):
+    """join/leave commit után: az új verzió tárolása, így a régi tokenek claim-jei nem számítanak.
+
+    Törlés helyett írunk: egy a commit előtt olvasott (régi) verzió így már nem kerülhet
+    vissza a cache-be.
+    """
+    version = db.session.query(User.membership_version).filter(User.id == user_id).scalar() or 0
+    membership_versions().remember(user_id, version)
+    request_identity_map().forget_memberships(user_id)
+
+
+def is_group_member(user_id, group_id):
+    """Tagság ellenőrzése a token claim-jeiből, ha a verziójuk friss; különben a DB-ből.
+
+    Csak a pozitív claim-et fogadjuk el DB nélkül: a "nem tag" válasz ritka (403), és
+    így a verzióléptetés nélküli tagság-írások (admin, migráció) sem zárnak ki senkit.
+    """
+    claims = current_identity()
+    if claims and claims.get("user_id") == user_id and group_id in claims.get("groups", ()):
+        if claims.get("mv") == current_membership_version(user_id):
+            return True
+    return group_id in user_group_ids(user_id)
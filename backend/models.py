@@ -14,10 +14,15 @@ class User(db.Model):
     major = db.Column(db.String(100), nullable=True)
     name = db.Column(db.String(100), nullable=True)  
     hobbies = db.Column(db.Text, nullable=True)
+    # A hobbi tagek bitmaszkja (lásd hobbies.py), gyors érdeklődés-egyezéshez
+    hobby_mask = db.Column(db.BigInteger, default=0, server_default="0", nullable=False)
     avatar_url = db.Column(db.String(255), nullable=True)
 
     is_active = db.Column(db.Boolean, default=True, nullable=False)
 
+    # Minden csatlakozás/kilépés növeli; a /groups/my-groups ETag-je ebből készül
+    membership_version = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -31,10 +36,32 @@ class User(db.Model):
     
     notifications = relationship('Notification', backref='recipient', lazy=True, cascade="all, delete-orphan")
 
+    hobby_links = relationship('UserHobby', backref='user', lazy=True, cascade="all, delete-orphan")
+
     def __repr__(self):
         return f"<User {self.email}>"
 
 
+class HobbyTag(db.Model):
+    __tablename__ = 'hobby_tags'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+
+    def __repr__(self):
+        return f"<HobbyTag {self.name}>"
+
+
+class UserHobby(db.Model):
+    __tablename__ = 'user_hobbies'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    tag_id = db.Column(db.Integer, db.ForeignKey('hobby_tags.id'), primary_key=True, index=True)
+
+    def __repr__(self):
+        return f"<UserHobby User:{self.user_id} Tag:{self.tag_id}>"
+
+
 class GroupMember(db.Model):
     __tablename__ = 'group_members'
     
@@ -48,15 +75,38 @@ class GroupMember(db.Model):
         return f"<GroupMember Group:{self.group_id} User:{self.user_id}>"
 
 
+class GroupInterestCount(db.Model):
+    """Csoportonként hány tag rendelkezik adott hobbi bitmaszkkal (inkrementálisan karbantartva)."""
+    __tablename__ = 'group_interest_counts'
+
+    group_id = db.Column(db.Integer, db.ForeignKey('study_groups.id'), primary_key=True)
+    hobby_mask = db.Column(db.BigInteger, primary_key=True, autoincrement=False)
+    member_count = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<GroupInterestCount Group:{self.group_id} Mask:{self.hobby_mask} Count:{self.member_count}>"
+
+
 class Group(db.Model):
     __tablename__ = 'study_groups'
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(150), unique=True, nullable=False)
     subject = db.Column(db.String(100), nullable=False, index=True) 
+    # Kisbetűs, ékezetmentes subject a kereséshez (lásd search.py)
+    subject_key = db.Column(db.String(100), nullable=False, default="", server_default="", index=True)
     description = db.Column(db.Text, nullable=True)
     
     creator_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+
+    # Denormalizált tagszám: join/leave ugyanabban a tranzakcióban módosítja
+    member_count = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+
+    # Poszt/komment/esemény/csatolmány írások növelik; a listák ETag-je erre épül
+    content_version = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+
+    # Az utoljára kiosztott poszt sorszám (counters.assign_post_seq): csak új poszt lépteti
+    post_seq = db.Column(db.Integer, default=0, server_default="0", nullable=False)
     
     deleted_at = db.Column(db.DateTime, nullable=True, index=True)
     
@@ -71,6 +121,28 @@ class Group(db.Model):
         return f"<Group {self.name}>"
 
 
+class SubjectGroupSlot(db.Model):
+    """Tárgyanként az utoljára kiosztott automatikus csoport sorszáma ("... Study Group #N")."""
+    __tablename__ = 'subject_group_slots'
+
+    subject = db.Column(db.String(100), primary_key=True)
+    last_slot = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return f"<SubjectGroupSlot {self.subject} #{self.last_slot}>"
+
+
+class SubjectTrigram(db.Model):
+    """A normalizált subject trigramjai; a részszöveges keresés indexe."""
+    __tablename__ = 'subject_trigrams'
+
+    trigram = db.Column(db.String(3), primary_key=True)
+    group_id = db.Column(db.Integer, db.ForeignKey('study_groups.id'), primary_key=True, index=True)
+
+    def __repr__(self):
+        return f"<SubjectTrigram {self.trigram!r} Group:{self.group_id}>"
+
+
 class Event(db.Model):
     __tablename__ = 'events'
     
@@ -101,6 +173,15 @@ class Post(db.Model):
     
     group_id = db.Column(db.Integer, db.ForeignKey('study_groups.id'), nullable=False, index=True)
     author_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+
+    # Denormalizált, nem törölt kommentek száma: a komment írások SQL kifejezéssel módosítják
+    comment_count = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+
+    # A csoport content_version-je az utolsó írásnál (delta szinkron: ?since=)
+    sync_version = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+
+    # Csoporton belüli sorszám a commit sorrendjében; az olvasási vízjel ehhez mér
+    group_seq = db.Column(db.Integer, default=0, server_default="0", nullable=False)
     
     deleted_at = db.Column(db.DateTime, nullable=True, index=True)
 
@@ -109,6 +190,15 @@ class Post(db.Model):
     
     comments = relationship('Comment', backref='post', lazy=True, cascade="all, delete-orphan")
 
+    # A fórum keyset lapozásához: group_id szűrés + (created_at, id) rendezés
+    # A delta szinkronhoz: group_id szűrés + sync_version tartomány
+    # Az olvasatlan számoláshoz: group_id szűrés + group_seq tartomány
+    __table_args__ = (
+        db.Index('ix_posts_group_created_id', 'group_id', 'created_at', 'id'),
+        db.Index('ix_posts_group_sync_version', 'group_id', 'sync_version'),
+        db.Index('ix_posts_group_seq', 'group_id', 'group_seq'),
+    )
+
     def __repr__(self):
         return f"<Post {self.title[:20]}>"
 
@@ -131,7 +221,21 @@ class Comment(db.Model):
         return f"<Comment ID:{self.id}>"
 
 
+class GroupReadMark(db.Model):
+    """Csoportonkénti olvasási vízjel: a last_read_seq sorszámig (Post.group_seq) minden poszt olvasott."""
+    __tablename__ = 'group_read_marks'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    group_id = db.Column(db.Integer, db.ForeignKey('study_groups.id'), primary_key=True)
+
+    last_read_seq = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+
+    def __repr__(self):
+        return f"<GroupReadMark User:{self.user_id} Group:{self.group_id} Seq:{self.last_read_seq}>"
+
+
 class PostView(db.Model):
+    """Posztonkénti olvasási állapot, csak a vízjel fölötti posztokra (az alattiak törlődnek)."""
     __tablename__ = 'post_views'
     
     id = db.Column(db.Integer, primary_key=True)
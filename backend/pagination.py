@@ -0,0 +1,59 @@
+import base64
+import binascii
+import json
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def encode_cursor(*values):
+    """Átlátszatlan keyset kurzor az utolsó elem rendezési kulcsából."""
+    raw = json.dumps(list(values), separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError):
+        raise PaginationError("Hibás cursor")
+    if not isinstance(values, list):
+        raise PaginationError("Hibás cursor")
+    return values
+
+
+def page_args(args, default_limit=DEFAULT_PAGE_SIZE):
+    """(limit, cursor értékek vagy None) a `limit` és `cursor` query paraméterekből.
+
+    Ha egyik sincs megadva, a limit None: a régi (lapozást nem ismerő) kliensek
+    továbbra is a teljes listát kapják.
+    """
+    if "limit" not in args and "cursor" not in args:
+        return None, None
+    try:
+        limit = int(args.get("limit", default_limit))
+    except (TypeError, ValueError):
+        raise PaginationError("A limit csak egész szám lehet")
+    if limit < 1 or limit > MAX_PAGE_SIZE:
+        raise PaginationError(f"A limit 1 és {MAX_PAGE_SIZE} között lehet")
+
+    cursor = args.get("cursor")
+    return limit, (decode_cursor(cursor) if cursor else None)
+
+
+def fetch_size(limit):
+    """A lekérdezés LIMIT-je: eggyel több sor, hogy kiderüljön, van-e következő lap."""
+    return None if limit is None else limit + 1
+
+
+def split_page(rows, limit, sort_key):
+    """limit+1 sorból levágja a lapot; a következő kurzor None, ha nincs több elem."""
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(*sort_key(page[-1]))
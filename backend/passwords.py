@@ -0,0 +1,111 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+
+import bcrypt  # pyright: ignore[reportMissingImports]
+from flask import current_app  # pyright: ignore[reportMissingImports]
+
+
+class PasswordHasherBusy(Exception):
+    """A hash pool sora tele van (vagy nem végzett időben): a kérést 503-mal utasítjuk el."""
+
+
+def hash_password(password, rounds):
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode()
+
+
+def check_password(password, password_hash):
+    try:
+        return bcrypt.checkpw(password.encode("utf-8"), password_hash.encode())
+    except ValueError:
+        # Nem bcrypt formátumú tárolt hash
+        return False
+
+
+def hash_rounds(password_hash):
+    """A tárolt bcrypt hash cost faktora ("$2b$12$..." -> 12), ismeretlen formátumnál None."""
+    parts = password_hash.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+# Folyamatonként egy pool munkaszámonként, mint egy DB engine: az app példányok osztoznak rajta
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def _shared_executor(workers):
+    with _executors_lock:
+        if workers not in _executors:
+            # spawn: a gevent/szálas workerből forkolt gyerek folyamat örökölt zárakon akadhatna el
+            _executors[workers] = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+        return _executors[workers]
+
+
+class PasswordHasher:
+    """bcrypt a request workeren kívül, korlátos process poolban, belépés-szabályozással.
+
+    Legfeljebb `max_pending` hash lehet egyszerre a poolban (futó + várakozó); ezen felül
+    a hívó azonnal PasswordHasherBusy-t kap, ahelyett hogy a worker a sorban állna.
+    `workers=0` esetén a hívó szálán fut (fejlesztés, egyszerű telepítés).
+    """
+
+    def __init__(self, rounds=12, workers=2, max_pending=16, timeout=5):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise PasswordHasherBusy()
+            self._pending += 1
+        try:
+            future = _shared_executor(self.workers).submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _f: self._release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise PasswordHasherBusy()
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    def pending(self):
+        with self._lock:
+            return self._pending
+
+    def hash(self, password):
+        return self._run(hash_password, password, self.rounds)
+
+    def check(self, password, password_hash):
+        return self._run(check_password, password, password_hash)
+
+    def needs_rehash(self, password_hash):
+        return hash_rounds(password_hash) not in (None, self.rounds)
+
+
+def init_password_hasher(app):
+    hasher = PasswordHasher(
+        rounds=app.config.get("BCRYPT_ROUNDS", 12),
+        workers=app.config.get("PASSWORD_HASH_WORKERS", 2),
+        max_pending=app.config.get("PASSWORD_HASH_MAX_PENDING", 16),
+        timeout=app.config.get("PASSWORD_HASH_TIMEOUT", 5),
+    )
+    app.extensions["password_hasher"] = hasher
+    return hasher
+
+
+def password_hasher():
+    return current_app.extensions["password_hasher"]
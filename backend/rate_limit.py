@@ -0,0 +1,238 @@
+import threading
+import time
+
+from flask import current_app, has_app_context, jsonify, request  # pyright: ignore[reportMissingImports]
+from sqlalchemy import event  # pyright: ignore[reportMissingImports]
+from sqlalchemy.orm import Session  # pyright: ignore[reportMissingImports]
+from auth import current_identity
+
+# Route osztályok: a keresés drága, a poll gyakori, az írás ritka de védendő
+SEARCH_ENDPOINTS = {"search_groups", "search_subjects", "groups_by_subject"}
+POLL_ENDPOINTS = {"get_unread_post_counts", "event_stream_route"}
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def route_class(endpoint, method):
+    if endpoint in SEARCH_ENDPOINTS:
+        return "search"
+    if endpoint in POLL_ENDPOINTS:
+        return "poll"
+    if method in WRITE_METHODS:
+        return "write"
+    return "read"
+
+
+def parse_budgets(spec):
+    """"search=30/0.5,write=60/1" -> {"search": (30.0, 0.5), ...}: (vödör méret, token/mp)."""
+    budgets = {}
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        name, budget = item.split("=")
+        capacity, per_second = budget.split("/")
+        budgets[name.strip()] = (float(capacity), float(per_second))
+    return budgets
+
+
+class MemoryBucketStore:
+    """Folyamaton belüli token bucket store: kulcs -> (tokenek, utolsó frissítés).
+
+    `max_keys` fölött a legrégebben használt vödrök felét eldobjuk; ezek jellemzően már
+    visszatöltődtek, így újra létrehozva (teli vödörrel) ugyanott tartanának.
+    """
+
+    def __init__(self, max_keys=100000, clock=time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, per_second, cost=1):
+        """(engedélyezve, hány mp múlva lesz elég token)."""
+        now = self.clock()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * per_second)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                allowed, retry_after = True, 0
+            else:
+                self._buckets[key] = (tokens, now)
+                allowed, retry_after = False, (cost - tokens) / per_second
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+        return allowed, retry_after
+
+    def _prune(self, now):
+        oldest = sorted(self._buckets, key=lambda k: self._buckets[k][1])
+        for key in oldest[:len(oldest) // 2]:
+            del self._buckets[key]
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+# Atomi token bucket a szerver órájával; a kulcs magától lejár, amikor a vödör újra teli lenne
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local per_second = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + (now - updated) * per_second)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / per_second * 1000))
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisBucketStore:
+    """Workerek között megosztott token bucket store Redis-kompatibilis kliensen."""
+
+    def __init__(self, client, prefix="studybuddy:ratelimit"):
+        self.client = client
+        self.prefix = prefix
+
+    def take(self, key, capacity, per_second, cost=1):
+        allowed, tokens = self.client.eval(
+            _TAKE_SCRIPT, 1, f"{self.prefix}:{key}", capacity, per_second, cost
+        )
+        if allowed:
+            return True, 0
+        return False, (cost - float(tokens)) / per_second
+
+    def clear(self):
+        keys = list(self.client.scan_iter(f"{self.prefix}:*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+class PoolWaitMonitor:
+    """A DB pool checkout várakozási idejének mozgóátlaga (EWMA, ms).
+
+    A minta `window` mp után elavul: terheléscsökkentés közben kevés új minta jön,
+    így a rendszer magától visszaáll, ha a torlódás megszűnt.
+    """
+
+    def __init__(self, alpha=0.2, window=10, clock=time.monotonic):
+        self.alpha = alpha
+        self.window = window
+        self.clock = clock
+        self._average = 0.0
+        self._updated = None
+        self._lock = threading.Lock()
+
+    def record(self, wait_ms):
+        with self._lock:
+            if self._updated is None or self.clock() - self._updated > self.window:
+                self._average = wait_ms
+            else:
+                self._average += self.alpha * (wait_ms - self._average)
+            self._updated = self.clock()
+
+    def average(self):
+        with self._lock:
+            if self._updated is None or self.clock() - self._updated > self.window:
+                return 0.0
+            return self._average
+
+
+class RateLimiter:
+    def __init__(self, store, user_budgets, ip_budgets, pool_monitor,
+                 shed_wait_ms=0, shed_classes=("search", "poll", "read")):
+        self.store = store
+        self.user_budgets = user_budgets
+        self.ip_budgets = ip_budgets
+        self.pool_monitor = pool_monitor
+        self.shed_wait_ms = shed_wait_ms
+        self.shed_classes = set(shed_classes)
+
+    def check(self, kind, user_id, ip):
+        """None, ha a kérés mehet; különben (HTTP státusz, Retry-After mp)."""
+        if self.shed_wait_ms and kind in self.shed_classes:
+            if self.pool_monitor.average() > self.shed_wait_ms:
+                return 503, 1
+
+        buckets = []
+        if ip and kind in self.ip_budgets:
+            buckets.append((f"ip:{ip}:{kind}", self.ip_budgets[kind]))
+        if user_id and kind in self.user_budgets:
+            buckets.append((f"user:{user_id}:{kind}", self.user_budgets[kind]))
+        for key, (capacity, per_second) in buckets:
+            allowed, retry_after = self.store.take(key, capacity, per_second)
+            if not allowed:
+                return 429, max(1, int(retry_after + 0.999))
+        return None
+
+
+def limit_request():
+    """before_request: route osztály szerinti user/IP vödör, DB pool torlódásnál terheléscsökkentés."""
+    if request.method == "OPTIONS" or request.endpoint is None:
+        return None
+    limiter = current_app.extensions["rate_limiter"]
+
+    kind = route_class(request.endpoint, request.method)
+    identity = current_identity() if request.headers.get("Authorization") else None
+    user_id = identity["user_id"] if identity else None
+    rejected = limiter.check(kind, user_id, request.remote_addr)
+    if rejected is not None:
+        status, retry_after = rejected
+        if status == 503:
+            body = {"error": "A szerver túlterhelt, próbáld újra később!"}
+        else:
+            body = {"error": "Túl sok kérés, próbáld újra később!"}
+        response = jsonify(body)
+        response.headers["Retry-After"] = str(retry_after)
+        return response, status
+    return None
+
+
+def _checkout_started(session, transaction):
+    if transaction.parent is None:
+        session.info["pool_checkout_started"] = time.perf_counter()
+
+
+def _checkout_finished(session, transaction, connection):
+    """A session első kapcsolatánál méri a pool várakozást: csak a DB-t ténylegesen használó
+    kérések vesznek ki kapcsolatot, és csak annyi ideig, amíg a route dolgozik vele."""
+    started = session.info.pop("pool_checkout_started", None)
+    if started is None or not has_app_context():
+        return
+    limiter = current_app.extensions.get("rate_limiter")
+    if limiter is not None and limiter.shed_wait_ms:
+        limiter.pool_monitor.record((time.perf_counter() - started) * 1000)
+
+
+def init_rate_limiter(app):
+    """RATE_LIMIT_REDIS_URL esetén a workerek közös Redis store-t használnak."""
+    redis_url = app.config.get("RATE_LIMIT_REDIS_URL")
+    if redis_url:
+        import redis  # pyright: ignore[reportMissingImports]
+        store = RedisBucketStore(redis.Redis.from_url(redis_url, decode_responses=True))
+    else:
+        store = MemoryBucketStore()
+
+    limiter = RateLimiter(
+        store,
+        parse_budgets(app.config.get("RATE_LIMITS_PER_USER", "")),
+        parse_budgets(app.config.get("RATE_LIMITS_PER_IP", "")),
+        PoolWaitMonitor(),
+        shed_wait_ms=app.config.get("DB_POOL_SHED_WAIT_MS", 0),
+    )
+    app.extensions["rate_limiter"] = limiter
+    if app.config.get("RATE_LIMIT_ENABLED", True):
+        app.before_request(limit_request)
+        # Folyamatonként egyszer: a listener az aktuális app limiterébe ír
+        if not event.contains(Session, "after_begin", _checkout_finished):
+            event.listen(Session, "after_transaction_create", _checkout_started)
+            event.listen(Session, "after_begin", _checkout_finished)
+    return limiter
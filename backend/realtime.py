@@ -0,0 +1,167 @@
+import json
+import queue
+import threading
+
+from flask import current_app  # pyright: ignore[reportMissingImports]
+
+
+class Subscription:
+    """Egy nyitott SSE kapcsolat korlátos eseménysora."""
+
+    def __init__(self, user_id, max_events):
+        self.user_id = user_id
+        self.events = queue.Queue(maxsize=max_events)
+        # Ha a kliens nem olvas elég gyorsan, eldobjuk a sort és újraszinkronizálást kérünk
+        self.overflowed = False
+
+    def put(self, event, data):
+        try:
+            self.events.put_nowait((event, data))
+        except queue.Full:
+            self.overflowed = True
+
+    def reset(self):
+        """Túlcsordulás után: a sorban maradt (hiányos) eseményeket eldobjuk."""
+        self.overflowed = False
+        while True:
+            try:
+                self.events.get_nowait()
+            except queue.Empty:
+                return
+
+    def get(self, timeout):
+        """A következő esemény, vagy None, ha `timeout` másodpercig nem jött semmi."""
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBroker:
+    """Folyamaton belüli broker: user_id -> nyitott feliratkozások.
+
+    A publikálás a pub/sub backenden megy keresztül, így több worker esetén minden
+    folyamat brokere megkapja az üzenetet, és a saját kapcsolatainak továbbítja.
+    """
+
+    def __init__(self, pubsub=None, max_events=100):
+        self.max_events = max_events
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+        self.pubsub = pubsub or LocalPubSub()
+        self.pubsub.start(self.deliver)
+
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id, self.max_events)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def connection_count(self):
+        with self._lock:
+            return sum(len(s) for s in self._subscriptions.values())
+
+    def publish(self, user_ids, event, data):
+        user_ids = list(user_ids)
+        if user_ids:
+            self.pubsub.publish({"user_ids": user_ids, "event": event, "data": data})
+
+    def deliver(self, message):
+        with self._lock:
+            targets = [
+                s for user_id in message["user_ids"] for s in self._subscriptions.get(user_id, ())
+            ]
+        for subscription in targets:
+            subscription.put(message["event"], message["data"])
+
+
+class LocalPubSub:
+    """Egyfolyamatos stand-in: a publikált üzenet azonnal a helyi brokerhez kerül."""
+
+    def __init__(self):
+        self._handler = None
+
+    def start(self, handler):
+        self._handler = handler
+
+    def publish(self, message):
+        self._handler(message)
+
+
+class RedisPubSub:
+    """Több worker közötti fan-out Redis-kompatibilis kliensen (publish + pubsub().listen()).
+
+    Minden folyamat egy háttérszálon hallgatja a csatornát.
+    """
+
+    def __init__(self, client, channel="studybuddy:events"):
+        self.client = client
+        self.channel = channel
+
+    def start(self, handler):
+        listener = self.client.pubsub(ignore_subscribe_messages=True)
+        listener.subscribe(self.channel)
+
+        def listen():
+            for raw in listener.listen():
+                handler(json.loads(raw["data"]))
+
+        threading.Thread(target=listen, name="event-pubsub", daemon=True).start()
+
+    def publish(self, message):
+        self.client.publish(self.channel, json.dumps(message))
+
+
+def init_event_broker(app):
+    """Az EVENT_PUBSUB_REDIS_URL beállításával a workerek Redis-en osztják meg az eseményeket."""
+    redis_url = app.config.get("EVENT_PUBSUB_REDIS_URL")
+    if redis_url:
+        import redis  # pyright: ignore[reportMissingImports]
+        pubsub = RedisPubSub(redis.Redis.from_url(redis_url))
+    else:
+        pubsub = LocalPubSub()
+    broker = EventBroker(pubsub, app.config.get("SSE_QUEUE_SIZE", 100))
+    app.extensions["event_broker"] = broker
+    return broker
+
+
+def event_broker():
+    return current_app.extensions["event_broker"]
+
+
+def publish(user_ids, event, data):
+    event_broker().publish(user_ids, event, data)
+
+
+def format_sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def event_stream(broker, subscription, initial_events, keepalive):
+    """SSE generátor: először a kezdő állapot, utána a broker eseményei.
+
+    Adatbázist nem használ, így a várakozó kapcsolat csak egy blokkolt queue.get.
+    """
+    try:
+        for event, data in initial_events:
+            yield format_sse(event, data)
+        while True:
+            item = subscription.get(timeout=keepalive)
+            if subscription.overflowed:
+                subscription.reset()
+                yield format_sse("resync", {})
+                continue
+            if item is None:
+                yield ": keepalive\n\n"
+                continue
+            yield format_sse(*item)
+    finally:
+        broker.unsubscribe(subscription)
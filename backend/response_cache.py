@@ -0,0 +1,139 @@
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app  # pyright: ignore[reportMissingImports]
+
+
+class LocalResponseCache:
+    """Folyamaton belüli LRU válasz-cache méret- és TTL-korláttal.
+
+    A kulcs (csoport, tartalomverzió, variáns), így egy írás utáni verzióléptetés
+    magától érvényteleníti a régi bejegyzéseket; az invalidate_group csak a helyet
+    szabadítja fel hamarabb.
+    """
+
+    def __init__(self, max_entries=1024, ttl=30, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._keys_by_group = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, group_id, version, variant=""):
+        key = (group_id, version, variant)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= self.clock():
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, group_id, version, body, variant=""):
+        key = (group_id, version, variant)
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, body)
+            self._entries.move_to_end(key)
+            self._keys_by_group.setdefault(group_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def invalidate_group(self, group_id):
+        with self._lock:
+            for key in list(self._keys_by_group.get(group_id, ())):
+                self._drop(key)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+            }
+
+    def _drop(self, key):
+        self._entries.pop(key, None)
+        group_keys = self._keys_by_group.get(key[0])
+        if group_keys is not None:
+            group_keys.discard(key)
+            if not group_keys:
+                del self._keys_by_group[key[0]]
+
+
+class RedisResponseCache:
+    """Több worker között megosztott backend Redis-kompatibilis kliensre (pl. redis-py).
+
+    A TTL-t a Redis kezeli, a méretkorlátot a szerver maxmemory-policy-ja; a
+    kilakoltatásokat ezért a Redis INFO stats mutatja, az evictions itt 0 marad.
+    """
+
+    def __init__(self, client, ttl=30, prefix="studybuddy:posts"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _key(self, group_id, version, variant):
+        return f"{self.prefix}:{group_id}:{version}:{variant}"
+
+    def _group_key(self, group_id):
+        return f"{self.prefix}:{group_id}:keys"
+
+    def get(self, group_id, version, variant=""):
+        body = self.client.get(self._key(group_id, version, variant))
+        if body is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return body
+
+    def set(self, group_id, version, body, variant=""):
+        key = self._key(group_id, version, variant)
+        group_key = self._group_key(group_id)
+        pipe = self.client.pipeline()
+        pipe.setex(key, self.ttl, body)
+        pipe.sadd(group_key, key)
+        pipe.expire(group_key, self.ttl)
+        pipe.execute()
+
+    def invalidate_group(self, group_id):
+        group_key = self._group_key(group_id)
+        keys = list(self.client.smembers(group_key))
+        self.client.delete(group_key, *keys)
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+def init_response_cache(app):
+    """A RESPONSE_CACHE_REDIS_URL beállításával megosztott, egyébként helyi cache."""
+    ttl = app.config.get("RESPONSE_CACHE_TTL", 30)
+    redis_url = app.config.get("RESPONSE_CACHE_REDIS_URL")
+    if redis_url:
+        import redis  # pyright: ignore[reportMissingImports]
+        cache = RedisResponseCache(redis.Redis.from_url(redis_url), ttl=ttl)
+    else:
+        cache = LocalResponseCache(app.config.get("RESPONSE_CACHE_SIZE", 1024), ttl)
+    app.extensions["response_cache"] = cache
+    return cache
+
+
+def response_cache():
+    return current_app.extensions["response_cache"]
+
+
+def invalidate_group_cache(group_id):
+    response_cache().invalidate_group(group_id)
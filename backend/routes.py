@@ -1,18 +1,41 @@
-from flask import request, jsonify, current_app  # pyright: ignore[reportMissingImports]
+from flask import Response, request, jsonify, current_app  # pyright: ignore[reportMissingImports]
 import re
-import bcrypt  # pyright: ignore[reportMissingImports]
-import jwt  # pyright: ignore[reportMissingImports]
-from datetime import datetime, timedelta, timezone
+import json
+import time
+import zlib
+from datetime import datetime, timezone
 from config import Config
-from models import db, User, Group, GroupMember, Post, Comment, Event, PostView, PostAttachment, CommentAttachment
+from auth import create_jwt_token, create_refresh_token, current_user_id, require_auth, verify_access_token, verify_refresh_token
+from memberships import is_group_member, membership_changed, membership_claims
+from identity_map import load_group, load_user, user_group_ids
+from passwords import PasswordHasherBusy, password_hasher
+from models import db, User, Group, GroupMember, GroupInterestCount, SubjectGroupSlot, Post, Comment, Event, GroupReadMark, PostView, PostAttachment, CommentAttachment
 import os
 import requests
+from sqlalchemy import and_, func, or_, select
+from pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, PaginationError, decode_cursor, encode_cursor, fetch_size, page_args,
+    split_page
+)
+from http_cache import content_etag, is_not_modified, not_modified, with_etag
+from counters import assign_post_seq, bump_content_version, bump_post_content_version
+from response_cache import invalidate_group_cache, response_cache
+from realtime import event_broker, event_stream, publish
+from unread_counters import fanout_limit, unread_counter_store, unread_counts_for, unread_post_filter, users_with_post_unread
+from search import index_subject_trigrams, normalize_subject, subject_search_filter
+from db_utils import insert_ignore, insert_or_lock
+from hobbies import adjust_interest_histogram, hobby_masks_exact, interest_match_clause, sync_user_hobby_tags
 from werkzeug.utils import secure_filename
 from config import Config
 #valami
 
 TANREND_API_URL = "https://elte-orarend.vercel.app"
 
+# A /groups/unread-counts?wait= felső korlátja (másodperc)
+MAX_LONG_POLL_SECONDS = 60
+
+# Új vízjel sor kezdőértéke: ennél minden poszt újabb, vagyis "semmi sem olvasott"
+
 
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 
@@ -23,29 +46,193 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     UPLOAD_FOLDER = os.path.join(BASE_DIR, "uploads")
 
+# A /groups/<id>/members által visszaadható mezők és oszlopaik
+MEMBER_FIELDS = {
+    "user_id": GroupMember.user_id,
+    "name": User.name,
+    "email": User.email,
+    "major": User.major,
+}
+
 # Email minta
 ELTE_EMAIL_REGEX = r"^[a-zA-Z0-9._%+-]+@(student\.elte\.hu|elte\.hu)$"
 
 
-def create_jwt_token(user_id):
-    expiration = datetime.now(timezone.utc) + timedelta(hours=1)
-    payload = {
-        "user_id": user_id,
-        "exp": expiration
-    }
+def password_pool_busy():
+    """503 + Retry-After, ha a jelszó hash pool telített: a kliens később próbálja újra."""
+    response = jsonify({"error": "Túl sok bejelentkezés egyszerre, próbáld újra pár másodperc múlva!"})
+    response.headers["Retry-After"] = str(current_app.config.get("PASSWORD_HASH_RETRY_AFTER", 2))
+    return response, 503
 
-    token = jwt.encode(payload, Config.SECRET_KEY, algorithm="HS256")
-    return token
 
+def member_group_ids(user_id, group_ids):
+    """A megadott csoportok közül azok, amelyeknek a user tagja (kérésenként egy lekérdezés)."""
+    if not group_ids:
+        return set()
+    return user_group_ids(user_id) & set(group_ids)
 
-def verify_jwt_token(token):
-    try:
-        data = jwt.decode(token, Config.SECRET_KEY, algorithms=["HS256"])
-        return data
-    except jwt.ExpiredSignatureError:
-        return None
-    except jwt.InvalidTokenError:
+
+def other_member_ids(group_id, user_id):
+    """A csoport tagjai a megadott user nélkül (értesítések címzettjei)."""
+    return [
+        member_id for (member_id,) in
+        db.session.query(GroupMember.user_id)
+        .filter(GroupMember.group_id == group_id, GroupMember.user_id != user_id)
+        .all()
+    ]
+
+
+def _same_interest_query(group_ids, user):
+    """(lekérdezés, group_id oszlop, darabszám kifejezés) a közös érdeklődésű tagok számához.
+
+    A számok az érdeklődési hisztogramból jönnek, a tagsági sorokat nem olvassuk végig.
+    Ha a hobbi maszkok már ütközhetnek, a tagsági sorokból számolunk pontosan.
+    `group_ids` lehet lista vagy egy csoport ID-kat adó select is.
+    """
+    if hobby_masks_exact():
+        same_interest = func.sum(GroupInterestCount.member_count)
+        query = (
+            db.session.query(GroupInterestCount.group_id, same_interest)
+            .filter(
+                GroupInterestCount.group_id.in_(group_ids),
+                GroupInterestCount.hobby_mask.bitwise_and(user.hobby_mask) != 0
+            )
+            .group_by(GroupInterestCount.group_id)
+        )
+        group_col = GroupInterestCount.group_id
+    else:
+        same_interest = func.count(GroupMember.user_id)
+        query = (
+            db.session.query(GroupMember.group_id, same_interest)
+            .join(User, User.id == GroupMember.user_id)
+            .filter(GroupMember.group_id.in_(group_ids), interest_match_clause(user))
+            .group_by(GroupMember.group_id)
+        )
+        group_col = GroupMember.group_id
+    return query, group_col, same_interest
+
+
+def same_interest_counts(group_ids, user):
+    """Csoportonként hány tagnak van közös hobbija a user-rel."""
+    if not group_ids or not user.hobby_mask:
+        return {}
+    query, _, _ = _same_interest_query(group_ids, user)
+    return {group_id: int(count or 0) for group_id, count in query.all()}
+
+
+def best_interest_group(candidate_ids, user):
+    """A jelöltek közül a legtöbb közös érdeklődésű tagot számláló (group_id, szám), vagy None.
+
+    Egyenlőségnél a kisebb ID nyer; az aggregálás az adatbázisban fut, a jelölteket nem töltjük be.
+    """
+    if not user.hobby_mask:
         return None
+    query, group_col, same_interest = _same_interest_query(candidate_ids, user)
+    return query.order_by(same_interest.desc(), group_col).limit(1).first()
+
+
+def unread_counts_version(unread_counts):
+    """Tartalomból számolt verzió: minden worker ugyanazt adja ugyanarra az állapotra."""
+    return zlib.crc32(json.dumps(sorted(unread_counts.items())).encode())
+
+
+def serialize_posts(posts):
+    """Posztok JSON-ja a csatolmányokkal; az attachment-ek egyetlen IN lekérdezéssel jönnek."""
+    post_ids = [p.id for p in posts]
+
+    attachments_by_post = {}
+    if post_ids:
+        for att in (
+            PostAttachment.query
+            .filter(PostAttachment.post_id.in_(post_ids))
+            .order_by(PostAttachment.id)
+        ):
+            attachments_by_post.setdefault(att.post_id, []).append(att)
+
+    posts_json = []
+    for p in posts:
+        post_data = {
+            "id": p.id,
+            "title": p.title,
+            "content": p.content,
+            "group_id": p.group_id,
+            "author_id": p.author_id,
+            "created_at": p.created_at.isoformat() if p.created_at else None,
+            "updated_at": p.updated_at.isoformat() if p.updated_at else None,
+            "comment_count": p.comment_count,
+        }
+        attachments = attachments_by_post.get(p.id)
+        if attachments:
+            post_data["attachments"] = [
+                {
+                    "id": att.id,
+                    "filename": att.filename,
+                    "file_url": att.file_url,
+                    "mime_type": att.mime_type
+                }
+                for att in attachments
+            ]
+        posts_json.append(post_data)
+    return posts_json
+
+
+def ensure_open_group(subject, user_id):
+    """Visszaad egy üres, automatikusan létrehozott csoportot a tárgyhoz, és commitol.
+
+    Először a tárgy subject_group_slots sorát zároljuk kizárólagosan (upsert, majd
+    FOR UPDATE): a párhuzamos keresések itt sorba állnak, és a név kiosztása már a zár
+    alatt történik. Így nincs unique hiba, és InnoDB-n sincs deadlock (két INSERT IGNORE
+    megosztott zára után két UPDATE a slot soron). A sor a tárgy utoljára kiosztott
+    sorszámát tárolja; ha annak a neve már egy nem üres csoporté, a következővel próbálkozunk.
+    """
+    db.session.execute(insert_or_lock(
+        SubjectGroupSlot.__table__, {"subject": subject, "last_slot": 0}, ["subject"]
+    ))
+    slot_row = (
+        SubjectGroupSlot.query
+        .filter_by(subject=subject)
+        .with_for_update()
+        .populate_existing()
+        .one()
+    )
+    # Új slot sor: a meglévő (pl. kézzel létrehozott) csoportok számától indulunk
+    slot = slot_row.last_slot or max(Group.query.filter(Group.subject == subject).count(), 1)
+
+    subject_key = normalize_subject(subject)
+    while True:
+        name = f"{subject} Study Group #{slot}"
+        if slot == 1:
+            description = f"{subject} automatikusan létrehozott tanulócsoport."
+        else:
+            description = f"{subject} új automatikusan létrehozott tanulócsoport."
+
+        # A név egy nem automatikus csoporté is lehet: ütközésnél azt vizsgáljuk
+        inserted = db.session.execute(
+            insert_ignore(Group.__table__).values(
+                name=name,
+                subject=subject,
+                subject_key=subject_key,
+                description=description,
+                creator_id=user_id
+            )
+        ).rowcount == 1
+
+        # Zároló olvasás: MySQL-en így a korábban commitolt sort is látjuk
+        group = (
+            Group.query
+            .filter_by(name=name)
+            .with_for_update(read=True)
+            .populate_existing()
+            .one()
+        )
+        if inserted:
+            index_subject_trigrams(db.session.connection(), group.id, subject_key)
+
+        if group.member_count == 0:
+            slot_row.last_slot = slot
+            db.session.commit()
+            return group
+        slot += 1
 
 
 def register_routes(app):
@@ -79,7 +266,10 @@ def register_routes(app):
         if User.query.filter_by(email=email).first():
             return jsonify({"message": "Ez az email már regisztrálva van!"}), 400
 
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode()
+        try:
+            password_hash = password_hasher().hash(password)
+        except PasswordHasherBusy:
+            return password_pool_busy()
 
         #bio_value = ",".join(interests) if isinstance(interests, list) else interests
         
@@ -93,6 +283,8 @@ def register_routes(app):
         )
 
         db.session.add(new_user)
+        db.session.flush()  # Hogy megkapjuk az ID-t
+        sync_user_hobby_tags(new_user)
         db.session.commit()
 
         return jsonify({
@@ -104,7 +296,8 @@ def register_routes(app):
             "hobbies": new_user.hobbies,
             "avatar_url": new_user.avatar_url
         },
-        "token": create_jwt_token(new_user.id),
+        "token": create_jwt_token(new_user.id, membership_claims(new_user.id)),
+        "refresh_token": create_refresh_token(new_user.id),
         "message": "Sikeres regisztráció!"
     }), 201
 
@@ -121,10 +314,23 @@ def register_routes(app):
         if not user:
             return jsonify({"error": "Hibás email vagy jelszó!"}), 401
 
-        if not bcrypt.checkpw(password.encode("utf-8"), user.password_hash.encode()):
+        hasher = password_hasher()
+        try:
+            password_ok = hasher.check(password, user.password_hash)
+        except PasswordHasherBusy:
+            return password_pool_busy()
+        if not password_ok:
             return jsonify({"error": "Hibás email vagy jelszó!"}), 401
 
-        token = create_jwt_token(user.id)
+        # Régebbi cost faktorral tárolt hash: a helyes jelszóból újrahasheljük
+        if hasher.needs_rehash(user.password_hash):
+            try:
+                user.password_hash = hasher.hash(password)
+                db.session.commit()
+            except PasswordHasherBusy:
+                pass  # a következő belépéskor újra megpróbáljuk
+
+        token = create_jwt_token(user.id, membership_claims(user.id))
 
         return jsonify({
             "user": {
@@ -136,27 +342,29 @@ def register_routes(app):
             },
             "message": "Sikeres bejelentkezés!", 
             "token": token,
+            "refresh_token": create_refresh_token(user.id),
         }), 200
 
-    @app.route("/profile", methods=["GET"])
-    def profile():
-        auth_header = request.headers.get("Authorization")
-
-        if not auth_header:
-            return jsonify({"error": "Hiányzó Authorization header"}), 401
-
-        try:
-            token = auth_header.split(" ")[1]
-        except:
-            return jsonify({"error": "Hibás Authorization formátum"}), 401
-
-        decoded = verify_jwt_token(token)
+    @app.route("/token/refresh", methods=["POST", "OPTIONS"])
+    def refresh_token():
+        """Új access token a refresh tokenből, a user aktuális tagsági claim-jeivel"""
+        if request.method == "OPTIONS":
+            return "", 200
+        data = request.get_json(silent=True) or {}
+        payload = verify_refresh_token(data.get("refresh_token") or "")
+        if not payload:
+            return jsonify({"error": "Érvénytelen vagy lejárt refresh token"}), 401
 
-        if not decoded:
-            return jsonify({"error": "Érvénytelen vagy lejárt token"}), 401
+        user_id = payload["user_id"]
+        if load_user(user_id) is None:
+            return jsonify({"error": "Érvénytelen vagy lejárt refresh token"}), 401
+        return jsonify({"token": create_jwt_token(user_id, membership_claims(user_id))}), 200
 
+    @app.route("/profile", methods=["GET"])
+    @require_auth
+    def profile():
         #user = User.query.get(decoded["user_id"])
-        user = db.session.get(User, decoded["user_id"])
+        user = load_user(current_user_id())
 
 
         return jsonify({
@@ -169,21 +377,8 @@ def register_routes(app):
     
     
     @app.route("/subjects/search", methods=["GET"])
+    @require_auth
     def search_subjects():
-        # Token ellenőrzés – ugyanúgy, mint /groups/search-nél
-        auth_header = request.headers.get("Authorization")
-        if not auth_header:
-            return jsonify({"error": "Hiányzó token"}), 401
-
-        try:
-            token = auth_header.split(" ")[1]
-            decoded = verify_jwt_token(token)
-        except Exception:
-            return jsonify({"error": "Hibás token"}), 401
-
-        if not decoded:
-            return jsonify({"error": "Érvénytelen vagy lejárt token"}), 401
-
         # Keresési paraméterek
         query = request.args.get("q", "").strip()
         year = request.args.get("year", "2025-2026-1")
@@ -243,132 +438,106 @@ def register_routes(app):
     
 
     @app.route("/groups/by-subject", methods=["GET"])
+    @require_auth
     def groups_by_subject():
-        # Token check
-        auth_header = request.headers.get("Authorization")
-        if not auth_header:
-            return jsonify({"error": "Hiányzó token"}), 401
-
-        try:
-            token = auth_header.split(" ")[1]
-            decoded = verify_jwt_token(token)
-        except Exception:
-            return jsonify({"error": "Hibás token"}), 401
-
-        if not decoded:
-            return jsonify({"error": "Érvénytelen vagy lejárt token"}), 401
-
-        user_id = decoded["user_id"]
+        user_id = current_user_id()
 
         subject_name = request.args.get("name", "").strip()
         if not subject_name:
             return jsonify({"error": "Hiányzik a subject name"}), 400
 
-        groups = Group.query.filter(Group.subject == subject_name).all()
+        try:
+            limit, cursor = page_args(request.args)
+        except PaginationError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # Keyset lapozás ID szerint; a következő lap kurzora az X-Next-Cursor headerben
+        query = Group.query.filter(Group.subject == subject_name)
+        if cursor:
+            query = query.filter(Group.id > cursor[0])
+        groups, next_cursor = split_page(
+            query.order_by(Group.id).limit(fetch_size(limit)).all(), limit, lambda g: (g.id,)
+        )
+        member_of = member_group_ids(user_id, [g.id for g in groups])
 
         group_list = []
         for g in groups:
-            members = GroupMember.query.filter_by(group_id=g.id).all()
-            member_count = len(members)
-
-            existing_member = GroupMember.query.filter_by(
-                group_id=g.id, user_id=user_id
-            ).first()
-
             group_list.append({
                 "id": g.id,
                 "name": g.name,
                 "subject": g.subject,
                 "description": g.description,
-                "member_count": member_count,
-                "is_member": existing_member is not None,
+                "member_count": g.member_count,
+                "is_member": g.id in member_of,
             })
 
-        return jsonify(group_list), 200
+        response = jsonify(group_list)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return response, 200
 
 
     @app.route("/groups/search", methods=["GET"])
+    @require_auth
     def search_groups():
-        # Token check
-        auth_header = request.headers.get("Authorization")
-        if not auth_header:
-            return jsonify({"error": "Hiányzó token"}), 401
-
-        try:
-            token = auth_header.split(" ")[1]
-            decoded = verify_jwt_token(token)
-        except:
-            return jsonify({"error": "Hibás token"}), 401
-
-        if not decoded:
-            return jsonify({"error": "Érvénytelen vagy lejárt token"}), 401
-
-        user_id = decoded["user_id"]
+        user_id = current_user_id()
 #        user = User.query.get(user_id)
-        user = db.session.get(User, user_id)
+        user = load_user(user_id)
 
 
         subject = request.args.get("q", "").strip()
         if not subject:
             return jsonify({"error": "Hiányzik a keresési kifejezés"}), 400
 
-        # 1) A tárgyhoz tartozó csoportok
-        groups = Group.query.filter(Group.subject.ilike(f"%{subject}%")).all()
-
-        user_interests = set((user.hobbies or "").split(","))
-
-        zero_member_group = None
-        group_list = []
+        try:
+            limit, cursor = page_args(request.args)
+        except PaginationError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # 1) A tárgyhoz tartozó csoportok: csak az aktuális lapot töltjük be (keyset, ID szerint)
+        search_filter = subject_search_filter(subject)
+        candidate_ids = select(Group.id).where(search_filter)
+
+        query = Group.query.filter(search_filter)
+        if cursor:
+            query = query.filter(Group.id > cursor[0])
+        groups, next_cursor = split_page(
+            query.order_by(Group.id).limit(fetch_size(limit)).all(), limit, lambda g: (g.id,)
+        )
 
+        # Az ajánláshoz a teljes jelölthalmazon aggregálunk, nem csak a lapon
+        best = best_interest_group(candidate_ids, user)
         best_group = None
-        best_interest_count = -1
-
-        for g in groups:
-            members = GroupMember.query.filter_by(group_id=g.id).all()
-            member_count = len(members)
-
-            same_interest_count = 0
-            for m in members:
-                #u = User.query.get(m.user_id)
-                u = db.session.get(User, m.user_id)
+        if best and best[1] > 0:
+            best_group = next((g for g in groups if g.id == best[0]), None) or load_group(best[0])
 
-                if u and u.hobbies:
-                    if user_interests.intersection(set(u.hobbies.split(","))):
-                        same_interest_count += 1
-
-            if member_count == 0 and zero_member_group is None:
-                zero_member_group = g
-
-            if same_interest_count > best_interest_count:
-                best_interest_count = same_interest_count
-                best_group = g
+        # Közös érdeklődés és tagság aggregált lekérdezésekkel, a tagszám a csoport sorában van
+        group_ids = [g.id for g in groups]
+        interest_counts = same_interest_counts(group_ids, user)
+        member_of = member_group_ids(user_id, group_ids + ([best_group.id] if best_group else []))
 
+        group_list = []
+        for g in groups:
             group_list.append({
                 "id": g.id,
                 "name": g.name,
                 "subject": g.subject,
                 "description": g.description,
-                "member_count": member_count,
-                "same_interest_members": same_interest_count,
-                "is_member": False
+                "member_count": g.member_count,
+                "same_interest_members": interest_counts.get(g.id, 0),
+                "is_member": g.id in member_of
             })
 
-            existing_member = GroupMember.query.filter_by(
-                group_id=g.id,
-                user_id=user_id
-            ).first()
-            group_list[-1]["is_member"] = existing_member is not None
+        zero_member_group = (
+            Group.query
+            .filter(search_filter, Group.member_count == 0)
+            .order_by(Group.id)
+            .first()
+        )
 
         # 2) Ha nincs egyetlen csoport sem: automatikusan létrehozzuk
-        if not groups:
-            new_group = Group(
-                name=f"{subject} Study Group #1",
-                subject=subject,
-                description=f"{subject} automatikusan létrehozott tanulócsoport.",
-                creator_id=user_id
-            )
-            db.session.add(new_group)
-            db.session.commit()
+        if zero_member_group is None and not groups and not cursor:
+            new_group = ensure_open_group(subject, user_id)
 
             return jsonify({
                 "recommended_group": {
@@ -380,43 +549,28 @@ def register_routes(app):
                     "same_interest_members": 0,
                     "is_member": False  # ← EZ HIÁNYZIK!
                 },
-                "all_groups": []
+                "all_groups": [],
+                "next_cursor": None
             })
 
         # 3) Ha nincs üres csoport -> hozzunk létre egyet
         if zero_member_group is None:
-            new_group = Group(
-                name=f"{subject} Study Group #{len(groups)+1}",
-                subject=subject,
-                description=f"{subject} új automatikusan létrehozott tanulócsoport.",
-                creator_id=user_id
-            )
-            db.session.add(new_group)
-            db.session.commit()
-
-            zero_member_group = new_group
-
-            group_list.append({
-                "id": zero_member_group.id,
-                "name": zero_member_group.name,
-                "subject": zero_member_group.subject,
-                "description": zero_member_group.description,
-                "member_count": 0,
-                "same_interest_members": 0,
-                "is_member": False
-            })
-
-            
-            existing_member = GroupMember.query.filter_by(
-                group_id=zero_member_group.id,  # zero_member_group.id!
-                user_id=user_id
-            ).first()
+            zero_member_group = ensure_open_group(subject, user_id)
 
-            if existing_member:
-                group_list[-1]["is_member"] = True  
+            # Frissen létrehozott csoport: még nincs tagja, ID szerint az utolsó lapra kerül
+            if next_cursor is None:
+                group_list.append({
+                    "id": zero_member_group.id,
+                    "name": zero_member_group.name,
+                    "subject": zero_member_group.subject,
+                    "description": zero_member_group.description,
+                    "member_count": 0,
+                    "same_interest_members": 0,
+                    "is_member": False
+                })
 
         # 4) Ha nincs olyan csoport, amelyikben lenne közös érdeklődés -> ajánlott legyen az üres
-        if best_interest_count == 0 or best_group is None:
+        if best_group is None:
             recommended_group = {
                 "id": zero_member_group.id,
                 "name": zero_member_group.name,
@@ -427,34 +581,27 @@ def register_routes(app):
                 "is_member": False
             }
         else:
-            # külön kiszámoljuk, hogy mennyi same_interest volt abban a csoportban
             recommended_group = {
                 "id": best_group.id,
                 "name": best_group.name,
                 "subject": best_group.subject,
                 "description": best_group.description,
-                "member_count": GroupMember.query.filter_by(group_id=best_group.id).count(),
-                "same_interest_members": best_interest_count,
-                "is_member": False
+                "member_count": best_group.member_count,
+                "same_interest_members": int(best[1]),
+                "is_member": best_group.id in member_of
             }
 
-            existing_member = GroupMember.query.filter_by(
-                group_id=best_group.id,
-                user_id=user_id
-            ).first()
-
-            if existing_member:
-                recommended_group["is_member"] = True
-
         # 5) válasz
         return jsonify({
             "recommended_group": recommended_group,
-            "all_groups": group_list
+            "all_groups": group_list,
+            "next_cursor": next_cursor
         })
 
             
 
     @app.route("/groups/join", methods=["POST", "OPTIONS"])
+    @require_auth
     def join_group():
         if request.method == "OPTIONS":
             return "", 200
@@ -468,27 +615,13 @@ def register_routes(app):
     
         if not group_id:
             return jsonify({"error": "group_id szükséges"}), 400
-        
-
-        auth_header = request.headers.get("Authorization")
-        if not auth_header:
-            return jsonify({"error": "Hiányzó token"}), 401
-
-        try:
-            token = auth_header.split(" ")[1]
-            decoded = verify_jwt_token(token)
-        except:
-            return jsonify({"error": "Hibás token"}), 401
 
-        if not decoded:
-            return jsonify({"error": "Érvénytelen vagy lejárt token"}), 401
-
-        user_id = decoded["user_id"]
+        user_id = current_user_id()
 
         if not group_id:
             return jsonify({"error": "group_id szükséges"}), 400
 
-        group = Group.query.get(group_id)
+        group = load_group(group_id)
         if not group:
             return jsonify({"error": "A csoport nem létezik"}), 404
 
@@ -525,119 +658,134 @@ def register_routes(app):
             group_id=group_id
         )
         db.session.add(new_member)
+
+        # Tagszám és érdeklődési hisztogram frissítése ugyanabban a tranzakcióban
+        Group.query.filter_by(id=group.id).update(
+            {Group.member_count: Group.member_count + 1}, synchronize_session=False
+        )
+        User.query.filter_by(id=user_id).update(
+            {User.membership_version: User.membership_version + 1}, synchronize_session=False
+        )
+        user = load_user(user_id)
+        adjust_interest_histogram(group.id, user.hobby_mask, 1)
         db.session.commit()
+        # Az új csoport hiányzik a user számlálóiból: következő olvasáskor újraszámoljuk
+        unread_counter_store().forget([user_id])
+        membership_changed(user_id)
 
-        return jsonify({"message": "Sikeresen csatlakoztál a csoporthoz!"}), 201
+        # Új access token az új tagsággal; a régi claim-jei a verzióváltás miatt már nem számítanak
+        return jsonify({
+            "message": "Sikeresen csatlakoztál a csoporthoz!",
+            "token": create_jwt_token(user_id, membership_claims(user_id))
+        }), 201
 
     @app.route("/groups/my-groups", methods=["GET"])
+    @require_auth
     def my_groups():
-        auth_header = request.headers.get("Authorization")
-        if not auth_header:
-            return jsonify({"error": "Hiányzó token"}), 401
+        user_id = current_user_id()
 
-        try:
-            token = auth_header.split(" ")[1]
-            decoded = verify_jwt_token(token)
-        except:
-            return jsonify({"error": "Hibás token"}), 401
-
-        if not decoded:
-            return jsonify({"error": "Érvénytelen vagy lejárt token"}), 401
-
-        user_id = decoded["user_id"]
-
-        # A user összes csoportja
-        memberships = GroupMember.query.filter_by(user_id=user_id).all()
+        # Feltételes GET: a tagsági verzió változatlan -> 304, a listát le sem kérdezzük
+        membership_version = (
+            db.session.query(User.membership_version).filter(User.id == user_id).scalar()
+        )
+        etag = f"my-groups-{user_id}-{membership_version}"
+        if is_not_modified(etag):
+            return not_modified(etag)
+
+        # A user összes csoportja egyetlen join-nal, csak a szükséges oszlopokkal
+        rows = (
+            db.session.query(
+                Group.id,
+                Group.name,
+                Group.subject,
+                Group.description,
+                GroupMember.joined_at
+            )
+            .join(GroupMember, GroupMember.group_id == Group.id)
+            .filter(GroupMember.user_id == user_id)
+            .order_by(GroupMember.joined_at, Group.id)
+            .all()
+        )
 
-        if not memberships:
-            return jsonify({
+        if not rows:
+            return with_etag(jsonify({
                 "groups": [],
                 "message": "Még nem vagy tagja egyetlen tanulócsoportnak sem."
-            }), 200
+            }), etag), 200
 
-        group_list = []
-        for m in memberships:
-            group = Group.query.get(m.group_id)
-            if group:
-                group_list.append({
-                    "id": group.id,
-                    "name": group.name,
-                    "subject": group.subject,
-                    "description": group.description,
-                    "joined_at": m.joined_at.strftime("%Y-%m-%d %H:%M:%S")
-                })
+        group_list = [
+            {
+                "id": group_id,
+                "name": name,
+                "subject": subject,
+                "description": description,
+                "joined_at": joined_at.strftime("%Y-%m-%d %H:%M:%S")
+            }
+            for group_id, name, subject, description, joined_at in rows
+        ]
 
-        return jsonify({"groups": group_list}), 200
+        return with_etag(jsonify({"groups": group_list}), etag), 200
 
     @app.route("/groups/<int:group_id>/members", methods=["GET"])
+    @require_auth
     def list_group_mmbrs(group_id):
-        auth_header = request.headers.get("Authorization")
-        if not auth_header:
-            return jsonify({"error": "Hiányzó token"}), 401
-
         try:
-            token = auth_header.split(" ")[1]
-            decoded = verify_jwt_token(token)
-        except Exception:
-            return jsonify({"error": "Hibás token"}), 401
-
-        if not decoded:
-            return jsonify({"error": "Érvénytelen vagy lejárt token"}), 401
+            limit, cursor = page_args(request.args, default_limit=MAX_PAGE_SIZE)
+        except PaginationError as e:
+            return jsonify({"error": str(e)}), 400
+
+        # ?fields=name,email -> csak ezeket az oszlopokat kérdezzük le (user_id mindig megy)
+        fields_arg = request.args.get("fields")
+        if fields_arg:
+            fields = [f.strip() for f in fields_arg.split(",") if f.strip()]
+            unknown = [f for f in fields if f not in MEMBER_FIELDS]
+            if unknown:
+                return jsonify({"error": f"Ismeretlen mező(k): {', '.join(unknown)}"}), 400
+        else:
+            fields = list(MEMBER_FIELDS)
+        fields = ["user_id"] + [f for f in fields if f != "user_id"]
 
-        group = Group.query.get(group_id)
-        if not group:
+        group_exists = db.session.query(Group.id).filter(Group.id == group_id).scalar()
+        if not group_exists:
             return jsonify({"error": "Csoport nem található"}), 404
-        
-        group_memberships = GroupMember.query.filter_by(group_id=group_id).all()
-
-        members = []
-        for gm in group_memberships:
-            #u = User.query.get(gm.user_id)
-            u = db.session.get(User, gm.user_id)
-
-            if u:
-                members.append({
-                    "user_id": gm.user_id,
-                    "name": u.name,
-                    "email": u.email,
-                    "major": u.major,
-                })
+
+        # Egyetlen join, csak a kért oszlopokkal; keyset lapozás user_id szerint
+        query = (
+            db.session.query(*[MEMBER_FIELDS[f] for f in fields])
+            .select_from(GroupMember)
+            .join(User, User.id == GroupMember.user_id)
+            .filter(GroupMember.group_id == group_id)
+        )
+        if cursor:
+            query = query.filter(GroupMember.user_id > cursor[0])
+        rows, next_cursor = split_page(
+            query.order_by(GroupMember.user_id).limit(fetch_size(limit)).all(), limit, lambda r: (r[0],)
+        )
+
+        members = [dict(zip(fields, row)) for row in rows]
 
         return jsonify({
             "group_id": group_id,
-            "members": members
+            "members": members,
+            "next_cursor": next_cursor
         }), 200
         
         
         
     @app.route("/groups/<int:group_id>/posts", methods=["POST"])
+    @require_auth
     def create_post(group_id):
         ################ Auth checks and case handling ##############################
         
-        auth_header = request.headers.get("Authorization")
-        if not auth_header:
-            return jsonify({"error": "Hiányzó token"}), 401
-
-        try:
-            token = auth_header.split(" ")[1]
-            decoded = verify_jwt_token(token)
-        except Exception:
-            return jsonify({"error": "Hibás token"}), 401
-
-        if not decoded:
-            return jsonify({"error": "Érvénytelen vagy lejárt token"}), 401
 
-        user_id = decoded["user_id"]
+        user_id = current_user_id()
 
-        group = Group.query.get(group_id)
+        group = load_group(group_id)
         if not group:
             return jsonify({"error": "Csoport nem található"}), 404
 
 
-        membership = GroupMember.query.filter_by(
-            user_id=user_id, group_id=group_id
-        ).first()
-        if not membership:
+        if not is_group_member(user_id, group_id):
             return jsonify({"error": "Nem vagy tagja a csoportnak"}), 403
 
         # Támogatjuk a multipart/form-data és JSON formátumot is
@@ -674,6 +822,8 @@ def register_routes(app):
 
         db.session.add(new_post)
         db.session.flush()  # Hogy megkapjuk az ID-t
+        bump_post_content_version(new_post.id)
+        assign_post_seq(new_post.id)
 
         # Fájlok kezelése
         attachments_data = []
@@ -717,6 +867,20 @@ def register_routes(app):
                 return jsonify({"error": f"Fájl feltöltési hiba: {str(e)}"}), 500
 
         db.session.commit()
+        invalidate_group_cache(group_id)
+
+        # Fan-out-on-write a számláló store-ba (nagy csoportnál olvasáskor számolunk),
+        # majd élő értesítés a többi tagnak (SSE): +1 olvasatlan és az új poszt adatai
+        recipients = other_member_ids(group_id, user_id)
+        if group.member_count <= fanout_limit():
+            unread_counter_store().incr(recipients, group_id, 1)
+        publish(recipients, "unread", {"group_id": group_id, "delta": 1})
+        publish(recipients, "new_post", {
+            "group_id": group_id,
+            "post_id": new_post.id,
+            "title": new_post.title,
+            "author_id": user_id
+        })
 
         post_response = {
             "id": new_post.id,
@@ -737,86 +901,98 @@ def register_routes(app):
         }), 201
 
     @app.route("/groups/<int:group_id>/posts", methods=["GET"])
+    @require_auth
     def list_posts(group_id):
-        
-        ###### Necessery checks############
-        auth_header = request.headers.get("Authorization")
-        if not auth_header:
-            return jsonify({"error": "Hiányzó token"}), 401
-
-        try:
-            token = auth_header.split(" ")[1]
-            decoded = verify_jwt_token(token)
-        except Exception:
-            return jsonify({"error": "Hibás token"}), 401
-
-        if not decoded:
-            return jsonify({"error": "Érvénytelen vagy lejárt token"}), 401
-
-
-        group = Group.query.get(group_id)
-        if not group:
+        # Feltételes GET: változatlan tartalomverzió -> 304, a listát le sem kérdezzük
+        content_version = (
+            db.session.query(Group.content_version).filter(Group.id == group_id).scalar()
+        )
+        if content_version is None:
             return jsonify({"error": "Csoport nem található"}), 404
+        etag = content_etag("posts", group_id, content_version)
+        if is_not_modified(etag):
+            return not_modified(etag)
+
+        # Két írás között a kész JSON a cache-ből jön (kulcs: csoport + verzió + query string)
+        cache = response_cache()
+        cache_variant = request.query_string.decode()
+        cached_body = cache.get(group_id, content_version, cache_variant)
+        if cached_body is not None:
+            return with_etag(current_app.response_class(cached_body, mimetype="application/json"), etag), 200
+
+        since = request.args.get("since")
+        try:
+            limit, cursor = page_args(request.args)
+            if since is not None:
+                since_version = int(decode_cursor(since)[0])
+                # A delta szinkron mindig lapozott (has_more)
+                limit = limit or DEFAULT_PAGE_SIZE
+            elif cursor:
+                cursor_created_at, cursor_id = datetime.fromisoformat(cursor[0]), int(cursor[1])
+                if cursor_created_at.tzinfo:
+                    # Az adatbázis naiv UTC időket tárol
+                    cursor_created_at = cursor_created_at.astimezone(timezone.utc).replace(tzinfo=None)
+        except (PaginationError, ValueError, TypeError, IndexError):
+            return jsonify({"error": "Hibás lapozási paraméter"}), 400
 
         ##############################################x
-        posts = (
-            Post.query
-            .filter_by(group_id=group_id, deleted_at=None)
-            .order_by(Post.created_at.desc())
-            .all()
+        if since is not None:
+            # Delta szinkron: csak a kurzor óta írt posztok (sync_version tartomány),
+            # a töröltekből csak tombstone megy ki
+            changed = (
+                Post.query
+                .filter(Post.group_id == group_id, Post.sync_version > since_version)
+                .order_by(Post.sync_version)
+                .limit(fetch_size(limit))
+                .all()
+            )
+            has_more = len(changed) > limit
+            changed = changed[:limit]
+            if has_more:
+                sync_version = changed[-1].sync_version
+            else:
+                sync_version = max([content_version] + [p.sync_version for p in changed])
+
+            response = jsonify({
+                "group_id": group_id,
+                "posts": serialize_posts([p for p in changed if p.deleted_at is None]),
+                "tombstones": [
+                    {"id": p.id, "deleted_at": p.deleted_at.isoformat()}
+                    for p in changed if p.deleted_at is not None
+                ],
+                "sync_cursor": encode_cursor(sync_version),
+                "has_more": has_more
+            })
+            cache.set(group_id, content_version, response.get_data(), cache_variant)
+            return with_etag(response, etag), 200
+
+        # Keyset lapozás (created_at, id) szerint csökkenő sorrendben
+        query = Post.query.filter_by(group_id=group_id, deleted_at=None)
+        if cursor:
+            query = query.filter(or_(
+                Post.created_at < cursor_created_at,
+                and_(Post.created_at == cursor_created_at, Post.id < cursor_id)
+            ))
+        posts, next_cursor = split_page(
+            query.order_by(Post.created_at.desc(), Post.id.desc()).limit(fetch_size(limit)).all(),
+            limit,
+            lambda p: (p.created_at.isoformat(), p.id)
         )
 
-        posts_json = []
-        for p in posts:
-            post_data = {
-                "id": p.id,
-                "title": p.title,
-                "content": p.content,
-                "group_id": p.group_id,
-                "author_id": p.author_id,
-                "created_at": p.created_at.isoformat() if p.created_at else None,
-                "updated_at": p.updated_at.isoformat() if p.updated_at else None,
-            }
-            # Kommentek számának hozzáadása
-            comment_count = Comment.query.filter_by(post_id=p.id, deleted_at=None).count()
-            post_data["comment_count"] = comment_count
-            
-            # Attachment-ek hozzáadása
-            attachments = PostAttachment.query.filter_by(post_id=p.id).all()
-            if attachments:
-                post_data["attachments"] = [
-                    {
-                        "id": att.id,
-                        "filename": att.filename,
-                        "file_url": att.file_url,
-                        "mime_type": att.mime_type
-                    }
-                    for att in attachments
-                ]
-            posts_json.append(post_data)
-
-        return jsonify({
+        response = jsonify({
             "group_id": group_id,
-            "posts": posts_json
-        }), 200
+            "posts": serialize_posts(posts),
+            "next_cursor": next_cursor,
+            # Innen folytatható a delta szinkron (?since=)
+            "sync_cursor": encode_cursor(content_version)
+        })
+        cache.set(group_id, content_version, response.get_data(), cache_variant)
+        return with_etag(response, etag), 200
 
     @app.route("/posts/<int:post_id>", methods=["PUT", "DELETE"])
+    @require_auth
     def update_or_delete_post(post_id):
-        ################### Auth check and case handling
-        auth_header = request.headers.get("Authorization")
-        if not auth_header:
-            return jsonify({"error": "Hiányzó token"}), 401
-
-        try:
-            token = auth_header.split(" ")[1]
-            decoded = verify_jwt_token(token)
-        except Exception:
-            return jsonify({"error": "Hibás token"}), 401
-
-        if not decoded:
-            return jsonify({"error": "Érvénytelen vagy lejárt token"}), 401
-
-        user_id = decoded["user_id"]
+        user_id = current_user_id()
 
         post = Post.query.get(post_id)
         if not post or post.deleted_at is not None:
@@ -841,7 +1017,9 @@ def register_routes(app):
             post.title = title
             post.content = content
             post.updated_at = datetime.now(timezone.utc)
+            bump_post_content_version(post.id)
             db.session.commit()
+            invalidate_group_cache(post.group_id)
 
             return jsonify({
                 "message": "Poszt sikeresen frissítve",
@@ -859,32 +1037,28 @@ def register_routes(app):
         elif request.method == "DELETE":
             # Soft delete
             post.deleted_at = datetime.now(timezone.utc)
+            bump_post_content_version(post.id)
             db.session.commit()
+            invalidate_group_cache(post.group_id)
+            member_count = db.session.query(Group.member_count).filter_by(id=post.group_id).scalar()
+            if member_count <= fanout_limit():
+                unread_counter_store().incr(users_with_post_unread(post), post.group_id, -1)
+            # Élő kliensek: egyszerűbb újrakérni a számokat, mint tagonként delta-t küldeni
+            publish(other_member_ids(post.group_id, user_id), "resync", {"group_id": post.group_id})
 
             return jsonify({
                 "message": "Poszt sikeresen törölve"
             }), 200
 
     @app.route("/posts/<int:post_id>/comments", methods=["POST", "OPTIONS"])
+    @require_auth
     def create_comment(post_id):
         if request.method == "OPTIONS":
             return "", 200
 
         ################### Auth check and case handling
-        auth_header = request.headers.get("Authorization")
-        if not auth_header:
-            return jsonify({"error": "Hiányzó token"}), 401
 
-        try:
-            token = auth_header.split(" ")[1]
-            decoded = verify_jwt_token(token)
-        except Exception:
-            return jsonify({"error": "Hibás token"}), 401
-
-        if not decoded:
-            return jsonify({"error": "Érvénytelen vagy lejárt token"}), 401
-
-        user_id = decoded["user_id"]
+        user_id = current_user_id()
 
         
         post = Post.query.get(post_id)
@@ -922,6 +1096,12 @@ def register_routes(app):
         db.session.add(new_comment)
         db.session.flush()  # Hogy megkapjuk az ID-t
 
+        # Kommentszám növelése atomikusan, ugyanabban a tranzakcióban
+        Post.query.filter_by(id=post_id).update(
+            {Post.comment_count: Post.comment_count + 1}, synchronize_session=False
+        )
+        bump_post_content_version(post_id)
+
         # Fájl kezelés
         attachment_data = None
         if file and file.filename:
@@ -962,6 +1142,7 @@ def register_routes(app):
                 return jsonify({"error": f"Fájl feltöltési hiba: {str(e)}"}), 500
 
         db.session.commit()
+        invalidate_group_cache(post.group_id)
 
         comment_response = {
             "id": new_comment.id,
@@ -986,9 +1167,19 @@ def register_routes(app):
         
         ################# Case handling###############################xx
 
-        post = Post.query.get(post_id)
+        # A poszt és a csoport tartalomverziója egy lekérdezéssel; változatlan -> 304
+        post = (
+            db.session.query(Post.deleted_at, Group.content_version)
+            .join(Group, Group.id == Post.group_id)
+            .filter(Post.id == post_id)
+            .first()
+        )
         if not post or post.deleted_at is not None:
             return jsonify({"error": "Poszt nem található"}), 404
+
+        etag = content_etag("comments", post_id, post.content_version)
+        if is_not_modified(etag):
+            return not_modified(etag)
         
         #############################################
 
@@ -1023,28 +1214,15 @@ def register_routes(app):
                 ]
             comments_json.append(comment_data)
 
-        return jsonify({
+        return with_etag(jsonify({
             "post_id": post_id,
             "comments": comments_json
-        }), 200
+        }), etag), 200
 
     @app.route("/comments/<int:comment_id>", methods=["PUT", "DELETE"])
+    @require_auth
     def update_or_delete_comment(comment_id):
-        ################### Auth check and case handling
-        auth_header = request.headers.get("Authorization")
-        if not auth_header:
-            return jsonify({"error": "Hiányzó token"}), 401
-
-        try:
-            token = auth_header.split(" ")[1]
-            decoded = verify_jwt_token(token)
-        except Exception:
-            return jsonify({"error": "Hibás token"}), 401
-
-        if not decoded:
-            return jsonify({"error": "Érvénytelen vagy lejárt token"}), 401
-
-        user_id = decoded["user_id"]
+        user_id = current_user_id()
 
         comment = Comment.query.get(comment_id)
         if not comment or comment.deleted_at is not None:
@@ -1066,6 +1244,7 @@ def register_routes(app):
 
             comment.comment = content
             comment.updated_at = datetime.now(timezone.utc)
+            bump_post_content_version(comment.post_id)
             db.session.commit()
 
             return jsonify({
@@ -1081,9 +1260,18 @@ def register_routes(app):
             }), 200
 
         elif request.method == "DELETE":
-            # Soft delete
-            comment.deleted_at = datetime.now(timezone.utc)
+            # Soft delete; feltételes UPDATE, hogy két párhuzamos törlés ne csökkentsen kétszer
+            deleted = Comment.query.filter_by(id=comment.id, deleted_at=None).update(
+                {Comment.deleted_at: datetime.now(timezone.utc)}, synchronize_session=False
+            )
+            if deleted:
+                Post.query.filter_by(id=comment.post_id).update(
+                    {Post.comment_count: Post.comment_count - 1}, synchronize_session=False
+                )
+                bump_post_content_version(comment.post_id)
             db.session.commit()
+            if deleted:
+                invalidate_group_cache(comment.post.group_id)
 
             return jsonify({
                 "message": "Komment sikeresen törölve"
@@ -1093,23 +1281,22 @@ def register_routes(app):
 
 
     @app.route("/groups/<int:group_id>/events", methods=["GET"])
+    @require_auth
     def list_events(group_id):
-        # 1. Autentikáció és Jogosultság Ellenőrzés
-        auth_header = request.headers.get("Authorization")
-        if not auth_header: return jsonify({"error": "Hiányzó token"}), 401
-        try:
-            token = auth_header.split(" ")[1]
-            decoded = verify_jwt_token(token)
-        except: return jsonify({"error": "Hibás token"}), 401
-        if not decoded: return jsonify({"error": "Érvénytelen vagy lejárt token"}), 401
-        user_id = decoded["user_id"]
+        user_id = current_user_id()
 
         # Csoport létezik-e és tag-e a felhasználó? (Csak tagok láthatják az eseményeket)
-        group = Group.query.get(group_id)
-        if not group: return jsonify({"error": "Csoport nem található"}), 404
+        content_version = (
+            db.session.query(Group.content_version).filter(Group.id == group_id).scalar()
+        )
+        if content_version is None: return jsonify({"error": "Csoport nem található"}), 404
         
-        membership = GroupMember.query.filter_by(user_id=user_id, group_id=group_id).first()
-        if not membership: return jsonify({"error": "Nem vagy tagja a csoportnak"}), 403
+        if not is_group_member(user_id, group_id): return jsonify({"error": "Nem vagy tagja a csoportnak"}), 403
+
+        # Változatlan tartalomverzió -> 304, az eseménylistát le sem kérdezzük
+        etag = content_etag("events", group_id, content_version)
+        if is_not_modified(etag):
+            return not_modified(etag)
 
         # 2. Események lekérése szűréssel (opcionális: start/end dátum)
         # Bár az Event modelled event_date-et használ, a naptár frontendek (pl. FullCalendar) 
@@ -1138,25 +1325,18 @@ def register_routes(app):
             for e in events
         ]
 
-        return jsonify({"events": events_json}), 200
+        return with_etag(jsonify({"events": events_json}), etag), 200
 
 
     @app.route("/groups/<int:group_id>/events", methods=["POST"])
+    @require_auth
     def create_event(group_id):
         # Auth ellenőrzés (ugyanaz, mint fent)
-        auth_header = request.headers.get("Authorization")
-        if not auth_header: return jsonify({"error": "Hiányzó token"}), 401
-        try:
-            token = auth_header.split(" ")[1]
-            decoded = verify_jwt_token(token)
-        except: return jsonify({"error": "Hibás token"}), 401
-        if not decoded: return jsonify({"error": "Érvénytelen vagy lejárt token"}), 401
-        user_id = decoded["user_id"]
+        user_id = current_user_id()
 
-        group = Group.query.get(group_id)
+        group = load_group(group_id)
         if not group: return jsonify({"error": "Csoport nem található"}), 404
-        membership = GroupMember.query.filter_by(user_id=user_id, group_id=group_id).first()
-        if not membership: return jsonify({"error": "Nem vagy tagja a csoportnak"}), 403
+        if not is_group_member(user_id, group_id): return jsonify({"error": "Nem vagy tagja a csoportnak"}), 403
         
         data = request.get_json()
         if not data: return jsonify({"error": "Nincs JSON adat"}), 400
@@ -1188,6 +1368,7 @@ def register_routes(app):
         )
 
         db.session.add(new_event)
+        bump_content_version(group_id)
         db.session.commit()
 
         return jsonify({
@@ -1201,16 +1382,10 @@ def register_routes(app):
         }), 201
 
     @app.route("/events/<int:event_id>", methods=["PUT", "DELETE"])
+    @require_auth
     def update_or_delete_event(event_id):
         # Auth ellenőrzés
-        auth_header = request.headers.get("Authorization")
-        if not auth_header: return jsonify({"error": "Hiányzó token"}), 401
-        try:
-            token = auth_header.split(" ")[1]
-            decoded = verify_jwt_token(token)
-        except: return jsonify({"error": "Hibás token"}), 401
-        if not decoded: return jsonify({"error": "Érvénytelen vagy lejárt token"}), 401
-        user_id = decoded["user_id"]
+        user_id = current_user_id()
 
         event = Event.query.get(event_id)
         if not event or event.deleted_at is not None:
@@ -1239,6 +1414,7 @@ def register_routes(app):
                     return jsonify({"error": "Hibás dátum formátum"}), 400
 
             event.updated_at = datetime.now(timezone.utc)
+            bump_content_version(event.group_id)
             db.session.commit()
 
             return jsonify({
@@ -1253,123 +1429,158 @@ def register_routes(app):
         elif request.method == "DELETE":
             # Soft delete
             event.deleted_at = datetime.now(timezone.utc)
+            bump_content_version(event.group_id)
             db.session.commit()
 
             return jsonify({"message": "Esemény sikeresen törölve"}), 200
 
     @app.route("/groups/unread-counts", methods=["GET"])
+    @require_auth
     def get_unread_post_counts():
         """Visszaadja az olvasatlan posztok számát csoportonként"""
-        auth_header = request.headers.get("Authorization")
-        if not auth_header:
-            return jsonify({"error": "Hiányzó token"}), 401
 
+        user_id = current_user_id()
+
+        # Long-poll: ?wait=<mp>&version=<N> esetén csak változáskor (vagy timeout után) válaszolunk
+        try:
+            wait = min(float(request.args.get("wait", 0)), MAX_LONG_POLL_SECONDS)
+        except ValueError:
+            return jsonify({"error": "Hibás wait paraméter"}), 400
+        client_version = request.args.get("version")
+
+        # Előbb feliratkozunk, hogy a lekérdezés és a várakozás között se vesszen el értesítés
+        broker = event_broker()
+        subscription = broker.subscribe(user_id) if wait > 0 and client_version else None
         try:
-            token = auth_header.split(" ")[1]
-            decoded = verify_jwt_token(token)
-        except:
-            return jsonify({"error": "Hibás token"}), 401
+            # Kis csoportok a számláló store-ból, a többi egy csoportosított lekérdezéssel
+            unread_counts = unread_counts_for(user_id)
+            version = unread_counts_version(unread_counts)
+
+            deadline = time.monotonic() + wait
+            while subscription and str(version) == client_version:
+                # Várakozás közben nincs nálunk DB kapcsolat; gevent workerrel szál sem
+                db.session.remove()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or subscription.get(timeout=remaining) is None:
+                    break
+                unread_counts = unread_counts_for(user_id)
+                version = unread_counts_version(unread_counts)
+        finally:
+            if subscription:
+                broker.unsubscribe(subscription)
+        
+        return jsonify({"unread_counts": unread_counts, "version": version}), 200
+
+    @app.route("/events/stream", methods=["GET"])
+    def event_stream_route():
+        """SSE: olvasatlan-szám változások és új poszt értesítések a user csoportjaiból"""
+        # Az EventSource nem tud headert küldeni, ezért a token query paraméterben is jöhet
+        auth_header = request.headers.get("Authorization")
+        token = auth_header.split(" ")[1] if auth_header and " " in auth_header else request.args.get("token")
+        if not token:
+            return jsonify({"error": "Hiányzó token"}), 401
 
+        decoded = verify_access_token(token)
         if not decoded:
             return jsonify({"error": "Érvénytelen vagy lejárt token"}), 401
 
         user_id = decoded["user_id"]
 
-        # A user összes csoportja
-        memberships = GroupMember.query.filter_by(user_id=user_id).all()
-        
-        unread_counts = {}
-        
-        for membership in memberships:
-            group_id = membership.group_id
-            
-            # A csoport összes posztja (nem törölt, és a user csatlakozása után készült)
-            # KIZÁRJUK azokat a posztokat, amelyeket a felhasználó írt (author_id == user_id)
-            all_posts = (
-                Post.query
-                .filter_by(group_id=group_id, deleted_at=None)
-                .filter(Post.created_at >= membership.joined_at)
-                .filter(Post.author_id != user_id)  # A saját posztjai ne számolódjanak
-                .all()
-            )
-            
-            # A user által már megtekintett posztok
-            viewed_post_ids = {
-                pv.post_id for pv in PostView.query.filter_by(user_id=user_id).all()
-            }
-            
-            # Olvasatlan posztok száma (amit még nem látott)
-            unread_count = sum(1 for post in all_posts if post.id not in viewed_post_ids)
-            
-            unread_counts[group_id] = unread_count
-        
-        return jsonify({"unread_counts": unread_counts}), 200
+        # Előbb feliratkozunk, utána kérjük le a kezdő állapotot, hogy ne vesszen el esemény
+        broker = event_broker()
+        subscription = broker.subscribe(user_id)
+        unread_counts = unread_counts_for(user_id)
+        # A generátor már nem használ adatbázist: a kapcsolat a kérés végén visszakerül a poolba
+        db.session.remove()
+
+        stream = event_stream(
+            broker,
+            subscription,
+            [("unread_counts", {"unread_counts": unread_counts})],
+            current_app.config.get("SSE_KEEPALIVE_SECONDS", 15)
+        )
+        return Response(stream, mimetype="text/event-stream", headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        })
 
     @app.route("/groups/<int:group_id>/mark-posts-read", methods=["POST"])
+    @require_auth
     def mark_group_posts_read(group_id):
         """Jelöli meg a csoport összes posztját olvasottnak a felhasználó számára"""
-        auth_header = request.headers.get("Authorization")
-        if not auth_header:
-            return jsonify({"error": "Hiányzó token"}), 401
-
-        try:
-            token = auth_header.split(" ")[1]
-            decoded = verify_jwt_token(token)
-        except:
-            return jsonify({"error": "Hibás token"}), 401
 
-        if not decoded:
-            return jsonify({"error": "Érvénytelen vagy lejárt token"}), 401
-
-        user_id = decoded["user_id"]
+        user_id = current_user_id()
 
-        # Ellenőrizzük, hogy a user tagja-e a csoportnak
-        membership = GroupMember.query.filter_by(
-            user_id=user_id, group_id=group_id
-        ).first()
-        if not membership:
+        # Ellenőrizzük, hogy a user tagja-e a csoportnak (a token claim-jeiből, ha frissek)
+        if not is_group_member(user_id, group_id):
             return jsonify({"error": "Nem vagy tagja a csoportnak"}), 403
 
-        # A csoport összes posztja (nem törölt)
-        posts = Post.query.filter_by(group_id=group_id, deleted_at=None).all()
-        
-        # Már megtekintett posztok ID-i
-        existing_views = PostView.query.filter_by(user_id=user_id).all()
-        viewed_post_ids = {pv.post_id for pv in existing_views}
-        
-        # Új PostView rekordok létrehozása azokhoz a posztokhoz, amiket még nem látott
-        new_views = []
-        for post in posts:
-            if post.id not in viewed_post_ids:
-                post_view = PostView(
-                    user_id=user_id,
-                    post_id=post.id,
-                    viewed_at=datetime.now(timezone.utc)
-                )
-                new_views.append(post_view)
-        
-        if new_views:
-            db.session.add_all(new_views)
+        # A vízjel sor létrehozása, vagy ha már van, kizárólagos zárolása (upsert): két lap
+        # párhuzamos hívása itt sorba áll. INSERT IGNORE + FOR UPDATE InnoDB-n deadlockolna.
+        db.session.execute(insert_or_lock(
+            GroupReadMark.__table__,
+            {"user_id": user_id, "group_id": group_id, "last_read_seq": 0},
+            ["user_id", "group_id"]
+        ))
+        mark = (
+            GroupReadMark.query
+            .filter_by(user_id=user_id, group_id=group_id)
+            .with_for_update()
+            .populate_existing()
+            .one()
+        )
+
+        # A csoport legnagyobb látható poszt sorszáma lesz az új vízjel. A sorszámok a commit
+        # sorrendjében nőnek (assign_post_seq), így egy később commitoló poszt mindig fölé kerül.
+        newest_seq = (
+            db.session.query(func.max(Post.group_seq))
+            .filter(Post.group_id == group_id, Post.deleted_at.is_(None))
+            .scalar()
+        )
+        if newest_seq is None or newest_seq <= mark.last_read_seq:
+            # Nincs új poszt, vagy egy másik lap már továbbléptette a vízjelet
             db.session.commit()
+            return jsonify({
+                "message": "Posztok sikeresen olvasottnak jelölve",
+                "marked_count": 0
+            }), 200
+
+        covered = Post.group_seq <= newest_seq
+
+        # Hány poszt kerül most a vízjel alá, amit eddig nem látott (a saját posztokat is beleértve);
+        # a zárolt sor miatt párhuzamos hívások nem számolják kétszer ugyanazt
+        marked_count = (
+            db.session.query(func.count(Post.id))
+            .join(GroupReadMark, and_(
+                GroupReadMark.user_id == user_id, GroupReadMark.group_id == group_id
+            ))
+            .filter(Post.group_id == group_id, Post.deleted_at.is_(None), covered,
+                    unread_post_filter(user_id))
+            .scalar()
+        )
+
+        mark.last_read_seq = newest_seq
+
+        # A vízjel alatti egyedi olvasásokra már nincs szükség
+        PostView.query.filter(
+            PostView.user_id == user_id,
+            PostView.post_id.in_(select(Post.id).where(Post.group_id == group_id, covered))
+        ).delete(synchronize_session=False)
+        db.session.commit()
+
+        # A user többi nyitott lapja is nullázza a számlálót
+        unread_counter_store().set_count(user_id, group_id, 0)
+        publish([user_id], "unread", {"group_id": group_id, "unread_count": 0})
         
         return jsonify({
             "message": "Posztok sikeresen olvasottnak jelölve",
-            "marked_count": len(new_views)
+            "marked_count": marked_count
         }), 200
         
     @app.route("/posts/<int:post_id>/attachments", methods=["POST"])
+    @require_auth
     def upload_post_attachment(post_id):
-        # AUTH
-        auth_header = request.headers.get("Authorization")
-        if not auth_header:
-            return jsonify({"error": "Hiányzó token"}), 401
-
-        token = auth_header.split(" ")[1]
-        decoded = verify_jwt_token(token)
-        if not decoded:
-            return jsonify({"error": "Érvénytelen token"}), 401
-
-        user_id = decoded["user_id"]
+        user_id = current_user_id()
 
         post = Post.query.get(post_id)
         if not post or post.deleted_at:
@@ -1408,7 +1619,9 @@ def register_routes(app):
         )
 
         db.session.add(attachment)
+        bump_post_content_version(post.id)
         db.session.commit()
+        invalidate_group_cache(post.group_id)
 
         return jsonify({
             "message": "Fájl sikeresen feltöltve",
@@ -1420,18 +1633,9 @@ def register_routes(app):
         }), 201
 
     @app.route("/comments/<int:comment_id>/attachments", methods=["POST"])
+    @require_auth
     def upload_comment_attachment(comment_id):
-        # AUTH
-        auth_header = request.headers.get("Authorization")
-        if not auth_header:
-            return jsonify({"error": "Hiányzó token"}), 401
-
-        token = auth_header.split(" ")[1]
-        decoded = verify_jwt_token(token)
-        if not decoded:
-            return jsonify({"error": "Érvénytelen token"}), 401
-
-        user_id = decoded["user_id"]
+        user_id = current_user_id()
 
         comment = Comment.query.get(comment_id)
         if not comment or comment.deleted_at:
@@ -1471,7 +1675,9 @@ def register_routes(app):
         )
 
         db.session.add(attachment)
+        bump_post_content_version(comment.post_id)
         db.session.commit()
+        invalidate_group_cache(comment.post.group_id)
 
         return jsonify({
             "message": "Fájl sikeresen feltöltve",
@@ -1484,18 +1690,9 @@ def register_routes(app):
         }), 201
 
     @app.route("/attachments/<int:attachment_id>", methods=["DELETE"])
+    @require_auth
     def delete_post_attachment(attachment_id):
-        # AUTH
-        auth_header = request.headers.get("Authorization")
-        if not auth_header:
-            return jsonify({"error": "Hiányzó token"}), 401
-
-        token = auth_header.split(" ")[1]
-        decoded = verify_jwt_token(token)
-        if not decoded:
-            return jsonify({"error": "Érvénytelen token"}), 401
-
-        user_id = decoded["user_id"]
+        user_id = current_user_id()
 
         attachment = PostAttachment.query.get(attachment_id)
         if not attachment:
@@ -1523,7 +1720,9 @@ def register_routes(app):
                 print(f"Fájl törlési hiba: {e}")
             
             db.session.delete(attachment)
+            bump_post_content_version(comment.post_id)
             db.session.commit()
+            invalidate_group_cache(comment.post.group_id)
             
             return jsonify({"message": "Fájl sikeresen törölve"}), 200
 
@@ -1546,32 +1745,20 @@ def register_routes(app):
             print(f"Fájl törlési hiba: {e}")
 
         db.session.delete(attachment)
+        bump_post_content_version(post.id)
         db.session.commit()
+        invalidate_group_cache(post.group_id)
 
         return jsonify({"message": "Fájl sikeresen törölve"}), 200
     
     @app.route('/groups/<int:group_id>/leave', methods=['DELETE', 'OPTIONS'])
+    @require_auth
     def leavegroup(group_id):
         if request.method == 'OPTIONS':
             return {}, 200
-        
-        authheader = request.headers.get('Authorization')
-        if not authheader:
-            return jsonify(error='Hiányzik token'), 401
-        
-        try:
-            token = authheader.split(' ')[1]
-            decoded = verify_jwt_token(token)
-        except:
-            return jsonify(error='Hibás token'), 401
-        
-        if not decoded:
-            return jsonify(error='Érvénytelen vagy lejárt token'), 401
-        
-        userid = decoded.get('user_id')
-        if not userid:
-            return jsonify(error='Token-ben nincs user_id'), 401
-        
+
+        userid = current_user_id()
+
         # HELYES MEZŐNEVEK!
         membership = GroupMember.query.filter_by(
             user_id=userid,    # ← user_id nem userid!
@@ -1582,8 +1769,30 @@ def register_routes(app):
             return jsonify(error='Nem vagy tagja ennek a csoportnak'), 403
         
         db.session.delete(membership)
+        GroupReadMark.query.filter_by(user_id=userid, group_id=group_id).delete(synchronize_session=False)
+
+        # Tagszám és érdeklődési hisztogram frissítése ugyanabban a tranzakcióban
+        Group.query.filter_by(id=group_id).update(
+            {Group.member_count: Group.member_count - 1}, synchronize_session=False
+        )
+        User.query.filter_by(id=userid).update(
+            {User.membership_version: User.membership_version + 1}, synchronize_session=False
+        )
+        user = load_user(userid)
+        adjust_interest_histogram(group_id, user.hobby_mask, -1)
         db.session.commit()
+
+        membership_changed(userid)
+        store = unread_counter_store()
+        store.forget([userid])
+        # Ha a csoport most lett újra "kicsi", a tagok régi (nem frissített) mezői elavultak
+        member_count = db.session.query(Group.member_count).filter_by(id=group_id).scalar()
+        if member_count == fanout_limit():
+            store.forget(other_member_ids(group_id, userid), group_id)
         
-        return jsonify(message='Sikeresen kiléptél a csoportból!'), 200
+        return jsonify(
+            message='Sikeresen kiléptél a csoportból!',
+            token=create_jwt_token(userid, membership_claims(userid))
+        ), 200
 
 
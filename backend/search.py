@@ -0,0 +1,115 @@
+import unicodedata
+from sqlalchemy import and_, event, func, select  # pyright: ignore[reportMissingImports]
+from models import db, Group, SubjectTrigram
+
+
+def normalize_subject(text):
+    """Kisbetűs, ékezetmentes, egyszeres szóközös alak ("Analízis  I." -> "analizis i.")."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+
+def subject_trigrams(key):
+    return {key[i:i + 3] for i in range(len(key) - 2)}
+
+
+def _query_trigrams(key):
+    """Nem átfedő trigramok (+ az utolsó): kevesebb posting lista, a LIKE úgyis ellenőriz."""
+    if len(key) < 3:
+        return set()
+    grams = {key[i:i + 3] for i in range(0, len(key) - 2, 3)}
+    grams.add(key[-3:])
+    return grams
+
+
+def subject_search_filter(query_text):
+    """Group szűrő a `%query%` részszöveges kereséshez, indexelt úton.
+
+    A trigram táblából jönnek a jelöltek (minden trigramnak szerepelnie kell), majd a
+    normalizált oszlopon ellenőrizzük a pontos részszöveget. 3 karakternél rövidebb
+    keresésnél nincs trigram, ilyenkor csak a keskeny subject_key indexet olvassuk.
+    """
+    key = normalize_subject(query_text)
+    contains_key = Group.subject_key.contains(key, autoescape=True)
+
+    grams = _query_trigrams(key)
+    if not grams:
+        return contains_key
+
+    candidates = (
+        select(SubjectTrigram.group_id)
+        .where(SubjectTrigram.trigram.in_(grams))
+        .group_by(SubjectTrigram.group_id)
+        .having(func.count() == len(grams))
+    )
+    return and_(Group.id.in_(candidates), contains_key)
+
+
+def index_subject_trigrams(connection, group_id, key):
+    rows = [{"trigram": t, "group_id": group_id} for t in sorted(subject_trigrams(key))]
+    if rows:
+        connection.execute(SubjectTrigram.__table__.insert(), rows)
+
+
+def _delete_trigrams(connection, group_id):
+    connection.execute(
+        SubjectTrigram.__table__.delete().where(SubjectTrigram.group_id == group_id)
+    )
+
+
+@event.listens_for(Group, "before_insert")
+@event.listens_for(Group, "before_update")
+def _set_subject_key(mapper, connection, target):
+    target.subject_key = normalize_subject(target.subject)
+
+
+@event.listens_for(Group, "after_insert")
+def _index_new_group(mapper, connection, target):
+    index_subject_trigrams(connection, target.id, target.subject_key)
+
+
+@event.listens_for(Group, "after_update")
+def _reindex_group(mapper, connection, target):
+    if db.inspect(target).attrs.subject.history.has_changes():
+        _delete_trigrams(connection, target.id)
+        index_subject_trigrams(connection, target.id, target.subject_key)
+
+
+@event.listens_for(Group, "after_delete")
+def _unindex_group(mapper, connection, target):
+    _delete_trigrams(connection, target.id)
+
+
+def reindex_subjects(batch_size=1000):
+    """Újraszámolja az összes csoport subject_key-ét és trigramjait (pl. migráció után)."""
+    db.session.query(SubjectTrigram).delete(synchronize_session=False)
+
+    last_id = 0
+    reindexed = 0
+    while True:
+        rows = (
+            db.session.query(Group.id, Group.subject)
+            .filter(Group.id > last_id)
+            .order_by(Group.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+
+        trigram_rows = []
+        for group_id, subject in rows:
+            key = normalize_subject(subject)
+            db.session.query(Group).filter(Group.id == group_id).update(
+                {Group.subject_key: key}, synchronize_session=False
+            )
+            trigram_rows.extend({"trigram": t, "group_id": group_id} for t in subject_trigrams(key))
+        if trigram_rows:
+            db.session.execute(SubjectTrigram.__table__.insert(), trigram_rows)
+
+        last_id = rows[-1][0]
+        reindexed += len(rows)
+
+    db.session.commit()
+    return reindexed
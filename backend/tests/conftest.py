@@ -1,6 +1,11 @@
+from contextlib import contextmanager
+from datetime import datetime
+
 import pytest
+from sqlalchemy import event
+
 from app import create_app
-from models import db
+from models import db, Group, GroupMember
 
 @pytest.fixture
 def app():
@@ -20,3 +25,59 @@ def app():
 def client(app):
     return app.test_client()
 
+
+
+# Közös teszt segédek: a tesztmodulok `from conftest import ...`-tal használják
+
+class FakeClock:
+    """Kézzel léptethető óra a `clock=` paramétert váró cache-ekhez."""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@contextmanager
+def count_queries():
+    """A blokkban kiadott SQL utasítások listája."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+
+def register(client, email, hobbies=None):
+    """Regisztráció a /register-en; a válasz JSON törzse (user, token, refresh_token)."""
+    res = client.post("/register", json={
+        "email": email,
+        "password": "password123",
+        "major": "Informatika",
+        "hobbies": hobbies or []
+    })
+    return res.get_json()
+
+
+def auth_headers(token):
+    """Bearer header egy tokenből, vagy egy /register, /login válasz `token` mezőjéből."""
+    if isinstance(token, dict):
+        token = token["token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def shared_group(*user_ids, name="Shared group"):
+    """Csoport a megadott tagokkal (az első a létrehozó), régi csatlakozási idővel; a csoport ID-ja."""
+    group = Group(name=name, subject="Forum", creator_id=user_ids[0], member_count=len(user_ids))
+    db.session.add(group)
+    db.session.flush()
+    for user_id in user_ids:
+        db.session.add(GroupMember(group_id=group.id, user_id=user_id, joined_at=datetime(2026, 1, 1)))
+    db.session.commit()
+    return group.id
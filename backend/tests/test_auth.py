@@ -1,3 +1,6 @@
+from conftest import auth_headers
+
+
 def test_register_success(client):
     payload = {
         "email": "test@elte.hu",
@@ -71,7 +74,7 @@ def test_profile_success(client):
 
     res = client.get(
         "/profile",
-        headers={"Authorization": f"Bearer {token}"}
+        headers=auth_headers(token)
     )
 
     assert res.status_code == 200
@@ -195,7 +198,7 @@ def test_groups_search_url_encoded_query(client):
 
     res = client.get(
         "/groups/search?q=Analízis%20I.",
-        headers={"Authorization": f"Bearer {token}"}
+        headers=auth_headers(token)
     )
 
     assert res.status_code == 200
@@ -242,7 +245,7 @@ def test_groups_search_special_chars(client):
 
     res = client.get(
         "/groups/search?q=Matematika#1",
-        headers={"Authorization": f"Bearer {token}"}
+        headers=auth_headers(token)
     )
 
     assert res.status_code == 200
@@ -314,11 +317,11 @@ def test_profile_multiple_requests_same_token(client):
 
     res1 = client.get(
         "/profile",
-        headers={"Authorization": f"Bearer {token}"}
+        headers=auth_headers(token)
     )
     res2 = client.get(
         "/profile",
-        headers={"Authorization": f"Bearer {token}"}
+        headers=auth_headers(token)
     )
 
     assert res1.status_code == 200
@@ -349,3 +352,22 @@ def test_groups_search_missing_auth_header(client):
     assert res.status_code == 401
 
 
+
+def test_register_populates_hobby_tags(app, client):
+    from models import db, User, HobbyTag, UserHobby
+    from hobbies import hobby_mask
+
+    res = client.post("/register", json={
+        "email": "tags@elte.hu",
+        "password": "password123",
+        "major": "Informatika",
+        "hobbies": ["Sport", "zene", "sport"]
+    })
+    assert res.status_code == 201
+
+    user = User.query.filter_by(email="tags@elte.hu").first()
+    tag_ids = [link.tag_id for link in UserHobby.query.filter_by(user_id=user.id).all()]
+    names = {db.session.get(HobbyTag, t).name for t in tag_ids}
+
+    assert names == {"sport", "zene"}
+    assert user.hobby_mask == hobby_mask(tag_ids)
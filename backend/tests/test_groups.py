@@ -0,0 +1,405 @@
+from flask import g
+
+from models import db, User, Group, GroupMember, GroupInterestCount, HobbyTag
+from hobbies import adjust_interest_histogram, check_interest_histogram, hobby_masks_exact, sync_user_hobby_tags
+from counters import reconcile_member_counts
+from conftest import auth_headers, count_queries, register
+
+
+def seed_groups(subject, group_count, members_per_group, hobbies):
+    groups = []
+    for i in range(group_count):
+        creator = User(
+            email=f"{subject.lower()}-creator-{i}@elte.hu",
+            password_hash="x",
+            major="Informatika"
+        )
+        db.session.add(creator)
+        db.session.flush()
+
+        group = Group(
+            name=f"{subject} Study Group #{i + 1}",
+            subject=subject,
+            creator_id=creator.id,
+            member_count=members_per_group
+        )
+        db.session.add(group)
+        db.session.flush()
+
+        for j in range(members_per_group):
+            member = User(
+                email=f"{subject.lower()}-{i}-{j}@elte.hu",
+                password_hash="x",
+                major="Informatika",
+                hobbies=hobbies
+            )
+            db.session.add(member)
+            db.session.flush()
+            sync_user_hobby_tags(member)
+            db.session.add(GroupMember(group_id=group.id, user_id=member.id))
+            adjust_interest_histogram(group.id, member.hobby_mask, 1)
+        groups.append(group)
+
+    db.session.commit()
+    return groups
+
+
+def test_groups_search_recommends_group_with_shared_interests(client):
+    seed_groups("Algebra", 1, 2, "sport,zene")
+    seed_groups("Algebra2", 1, 3, "futás")
+    body = register(client, "searcher@elte.hu", ["zene"])
+    headers = auth_headers(body)
+
+    res = client.get("/groups/search?q=Algebra", headers=headers)
+
+    assert res.status_code == 200
+    data = res.get_json()
+    by_name = {g["name"]: g for g in data["all_groups"]}
+    assert by_name["Algebra Study Group #1"]["member_count"] == 2
+    assert by_name["Algebra Study Group #1"]["same_interest_members"] == 2
+    assert by_name["Algebra2 Study Group #1"]["member_count"] == 3
+    assert by_name["Algebra2 Study Group #1"]["same_interest_members"] == 0
+    assert all(g["is_member"] is False for g in data["all_groups"])
+    assert data["recommended_group"]["name"] == "Algebra Study Group #1"
+    assert data["recommended_group"]["member_count"] == 2
+    assert data["recommended_group"]["same_interest_members"] == 2
+
+
+def test_groups_search_reports_membership(client):
+    groups = seed_groups("Geometria", 1, 1, "zene")
+    body = register(client, "member@elte.hu", ["zene"])
+    headers = auth_headers(body)
+    assert client.post("/groups/join", json={"group_id": groups[0].id}, headers=headers).status_code == 201
+
+
+    data = client.get("/groups/search?q=Geometria", headers=headers).get_json()
+
+    assert data["recommended_group"]["id"] == groups[0].id
+    assert data["recommended_group"]["is_member"] is True
+    assert data["recommended_group"]["same_interest_members"] == 2
+
+
+def test_groups_search_query_count_is_constant(client):
+    seed_groups("Small", 2, 2, "zene")
+    seed_groups("Large", 10, 10, "zene")
+    body = register(client, "counter@elte.hu", ["zene"])
+    headers = auth_headers(body)
+    # Az első keresések létrehozzák az üres csoportokat, utána már csak olvasunk
+    client.get("/groups/search?q=Small", headers=headers)
+    client.get("/groups/search?q=Large", headers=headers)
+
+    with count_queries() as small_queries:
+        assert client.get("/groups/search?q=Small", headers=headers).status_code == 200
+    with count_queries() as large_queries:
+        assert client.get("/groups/search?q=Large", headers=headers).status_code == 200
+
+    assert len(large_queries) == len(small_queries)
+    assert len(large_queries) <= 7
+
+
+def test_groups_search_matches_hobbies_case_insensitively(client):
+    seed_groups("Fizika", 1, 2, "Zene, Sport")
+    body = register(client, "casing@elte.hu", ["zene"])
+    headers = auth_headers(body)
+
+    data = client.get("/groups/search?q=Fizika", headers=headers).get_json()
+
+    assert data["all_groups"][0]["same_interest_members"] == 2
+
+
+def test_groups_search_exact_when_hobby_masks_collide(client):
+    # 63-nál több tag esetén (pl. régi adatbázis) a bitek ütköznek: 1 és 64 ugyanarra a bitre esik
+    db.session.add_all([HobbyTag(id=i, name=f"tag{i}") for i in range(2, 64)])
+    db.session.add_all([HobbyTag(id=1, name="zene"), HobbyTag(id=64, name="sport")])
+    db.session.commit()
+    seed_groups("Kemia", 1, 2, "sport")
+    body = register(client, "collide@elte.hu", ["zene"])
+    headers = auth_headers(body)
+
+    data = client.get("/groups/search?q=Kemia", headers=headers).get_json()
+
+    assert data["all_groups"][0]["same_interest_members"] == 0
+
+
+def test_unknown_hobbies_do_not_grow_tag_set(app, client):
+    hobbies = ["Sport"] + [f"kitalalt{i}" for i in range(64)]
+    body = register(client, "madeup@elte.hu", hobbies)
+
+    # A profil szövege mindent megőriz, tag csak a katalógusbeli hobbiból lesz
+    assert body["user"]["hobbies"] == ",".join(hobbies)
+    assert [t.name for t in HobbyTag.query.all()] == ["sport"]
+    with app.test_request_context():
+        assert hobby_masks_exact()
+
+    # A kérésenkénti eredmény nem marad a g-ben a következő kérésre
+    client.get("/groups/search?q=Kemia", headers=auth_headers(body))
+    assert "hobby_masks_exact" not in g
+
+
+def test_interest_histogram_follows_join_and_leave(app, client):
+    groups = seed_groups("Statisztika", 1, 2, "zene")
+    body = register(client, "histogram@elte.hu", ["zene", "sport"])
+    headers = auth_headers(body)
+
+    client.post("/groups/join", json={"group_id": groups[0].id}, headers=headers)
+    assert check_interest_histogram() == []
+    data = client.get("/groups/search?q=Statisztika", headers=headers).get_json()
+    assert data["recommended_group"]["same_interest_members"] == 3
+
+    client.delete(f"/groups/{groups[0].id}/leave", headers=headers)
+    assert check_interest_histogram() == []
+    data = client.get("/groups/search?q=Statisztika", headers=headers).get_json()
+    assert data["recommended_group"]["same_interest_members"] == 2
+
+
+def test_interest_histogram_follows_hobby_changes(client):
+    groups = seed_groups("Logika", 1, 2, "zene")
+    member = GroupMember.query.filter_by(group_id=groups[0].id).first()
+    user = db.session.get(User, member.user_id)
+
+    old_mask = user.hobby_mask
+    user.hobbies = "futás"
+    sync_user_hobby_tags(user)
+    db.session.commit()
+
+    assert user.hobby_mask not in (0, old_mask)
+    assert check_interest_histogram() == []
+
+
+def test_interest_histogram_cli_rebuild_and_check(app):
+    groups = seed_groups("Halmazelmelet", 1, 3, "zene")
+    GroupInterestCount.query.filter_by(group_id=groups[0].id).update({"member_count": 7})
+    db.session.commit()
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=["interests", "check"])
+    assert result.exit_code == 1
+    assert "elvárt=3 tárolt=7" in result.output
+
+    result = runner.invoke(args=["interests", "rebuild"])
+    assert result.exit_code == 0
+    assert runner.invoke(args=["interests", "check"]).exit_code == 0
+
+
+def test_member_count_follows_join_and_leave(client):
+    groups = seed_groups("Numerikus", 1, 2, "zene")
+    body = register(client, "count@elte.hu")
+    headers = auth_headers(body)
+
+    client.post("/groups/join", json={"group_id": groups[0].id}, headers=headers)
+    data = client.get("/groups/by-subject?name=Numerikus", headers=headers).get_json()
+    assert data[0]["member_count"] == 3
+    assert data[0]["is_member"] is True
+
+    client.delete(f"/groups/{groups[0].id}/leave", headers=headers)
+    data = client.get("/groups/by-subject?name=Numerikus", headers=headers).get_json()
+    assert data[0]["member_count"] == 2
+    assert data[0]["is_member"] is False
+
+
+def test_groups_by_subject_does_not_count_member_rows(client):
+    seed_groups("Optimalizalas", 5, 3, "zene")
+    body = register(client, "bysubject@elte.hu")
+    headers = auth_headers(body)
+
+    with count_queries() as queries:
+        res = client.get("/groups/by-subject?name=Optimalizalas", headers=headers)
+
+    assert res.status_code == 200
+    assert [g["member_count"] for g in res.get_json()] == [3] * 5
+    assert not any("count(" in q.lower() for q in queries)
+    assert len(queries) == 2
+
+
+def test_reconcile_member_counts_fixes_drift(app):
+    groups = seed_groups("Topologia", 2, 3, "zene")
+    groups[0].member_count = 10
+    db.session.commit()
+
+    assert reconcile_member_counts() == 1
+    assert db.session.get(Group, groups[0].id).member_count == 3
+    assert app.test_cli_runner().invoke(args=["counters", "reconcile"]).output.startswith("member_count javítva 0")
+
+
+def test_concurrent_searches_create_exactly_one_group(tmp_path):
+    import threading
+    from app import create_app
+    from routes import create_jwt_token
+
+    concurrent_app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'concurrent.db'}",
+        "SQLALCHEMY_ENGINE_OPTIONS": {"connect_args": {"timeout": 60}},
+        # 200 keresés egy IP-ről: a rate limit itt nem a mért viselkedés része
+        "RATE_LIMIT_ENABLED": False,
+    })
+
+    with concurrent_app.app_context():
+        seed_groups("Kombinatorika", 1, 1, "zene")
+        users = [
+            User(email=f"concurrent-{i}@elte.hu", password_hash="x", major="Informatika")
+            for i in range(200)
+        ]
+        db.session.add_all(users)
+        db.session.commit()
+        tokens = [create_jwt_token(u.id) for u in users]
+        db.session.remove()
+
+    barrier = threading.Barrier(len(tokens))
+    statuses = []
+    recommended = []
+
+    def search(token):
+        client = concurrent_app.test_client()
+        barrier.wait()
+        res = client.get(
+            "/groups/search?q=Kombinatorika",
+            headers=auth_headers(token)
+        )
+        statuses.append(res.status_code)
+        recommended.append(res.get_json()["recommended_group"]["name"])
+
+    threads = [threading.Thread(target=search, args=(token,)) for token in tokens]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert statuses == [200] * len(tokens)
+    assert set(recommended) == {"Kombinatorika Study Group #2"}
+    with concurrent_app.app_context():
+        names = sorted(g.name for g in Group.query.filter_by(subject="Kombinatorika"))
+        db.session.remove()
+        db.engine.dispose()
+    assert names == ["Kombinatorika Study Group #1", "Kombinatorika Study Group #2"]
+
+
+def test_open_group_allocation_locks_slot_row_first(client):
+    seed_groups("Topologia", 1, 1, "zene")
+    headers = auth_headers(register(client, "slotlock@elte.hu"))
+
+    # Teli csoport mellett: a slot sor kizárólagos zárja (upsert) minden csoport-beszúrást megelőz
+    with count_queries() as queries:
+        data = client.get("/groups/search?q=Topologia", headers=headers).get_json()
+    assert data["recommended_group"]["name"] == "Topologia Study Group #2"
+
+    writes = [q for q in queries if q.lstrip().upper().startswith("INSERT")]
+    assert "subject_group_slots" in writes[0] and "DO UPDATE" in writes[0]
+    assert any("study_groups" in q for q in writes[1:])
+
+
+def test_groups_by_subject_keyset_pagination(client):
+    groups = seed_groups("Kriptografia", 5, 1, "zene")
+    body = register(client, "pages@elte.hu")
+    headers = auth_headers(body)
+
+    seen = []
+    cursor = None
+    for _ in range(3):
+        url = "/groups/by-subject?name=Kriptografia&limit=2"
+        if cursor:
+            url += f"&cursor={cursor}"
+        res = client.get(url, headers=headers)
+        seen.extend(g["id"] for g in res.get_json())
+        cursor = res.headers.get("X-Next-Cursor")
+
+    assert seen == [g.id for g in groups]
+    assert cursor is None
+
+
+def test_groups_by_subject_rejects_bad_paging_args(client):
+    body = register(client, "badpage@elte.hu")
+    headers = auth_headers(body)
+
+    assert client.get("/groups/by-subject?name=X&limit=0", headers=headers).status_code == 400
+    assert client.get("/groups/by-subject?name=X&limit=abc", headers=headers).status_code == 400
+    assert client.get("/groups/by-subject?name=X&cursor=%%%", headers=headers).status_code == 400
+
+
+def test_groups_search_recommends_across_pages(client):
+    seed_groups("Jatekelmelet", 3, 1, "futás")
+    best = seed_groups("Jatekelmelet2", 1, 2, "zene")[0]
+    body = register(client, "acrosspages@elte.hu", ["zene"])
+    headers = auth_headers(body)
+
+    first = client.get("/groups/search?q=Jatekelmelet&limit=2", headers=headers).get_json()
+    assert [g["name"] for g in first["all_groups"]] == [
+        "Jatekelmelet Study Group #1", "Jatekelmelet Study Group #2"
+    ]
+    assert first["recommended_group"]["id"] == best.id
+    assert first["recommended_group"]["same_interest_members"] == 2
+
+    rest = client.get(
+        f"/groups/search?q=Jatekelmelet&limit=2&cursor={first['next_cursor']}", headers=headers
+    ).get_json()
+    assert [g["name"] for g in rest["all_groups"]] == [
+        "Jatekelmelet Study Group #3", "Jatekelmelet2 Study Group #1"
+    ]
+
+    # Az első kérés által létrehozott üres csoport ID szerint az utolsó lapra kerül
+    last = client.get(
+        f"/groups/search?q=Jatekelmelet&limit=2&cursor={rest['next_cursor']}", headers=headers
+    ).get_json()
+    assert [g["name"] for g in last["all_groups"]] == ["Jatekelmelet Study Group #4"]
+    assert last["next_cursor"] is None
+
+
+def test_my_groups_single_query_and_conditional_get(client):
+    groups = seed_groups("Szamelmelet", 3, 0, "")
+    body = register(client, "mygroups@elte.hu")
+    headers = auth_headers(body)
+    client.post("/groups/join", json={"group_id": groups[0].id}, headers=headers)
+
+    with count_queries() as queries:
+        res = client.get("/groups/my-groups", headers=headers)
+    assert res.status_code == 200
+    assert [g["id"] for g in res.get_json()["groups"]] == [groups[0].id]
+    assert len(queries) == 2
+    etag = res.headers["ETag"]
+
+    with count_queries() as queries:
+        cached = client.get("/groups/my-groups", headers={**headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.data == b""
+    assert len(queries) == 1
+
+    client.delete(f"/groups/{groups[0].id}/leave", headers=headers)
+    changed = client.get("/groups/my-groups", headers={**headers, "If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.get_json()["groups"] == []
+    assert changed.headers["ETag"] != etag
+
+
+def test_group_members_projection_pagination_and_query_count(client):
+    small_id = seed_groups("Ergonomia", 1, 2, "zene")[0].id
+    large_id = seed_groups("Robotika", 1, 20, "zene")[0].id
+    body = register(client, "members@elte.hu")
+    headers = auth_headers(body)
+
+    with count_queries() as small_queries:
+        small_res = client.get(f"/groups/{small_id}/members", headers=headers)
+    with count_queries() as large_queries:
+        large_res = client.get(f"/groups/{large_id}/members", headers=headers)
+
+    assert len(small_res.get_json()["members"]) == 2
+    assert len(large_res.get_json()["members"]) == 20
+    assert set(large_res.get_json()["members"][0]) == {"user_id", "name", "email", "major"}
+    assert len(small_queries) == len(large_queries) == 2
+    assert not any("password_hash" in q or "hobbies" in q for q in large_queries)
+
+    seen = []
+    cursor = None
+    while True:
+        url = f"/groups/{large_id}/members?limit=8&fields=email"
+        if cursor:
+            url += f"&cursor={cursor}"
+        data = client.get(url, headers=headers).get_json()
+        assert all(set(m) == {"user_id", "email"} for m in data["members"])
+        seen.extend(m["user_id"] for m in data["members"])
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+    assert seen == sorted(seen) and len(seen) == 20
+
+    assert client.get(f"/groups/{large_id}/members?fields=password_hash", headers=headers).status_code == 400
+    assert client.get("/groups/999999/members", headers=headers).status_code == 404
@@ -0,0 +1,44 @@
+from identity_map import load_group, load_user, request_identity_map, user_group_ids
+from models import db, User, Group, GroupMember
+from conftest import auth_headers, count_queries, register
+
+
+def test_entities_load_at_most_once_per_request(app):
+    user = User(email="memo@elte.hu", password_hash="x", major="Informatika")
+    db.session.add(user)
+    db.session.flush()
+    group = Group(name="Memo group", subject="Memo", creator_id=user.id)
+    db.session.add(group)
+    db.session.flush()
+    db.session.add(GroupMember(group_id=group.id, user_id=user.id))
+    db.session.commit()
+    user_id, group_id = user.id, group.id
+    db.session.expunge_all()
+
+    with app.test_request_context():
+        with count_queries() as queries:
+            for _ in range(2):
+                assert load_user(user_id).email == "memo@elte.hu"
+                assert load_group(999) is None  # a hiányzó sort is megjegyzi
+                assert user_group_ids(user_id) == {group_id}
+        assert len(queries) == 3
+        assert request_identity_map().avoided == 3
+
+
+def test_avoided_lookups_reported_in_debug_header(client, app):
+    app.config["IDENTITY_MAP_DEBUG"] = True
+    body = register(client, "header@elte.hu")
+    group = Group(name="Header group", subject="Header", subject_key="header", creator_id=body["user"]["id"])
+    db.session.add(group)
+    db.session.commit()
+
+    # A join a usert a hisztogramhoz és az új token claim-jeihez is betölti
+    res = client.post("/groups/join", json={"group_id": group.id},
+                      headers=auth_headers(body))
+    assert res.status_code == 201
+    assert int(res.headers["X-Identity-Map-Avoided"]) >= 1
+
+    app.config["IDENTITY_MAP_DEBUG"] = False
+    res = client.post("/groups/join", json={"group_id": group.id},
+                      headers=auth_headers(body))
+    assert "X-Identity-Map-Avoided" not in res.headers
@@ -0,0 +1,72 @@
+import jwt
+
+from config import Config
+from models import db, Group
+from conftest import auth_headers, count_queries, register
+
+
+def open_group():
+    group = Group(name="Claims group", subject="Claims", subject_key="claims", creator_id=1)
+    db.session.add(group)
+    db.session.commit()
+    return group.id
+
+
+def claims_of(token):
+    return jwt.decode(token, Config.SECRET_KEY, algorithms=["HS256"])
+
+
+def test_join_reissues_token_with_membership_claims(client):
+    body = register(client, "claims@elte.hu")
+    group_id = open_group()
+
+    res = client.post("/groups/join", json={"group_id": group_id},
+                      headers=auth_headers(body))
+    token = res.get_json()["token"]
+    assert claims_of(token)["groups"] == [group_id]
+
+    headers = auth_headers(token)
+    client.get(f"/groups/{group_id}/events", headers=headers)  # verzió cache feltöltése
+    with count_queries() as queries:
+        assert client.get(f"/groups/{group_id}/events", headers=headers).status_code == 200
+    assert not any("FROM group_members" in q for q in queries)
+
+
+def test_stale_claims_fall_back_to_db_after_leave(client, app):
+    body = register(client, "leaver@elte.hu")
+    group_id = open_group()
+    joined = client.post("/groups/join", json={"group_id": group_id},
+                         headers=auth_headers(body)).get_json()["token"]
+    headers = auth_headers(joined)
+    assert client.get(f"/groups/{group_id}/events", headers=headers).status_code == 200
+
+    left = client.delete(f"/groups/{group_id}/leave", headers=headers).get_json()["token"]
+    assert claims_of(left)["groups"] == []
+    # A régi token még a tagságot állítja, de a verziója elavult
+    assert client.get(f"/groups/{group_id}/events", headers=headers).status_code == 403
+
+    # Egy a leave commitja előtt olvasott régi verzió sem írhatja vissza a cache-t
+    versions = app.extensions["membership_versions"]
+    assert versions.remember(claims_of(joined)["user_id"], claims_of(joined)["mv"]) == claims_of(left)["mv"]
+    assert client.get(f"/groups/{group_id}/events", headers=headers).status_code == 403
+
+
+def test_membership_version_ttl_comes_from_config(app):
+    assert app.extensions["membership_versions"].ttl == app.config["MEMBERSHIP_VERSION_TTL"]
+
+
+def test_refresh_token_issues_current_claims(client):
+    body = register(client, "refresh@elte.hu")
+    group_id = open_group()
+    client.post("/groups/join", json={"group_id": group_id},
+                headers=auth_headers(body))
+
+    res = client.post("/token/refresh", json={"refresh_token": body["refresh_token"]})
+    assert res.status_code == 200
+    assert claims_of(res.get_json()["token"])["groups"] == [group_id]
+
+    # A két token típus nem cserélhető fel
+    assert client.get("/groups/my-groups",
+                      headers=auth_headers(body["refresh_token"])).status_code == 401
+    assert client.get(f"/events/stream?token={body['refresh_token']}").status_code == 401
+    assert client.post("/token/refresh", json={"refresh_token": body["token"]}).status_code == 401
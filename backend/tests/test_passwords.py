@@ -0,0 +1,39 @@
+from models import db, User
+from passwords import PasswordHasher, hash_password, hash_rounds
+
+
+def test_pool_hashes_and_checks_off_thread():
+    hasher = PasswordHasher(rounds=4, workers=1)
+    password_hash = hasher.hash("titok123")
+    assert hash_rounds(password_hash) == 4
+    assert hasher.check("titok123", password_hash)
+    assert not hasher.check("rossz", password_hash)
+    assert not hasher.check("titok123", "x")  # nem bcrypt hash
+    assert hasher.pending() == 0
+
+
+def test_saturated_pool_answers_503_with_retry_after(client, app):
+    app.extensions["password_hasher"].max_pending = 0
+
+    res = client.post("/register", json={
+        "email": "burst@elte.hu",
+        "password": "password123",
+        "major": "Informatika"
+    })
+    assert res.status_code == 503
+    assert res.headers["Retry-After"] == "2"
+    assert User.query.filter_by(email="burst@elte.hu").first() is None
+
+
+def test_login_rehashes_with_configured_cost(client, app):
+    user = User(email="old@elte.hu", password_hash=hash_password("password123", 4), major="Informatika")
+    db.session.add(user)
+    db.session.commit()
+    app.extensions["password_hasher"].rounds = 5
+
+    res = client.post("/login", json={"email": "old@elte.hu", "password": "password123"})
+    assert res.status_code == 200
+    assert hash_rounds(db.session.get(User, user.id).password_hash) == 5
+
+    res = client.post("/login", json={"email": "old@elte.hu", "password": "password123"})
+    assert res.status_code == 200
@@ -0,0 +1,377 @@
+from datetime import datetime, timedelta
+from models import db, User, Group, GroupMember, Post, Comment, PostAttachment, PostView, GroupReadMark
+from counters import assign_post_seq, reconcile_comment_counts
+from conftest import auth_headers, count_queries, register
+
+
+def member_headers(client, email="poster@elte.hu"):
+    body = register(client, email)
+    group = Group(name=f"Forum group {email}", subject="Forum", creator_id=body["user"]["id"], member_count=1)
+    db.session.add(group)
+    db.session.flush()
+    db.session.add(GroupMember(group_id=group.id, user_id=body["user"]["id"]))
+    db.session.commit()
+    return auth_headers(body), group.id, body["user"]["id"]
+
+
+def seed_posts(group_id, author_id, count, comments_per_post=0, same_timestamp=False):
+    base = datetime(2026, 1, 1, 12, 0, 0)
+    posts = []
+    for i in range(count):
+        created = base if same_timestamp else base + timedelta(minutes=i)
+        post = Post(title=f"Post {i}", content="...", group_id=group_id, author_id=author_id,
+                    created_at=created, updated_at=created, comment_count=comments_per_post)
+        db.session.add(post)
+        db.session.flush()
+        assign_post_seq(post.id)
+        for j in range(comments_per_post):
+            db.session.add(Comment(comment=f"c{j}", post_id=post.id, author_id=author_id))
+        db.session.add(PostAttachment(post_id=post.id, filename="a.pdf", file_url="/uploads/posts/a.pdf"))
+        posts.append(post)
+    db.session.commit()
+    return posts
+
+
+def test_list_posts_query_count_does_not_grow(client):
+    headers, small_group, user_id = member_headers(client, "small@elte.hu")
+    _, large_group, _ = member_headers(client, "large@elte.hu")
+    seed_posts(small_group, user_id, 2, comments_per_post=1)
+    seed_posts(large_group, user_id, 40, comments_per_post=3)
+
+    with count_queries() as small_queries:
+        client.get(f"/groups/{small_group}/posts", headers=headers)
+    with count_queries() as large_queries:
+        res = client.get(f"/groups/{large_group}/posts", headers=headers)
+
+    posts = res.get_json()["posts"]
+    assert len(posts) == 40
+    assert all(p["comment_count"] == 3 for p in posts)
+    assert all(len(p["attachments"]) == 1 for p in posts)
+    assert len(small_queries) == len(large_queries)
+
+
+def test_list_posts_keyset_pagination_is_stable(client):
+    headers, group_id, user_id = member_headers(client)
+    # Azonos created_at mellett az id dönt
+    posts = seed_posts(group_id, user_id, 7, same_timestamp=True)
+
+    seen = []
+    cursor = None
+    while True:
+        url = f"/groups/{group_id}/posts?limit=3"
+        if cursor:
+            url += f"&cursor={cursor}"
+        data = client.get(url, headers=headers).get_json()
+        seen.extend(p["id"] for p in data["posts"])
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+
+    assert seen == sorted((p.id for p in posts), reverse=True)
+
+
+def test_list_posts_rejects_bad_cursor(client):
+    headers, group_id, _ = member_headers(client)
+    res = client.get(f"/groups/{group_id}/posts?cursor=bm9wZQ", headers=headers)
+    assert res.status_code == 400
+
+
+def test_comment_count_follows_comment_writes(client):
+    headers, group_id, user_id = member_headers(client)
+    post_id = seed_posts(group_id, user_id, 1)[0].id
+
+    first = client.post(f"/posts/{post_id}/comments", json={"content": "egy"}, headers=headers)
+    client.post(f"/posts/{post_id}/comments", json={"content": "kettő"}, headers=headers)
+    comment_id = first.get_json()["comment"]["id"]
+    assert client.delete(f"/comments/{comment_id}", headers=headers).status_code == 200
+    assert client.delete(f"/comments/{comment_id}", headers=headers).status_code == 404
+
+    with count_queries() as queries:
+        posts = client.get(f"/groups/{group_id}/posts", headers=headers).get_json()["posts"]
+    assert posts[0]["comment_count"] == 1
+    assert not any("count(" in q.lower() for q in queries)
+
+
+def test_reconcile_comment_counts_fixes_drift(app):
+    user = User(email="reconcile@elte.hu", password_hash="x", major="Informatika")
+    db.session.add(user)
+    db.session.flush()
+    group = Group(name="Reconcile group", subject="Forum", creator_id=user.id)
+    db.session.add(group)
+    db.session.flush()
+    post = seed_posts(group.id, user.id, 1, comments_per_post=2)[0]
+    post.comment_count = 9
+    db.session.commit()
+
+    assert reconcile_comment_counts() == 1
+    assert db.session.get(Post, post.id).comment_count == 2
+
+
+def test_forum_lists_answer_304_until_group_content_changes(client):
+    headers, group_id, user_id = member_headers(client)
+    post_id = seed_posts(group_id, user_id, 2, comments_per_post=1)[0].id
+    urls = [f"/groups/{group_id}/posts", f"/posts/{post_id}/comments", f"/groups/{group_id}/events"]
+
+    etags = {}
+    for url in urls:
+        res = client.get(url, headers=headers)
+        assert res.status_code == 200
+        etags[url] = res.headers["ETag"]
+        assert not etags[url].startswith("W/")
+
+    with count_queries() as queries:
+        cached = client.get(urls[0], headers={**headers, "If-None-Match": etags[urls[0]]})
+    assert cached.status_code == 304
+    assert not any("FROM posts" in q for q in queries)
+
+    for url in urls[1:]:
+        assert client.get(url, headers={**headers, "If-None-Match": etags[url]}).status_code == 304
+
+    # Egy komment az egész csoport tartalomverzióját lépteti
+    client.post(f"/posts/{post_id}/comments", json={"content": "új"}, headers=headers)
+    for url in urls:
+        changed = client.get(url, headers={**headers, "If-None-Match": etags[url]})
+        assert changed.status_code == 200
+        assert changed.headers["ETag"] != etags[url]
+
+
+def test_list_posts_without_paging_params_returns_all(client):
+    headers, group_id, user_id = member_headers(client)
+    seed_posts(group_id, user_id, 60)
+
+    # A lapozást nem ismerő frontend a teljes fórumot kapja
+    body = client.get(f"/groups/{group_id}/posts", headers=headers).get_json()
+    assert len(body["posts"]) == 60
+    assert body["next_cursor"] is None
+
+    paged = client.get(f"/groups/{group_id}/posts?limit=50", headers=headers).get_json()
+    assert len(paged["posts"]) == 50
+    assert paged["next_cursor"] is not None
+
+
+def test_forum_etag_differs_per_page(client):
+    headers, group_id, user_id = member_headers(client)
+    seed_posts(group_id, user_id, 4)
+
+    first = client.get(f"/groups/{group_id}/posts?limit=2", headers=headers)
+    cursor = first.get_json()["next_cursor"]
+    second = client.get(f"/groups/{group_id}/posts?limit=2&cursor={cursor}",
+                        headers={**headers, "If-None-Match": first.headers["ETag"]})
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
+
+
+def test_list_posts_served_from_response_cache_until_write(client, app):
+    headers, group_id, user_id = member_headers(client)
+    seed_posts(group_id, user_id, 3, comments_per_post=1)
+    cache = app.extensions["response_cache"]
+
+    first = client.get(f"/groups/{group_id}/posts", headers=headers)
+    with count_queries() as queries:
+        second = client.get(f"/groups/{group_id}/posts", headers=headers)
+    assert second.get_json() == first.get_json()
+    assert not any("FROM posts" in q for q in queries)
+    assert cache.stats()["hits"] == 1
+
+    client.post(f"/groups/{group_id}/posts", json={"title": "Új", "content": "..."}, headers=headers)
+    assert cache.stats()["size"] == 0
+    third = client.get(f"/groups/{group_id}/posts", headers=headers).get_json()
+    assert len(third["posts"]) == 4
+
+
+def test_delta_sync_returns_changes_and_tombstones(client):
+    headers, group_id, user_id = member_headers(client)
+    edited_id, deleted_id, untouched_id = (p.id for p in seed_posts(group_id, user_id, 3))
+
+    cursor = client.get(f"/groups/{group_id}/posts", headers=headers).get_json()["sync_cursor"]
+
+    created = client.post(f"/groups/{group_id}/posts", json={"title": "Új", "content": "..."}, headers=headers)
+    created_id = created.get_json()["post"]["id"]
+    client.put(f"/posts/{edited_id}", json={"title": "Javított", "content": "..."}, headers=headers)
+    client.delete(f"/posts/{deleted_id}", headers=headers)
+
+    delta = client.get(f"/groups/{group_id}/posts?since={cursor}", headers=headers).get_json()
+    assert {p["id"] for p in delta["posts"]} == {created_id, edited_id}
+    assert [t["id"] for t in delta["tombstones"]] == [deleted_id]
+    assert untouched_id not in {p["id"] for p in delta["posts"]}
+    assert delta["has_more"] is False
+
+    # Naprakész kliens: üres válasz, a kurzor helyben marad
+    empty = client.get(f"/groups/{group_id}/posts?since={delta['sync_cursor']}", headers=headers).get_json()
+    assert empty["posts"] == [] and empty["tombstones"] == []
+    assert empty["sync_cursor"] == delta["sync_cursor"]
+
+    # Egy új komment a poszt kommentszámát változtatja, ezért a poszt újra jön
+    client.post(f"/posts/{untouched_id}/comments", json={"content": "hé"}, headers=headers)
+    after_comment = client.get(f"/groups/{group_id}/posts?since={delta['sync_cursor']}", headers=headers).get_json()
+    assert [(p["id"], p["comment_count"]) for p in after_comment["posts"]] == [(untouched_id, 1)]
+
+
+def test_delta_sync_pages_with_has_more(client):
+    headers, group_id, _ = member_headers(client)
+    cursor = client.get(f"/groups/{group_id}/posts", headers=headers).get_json()["sync_cursor"]
+    for i in range(5):
+        client.post(f"/groups/{group_id}/posts", json={"title": f"P{i}", "content": "..."}, headers=headers)
+
+    seen = []
+    while True:
+        page = client.get(f"/groups/{group_id}/posts?since={cursor}&limit=2", headers=headers).get_json()
+        seen.extend(p["title"] for p in page["posts"])
+        cursor = page["sync_cursor"]
+        if not page["has_more"]:
+            break
+    assert seen == [f"P{i}" for i in range(5)]
+
+    assert client.get(f"/groups/{group_id}/posts?since=bm9wZQ", headers=headers).status_code == 400
+
+
+def test_unread_counts_single_query_and_rules(client):
+    headers, first_group, reader_id = member_headers(client, "reader@elte.hu")
+    _, second_group, author_id = member_headers(client, "author@elte.hu")
+    GroupMember.query.filter_by(group_id=first_group, user_id=reader_id).update(
+        {GroupMember.joined_at: datetime(2026, 1, 1)}
+    )
+    db.session.add(GroupMember(group_id=first_group, user_id=author_id))
+    db.session.add(GroupMember(group_id=second_group, user_id=reader_id, joined_at=datetime(2026, 1, 1, 12, 2)))
+    db.session.commit()
+
+    # Az első csoportban 4 idegen poszt: 1 megnézett, 1 törölt
+    posts = seed_posts(first_group, author_id, 4)
+    db.session.add(PostView(user_id=reader_id, post_id=posts[0].id))
+    posts[1].deleted_at = datetime(2026, 1, 2)
+    seed_posts(first_group, reader_id, 2)  # saját posztok nem számítanak
+    # A második csoportban csak a csatlakozás utániak (12:02-től) számítanak
+    seed_posts(second_group, author_id, 5)
+    db.session.commit()
+
+    with count_queries() as queries:
+        res = client.get("/groups/unread-counts", headers=headers)
+    assert res.get_json()["unread_counts"] == {str(first_group): 2, str(second_group): 3}
+    # Tagságok + egyetlen csoportosított számolás; utána a számláló store-ból
+    assert len([q for q in queries if "FROM" in q]) == 2
+
+    with count_queries() as queries:
+        res = client.get("/groups/unread-counts", headers=headers)
+    assert res.get_json()["unread_counts"] == {str(first_group): 2, str(second_group): 3}
+    assert len([q for q in queries if "FROM" in q]) == 1
+
+
+def test_mark_posts_read_moves_watermark(client):
+    headers, group_id, reader_id = member_headers(client, "reader@elte.hu")
+    other_headers, _, author_id = member_headers(client, "author@elte.hu")
+    db.session.add(GroupMember(group_id=group_id, user_id=author_id))
+    GroupMember.query.filter_by(group_id=group_id, user_id=reader_id).update(
+        {GroupMember.joined_at: datetime(2026, 1, 1)}
+    )
+    posts = seed_posts(group_id, author_id, 30)
+    db.session.add(PostView(user_id=reader_id, post_id=posts[0].id))
+    db.session.commit()
+
+    with count_queries() as queries:
+        res = client.post(f"/groups/{group_id}/mark-posts-read", headers=headers)
+    assert res.get_json()["marked_count"] == 29
+    assert len([q for q in queries if "post_views" in q or "group_read_marks" in q]) <= 5
+    assert not any(q.startswith("INSERT INTO post_views") for q in queries)
+
+    mark = GroupReadMark.query.filter_by(user_id=reader_id, group_id=group_id).one()
+    db.session.refresh(posts[-1])
+    assert mark.last_read_seq == posts[-1].group_seq == 30
+    assert PostView.query.filter_by(user_id=reader_id).count() == 0
+
+    counts = client.get("/groups/unread-counts", headers=headers).get_json()["unread_counts"]
+    assert counts[str(group_id)] == 0
+
+    client.post(f"/groups/{group_id}/posts", json={"title": "Új", "content": "..."}, headers=other_headers)
+    counts = client.get("/groups/unread-counts", headers=headers).get_json()["unread_counts"]
+    assert counts[str(group_id)] == 1
+
+    res = client.post(f"/groups/{group_id}/mark-posts-read", headers=headers)
+    assert res.get_json()["marked_count"] == 1
+    assert GroupReadMark.query.filter_by(user_id=reader_id).count() == 1
+
+
+def test_post_committed_after_mark_read_stays_unread(client):
+    headers, group_id, reader_id = member_headers(client, "reader@elte.hu")
+    _, _, author_id = member_headers(client, "author@elte.hu")
+    db.session.add(GroupMember(group_id=group_id, user_id=author_id))
+    GroupMember.query.filter_by(group_id=group_id, user_id=reader_id).update(
+        {GroupMember.joined_at: datetime(2026, 1, 1)}
+    )
+    db.session.commit()
+    seed_posts(group_id, author_id, 2)
+
+    # A késve commitoló poszt created_at-je korábbi a vízjelnél, a sorszáma viszont nagyobb
+    client.post(f"/groups/{group_id}/mark-posts-read", headers=headers)
+    late = Post(title="Késő", content="...", group_id=group_id, author_id=author_id,
+                created_at=datetime(2026, 1, 1, 11, 0), updated_at=datetime(2026, 1, 1, 11, 0))
+    db.session.add(late)
+    db.session.flush()
+    assign_post_seq(late.id)
+    db.session.commit()
+
+    counts = client.get("/groups/unread-counts", headers=headers).get_json()["unread_counts"]
+    assert counts[str(group_id)] == 1
+
+
+def test_concurrent_mark_posts_read_counts_each_post_once(tmp_path):
+    import threading
+    from app import create_app
+    from routes import create_jwt_token
+
+    concurrent_app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'mark-read.db'}",
+        "SQLALCHEMY_ENGINE_OPTIONS": {"connect_args": {"timeout": 60}},
+    })
+
+    with concurrent_app.app_context():
+        reader = User(email="tabs@elte.hu", password_hash="x", major="Informatika")
+        author = User(email="tabs-author@elte.hu", password_hash="x", major="Informatika")
+        db.session.add_all([reader, author])
+        db.session.flush()
+        group = Group(name="Tabs group", subject="Forum", creator_id=author.id, member_count=2)
+        db.session.add(group)
+        db.session.flush()
+        db.session.add_all([
+            GroupMember(group_id=group.id, user_id=reader.id, joined_at=datetime(2026, 1, 1)),
+            GroupMember(group_id=group.id, user_id=author.id, joined_at=datetime(2026, 1, 1)),
+        ])
+        seed_posts(group.id, author.id, 25)
+        group_id, token = group.id, create_jwt_token(reader.id)
+        db.session.remove()
+
+    tabs = 8
+    barrier = threading.Barrier(tabs)
+    marked = []
+
+    def mark_read():
+        client = concurrent_app.test_client()
+        barrier.wait()
+        res = client.post(f"/groups/{group_id}/mark-posts-read",
+                          headers=auth_headers(token))
+        marked.append(res.get_json()["marked_count"])
+
+    threads = [threading.Thread(target=mark_read) for _ in range(tabs)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(marked) == [0] * (tabs - 1) + [25]
+    with concurrent_app.app_context():
+        assert GroupReadMark.query.count() == 1
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_read_mark_upsert_takes_exclusive_lock_on_mysql(app, monkeypatch):
+    from types import SimpleNamespace
+    from sqlalchemy.dialects import mysql
+    from db_utils import insert_or_lock
+
+    # INSERT IGNORE ütközéskor csak megosztott zárat ad, ami a FOR UPDATE-tel deadlockol
+    monkeypatch.setattr(db.session, "get_bind", lambda: SimpleNamespace(dialect=mysql.dialect()))
+    stmt = insert_or_lock(GroupReadMark.__table__, {"user_id": 1, "group_id": 2}, ["user_id", "group_id"])
+    sql = str(stmt.compile(dialect=mysql.dialect()))
+    assert "ON DUPLICATE KEY UPDATE" in sql
+    assert "IGNORE" not in sql
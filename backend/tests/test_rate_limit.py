@@ -0,0 +1,97 @@
+from models import db
+from rate_limit import MemoryBucketStore, PoolWaitMonitor, parse_budgets, route_class
+from conftest import FakeClock, auth_headers, register
+
+
+def test_bucket_refills_over_time():
+    clock = FakeClock()
+    store = MemoryBucketStore(clock=clock)
+    assert store.take("k", 2, 0.5) == (True, 0)
+    assert store.take("k", 2, 0.5) == (True, 0)
+    assert store.take("k", 2, 0.5) == (False, 2.0)
+
+    clock.now = 2
+    assert store.take("k", 2, 0.5) == (True, 0)
+    assert store.take("other", 2, 0.5) == (True, 0)
+
+
+def test_budgets_and_route_classes():
+    assert parse_budgets("search=30/0.5, write=60/1") == {"search": (30.0, 0.5), "write": (60.0, 1.0)}
+    assert route_class("search_groups", "GET") == "search"
+    assert route_class("get_unread_post_counts", "GET") == "poll"
+    assert route_class("create_post", "POST") == "write"
+    assert route_class("list_posts", "GET") == "read"
+
+
+def test_search_budget_is_per_user(client, app):
+    limiter = app.extensions["rate_limiter"]
+    limiter.user_budgets["search"] = (2, 0.01)
+    first = auth_headers(register(client, "first@elte.hu"))
+    second = auth_headers(register(client, "second@elte.hu"))
+
+    for _ in range(2):
+        assert client.get("/groups/search?q=Analízis", headers=first).status_code in (200, 201)
+    res = client.get("/groups/search?q=Analízis", headers=first)
+    assert res.status_code == 429
+    assert int(res.headers["Retry-After"]) >= 1
+
+    # Más user és más route osztály saját vödröt kap
+    assert client.get("/groups/search?q=Analízis", headers=second).status_code in (200, 201)
+    assert client.get("/groups/my-groups", headers=first).status_code == 200
+
+
+def test_anonymous_requests_are_limited_per_ip(client, app):
+    app.extensions["rate_limiter"].ip_budgets["write"] = (1, 0.01)
+    assert client.post("/login", json={"email": "nincs@elte.hu", "password": "x"}).status_code == 401
+    assert client.post("/login", json={"email": "nincs@elte.hu", "password": "x"}).status_code == 429
+
+
+def test_ip_buckets_use_forwarded_client_address(client, app):
+    app.extensions["rate_limiter"].ip_budgets["write"] = (1, 0.01)
+    login = {"email": "nincs@elte.hu", "password": "x"}
+
+    # A proxy mögött minden kérés ugyanarról a címről jön; a vödör a kliens címét kapja
+    assert client.post("/login", json=login, headers={"X-Forwarded-For": "203.0.113.1"}).status_code == 401
+    assert client.post("/login", json=login, headers={"X-Forwarded-For": "203.0.113.2"}).status_code == 401
+    # A kliens által hamisított, a proxy előtti elemek nem számítanak
+    spoofed = {"X-Forwarded-For": "198.51.100.7, 203.0.113.1"}
+    assert client.post("/login", json=login, headers=spoofed).status_code == 429
+
+
+def test_slow_pool_checkout_sheds_reads_but_not_writes(client, app):
+    headers = auth_headers(register(client, "shed@elte.hu"))
+    limiter = app.extensions["rate_limiter"]
+    limiter.shed_wait_ms = 250
+    limiter.pool_monitor = PoolWaitMonitor()
+    limiter.pool_monitor.record(1000)
+
+    res = client.get("/groups/my-groups", headers=headers)
+    assert res.status_code == 503
+    assert res.headers["Retry-After"] == "1"
+    assert client.post("/groups/join", json={"group_id": 999}, headers=headers).status_code == 404
+
+
+def test_pool_wait_measured_only_when_route_uses_db(client, app):
+    limiter = app.extensions["rate_limiter"]
+    limiter.shed_wait_ms = 250
+    samples = []
+    limiter.pool_monitor.record = samples.append
+    db.session.remove()
+
+    # DB-t nem használó route-hoz nem veszünk ki kapcsolatot a poolból
+    assert client.get("/test-ui").status_code == 200
+    assert samples == []
+
+    register(client, "pool@elte.hu")
+    assert len(samples) >= 1
+
+
+def test_pool_wait_average_expires():
+    clock = FakeClock()
+    monitor = PoolWaitMonitor(window=10, clock=clock)
+    monitor.record(500)
+    monitor.record(0)
+    assert monitor.average() == 400
+
+    clock.now = 11
+    assert monitor.average() == 0
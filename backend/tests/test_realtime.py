@@ -0,0 +1,121 @@
+import json
+import threading
+import time
+
+from models import db, Post
+from realtime import EventBroker
+from conftest import auth_headers, register, shared_group
+
+
+def parse(chunk):
+    lines = chunk.decode().strip().splitlines()
+    return lines[0].removeprefix("event: "), json.loads(lines[1].removeprefix("data: "))
+
+
+def test_broker_delivers_only_to_target_users():
+    broker = EventBroker(max_events=2)
+    alice = broker.subscribe(1)
+    bob = broker.subscribe(2)
+
+    broker.publish([1], "unread", {"group_id": 5, "delta": 1})
+    assert alice.get(timeout=0) == ("unread", {"group_id": 5, "delta": 1})
+    assert bob.get(timeout=0) is None
+
+    broker.unsubscribe(alice)
+    broker.publish([1], "unread", {"group_id": 5, "delta": 1})
+    assert alice.get(timeout=0) is None
+    assert broker.connection_count() == 1
+
+
+def test_slow_subscriber_overflows_instead_of_blocking():
+    broker = EventBroker(max_events=2)
+    subscription = broker.subscribe(1)
+    for _ in range(3):
+        broker.publish([1], "unread", {"group_id": 5, "delta": 1})
+    assert subscription.overflowed
+
+    subscription.reset()
+    assert not subscription.overflowed
+    assert subscription.get(timeout=0) is None
+
+
+def test_event_stream_pushes_new_posts_to_other_members(client, app):
+    app.config["SSE_KEEPALIVE_SECONDS"] = 0.01
+    reader = register(client, "reader@elte.hu")
+    author = register(client, "author@elte.hu")
+    group_id = shared_group(author["user"]["id"], reader["user"]["id"], name="SSE group")
+
+    res = client.get(f"/events/stream?token={reader['token']}", buffered=False)
+    assert res.status_code == 200
+    assert res.mimetype == "text/event-stream"
+    chunks = iter(res.response)
+    assert parse(next(chunks)) == ("unread_counts", {"unread_counts": {str(group_id): 0}})
+    assert next(chunks) == b": keepalive\n\n"
+
+    client.post(f"/groups/{group_id}/posts", json={"title": "Élő", "content": "..."},
+                headers=auth_headers(author))
+    assert parse(next(chunks)) == ("unread", {"group_id": group_id, "delta": 1})
+    event, data = parse(next(chunks))
+    assert event == "new_post" and data["title"] == "Élő"
+
+    broker = app.extensions["event_broker"]
+    assert broker.connection_count() == 1
+    res.close()
+    assert broker.connection_count() == 0
+
+
+def test_event_stream_requires_token(client):
+    assert client.get("/events/stream").status_code == 401
+    assert client.get("/events/stream?token=nope").status_code == 401
+
+
+def test_long_poll_returns_immediately_on_stale_version(client):
+    reader = register(client, "reader@elte.hu")
+    reader_id = reader["user"]["id"]
+    author_id = register(client, "author@elte.hu")["user"]["id"]
+    shared_group(reader_id, author_id)
+    headers = auth_headers(reader)
+
+    version = client.get("/groups/unread-counts", headers=headers).get_json()["version"]
+    start = time.monotonic()
+    res = client.get(f"/groups/unread-counts?wait=5&version={version + 1}", headers=headers)
+    assert time.monotonic() - start < 1
+    assert res.get_json()["version"] == version
+
+
+def test_long_poll_times_out_without_changes(client, app):
+    headers = auth_headers(register(client, "reader@elte.hu"))
+    version = client.get("/groups/unread-counts", headers=headers).get_json()["version"]
+
+    start = time.monotonic()
+    res = client.get(f"/groups/unread-counts?wait=0.2&version={version}", headers=headers)
+    assert time.monotonic() - start >= 0.2
+    assert res.get_json()["version"] == version
+    assert app.extensions["event_broker"].connection_count() == 0
+
+
+def test_long_poll_wakes_up_when_counts_change(client, app):
+    reader = register(client, "reader@elte.hu")
+    reader_id = reader["user"]["id"]
+    author_id = register(client, "author@elte.hu")["user"]["id"]
+    group_id = shared_group(reader_id, author_id)
+    headers = auth_headers(reader)
+    version = client.get("/groups/unread-counts", headers=headers).get_json()["version"]
+
+    def write_post():
+        with app.app_context():
+            db.session.add(Post(title="Új", content="...", group_id=group_id, author_id=author_id))
+            db.session.commit()
+            app.extensions["unread_counters"].incr([reader_id], group_id, 1)
+            app.extensions["event_broker"].publish([reader_id], "unread", {"group_id": group_id, "delta": 1})
+
+    timer = threading.Timer(0.1, write_post)
+    timer.start()
+    start = time.monotonic()
+    res = client.get(f"/groups/unread-counts?wait=5&version={version}", headers=headers)
+    timer.join()
+
+    assert time.monotonic() - start < 4
+    body = res.get_json()
+    assert body["unread_counts"] == {str(group_id): 1}
+    assert body["version"] != version
@@ -0,0 +1,46 @@
+from response_cache import LocalResponseCache
+from conftest import FakeClock
+
+
+def test_lru_evicts_least_recently_used_entry():
+    cache = LocalResponseCache(max_entries=2, ttl=60)
+    cache.set(1, 0, b"a")
+    cache.set(2, 0, b"b")
+    assert cache.get(1, 0) == b"a"  # az 1-es lesz a legfrissebb
+
+    cache.set(3, 0, b"c")
+    assert cache.get(2, 0) is None
+    assert cache.get(1, 0) == b"a"
+    assert cache.stats() == {"hits": 2, "misses": 1, "evictions": 1, "size": 2}
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = LocalResponseCache(max_entries=10, ttl=30, clock=clock)
+    cache.set(1, 0, b"a")
+
+    clock.now = 29
+    assert cache.get(1, 0) == b"a"
+    clock.now = 30
+    assert cache.get(1, 0) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_version_and_variant_are_part_of_the_key():
+    cache = LocalResponseCache()
+    cache.set(1, 3, b"page-1", "limit=2")
+    assert cache.get(1, 4, "limit=2") is None
+    assert cache.get(1, 3, "") is None
+    assert cache.get(1, 3, "limit=2") == b"page-1"
+
+
+def test_invalidate_group_keeps_other_groups():
+    cache = LocalResponseCache()
+    cache.set(1, 0, b"a")
+    cache.set(1, 0, b"a2", "limit=2")
+    cache.set(2, 0, b"b")
+
+    cache.invalidate_group(1)
+    assert cache.get(1, 0) is None
+    assert cache.get(1, 0, "limit=2") is None
+    assert cache.get(2, 0) == b"b"
@@ -0,0 +1,63 @@
+from models import db, User, Group, SubjectTrigram
+from search import normalize_subject, reindex_subjects
+from conftest import auth_headers, register
+
+
+def seed_subjects(*subjects):
+    creator = User(email="subject-creator@elte.hu", password_hash="x", major="Informatika")
+    db.session.add(creator)
+    db.session.flush()
+    groups = [
+        Group(name=f"{subject} Study Group #1", subject=subject, creator_id=creator.id)
+        for subject in subjects
+    ]
+    db.session.add_all(groups)
+    db.session.commit()
+    return groups
+
+
+def searched_subjects(client, headers, query):
+    data = client.get(f"/groups/search?q={query}", headers=headers).get_json()
+    return {g["subject"] for g in data["all_groups"]}
+
+
+def test_normalize_subject_strips_accents_and_case():
+    assert normalize_subject("  Analízis   I. ") == "analizis i."
+    assert normalize_subject("Szoftvertechnológia ŐŰ") == "szoftvertechnologia ou"
+
+
+def test_groups_search_ignores_accents_and_case(client):
+    seed_subjects("Analízis I.", "Analízis II.", "Diszkrét matematika")
+    headers = auth_headers(register(client, "accent@elte.hu"))
+
+    assert searched_subjects(client, headers, "ANALIZIS") == {"Analízis I.", "Analízis II."}
+    assert searched_subjects(client, headers, "analízis ii") == {"Analízis II."}
+    assert searched_subjects(client, headers, "kret mat") == {"Diszkrét matematika"}
+
+
+def test_groups_search_short_query_uses_substring(client):
+    seed_subjects("Algebra", "Logika")
+    headers = auth_headers(register(client, "short@elte.hu"))
+
+    assert searched_subjects(client, headers, "gi") == {"Logika"}
+
+
+def test_subject_trigrams_follow_subject_changes(app):
+    group = seed_subjects("Fizika")[0]
+    group.subject = "Kémia"
+    db.session.commit()
+
+    grams = {t.trigram for t in SubjectTrigram.query.filter_by(group_id=group.id)}
+    assert group.subject_key == "kemia"
+    assert grams == {"kem", "emi", "mia"}
+
+
+def test_reindex_subjects_rebuilds_index(app):
+    group = seed_subjects("Operációs rendszerek")[0]
+    SubjectTrigram.query.delete()
+    db.session.query(Group).update({Group.subject_key: ""})
+    db.session.commit()
+
+    assert reindex_subjects() == 1
+    assert db.session.get(Group, group.id).subject_key == "operacios rendszerek"
+    assert SubjectTrigram.query.filter_by(group_id=group.id).count() > 0
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta, timezone
+
+import jwt
+
+import auth
+from auth import TokenCache, create_jwt_token
+from config import Config
+from conftest import FakeClock, auth_headers, register
+
+
+def test_cache_is_bounded_lru():
+    cache = TokenCache(max_entries=2)
+    exp = datetime.now(timezone.utc).timestamp() + 3600
+    cache.set("a", {"user_id": 1, "exp": exp})
+    cache.set("b", {"user_id": 2, "exp": exp})
+    assert cache.get("a")["user_id"] == 1  # az "a" lesz a legfrissebb
+
+    cache.set("c", {"user_id": 3, "exp": exp})
+    assert cache.get("b") is None
+    assert cache.get("a")["user_id"] == 1
+    assert cache.stats() == {"hits": 2, "misses": 1, "size": 2}
+
+
+def test_cached_token_expires_with_its_exp():
+    clock = FakeClock(1000)
+    cache = TokenCache(clock=clock)
+    cache.set("t", {"user_id": 1, "exp": 1030})
+
+    clock.now = 1029
+    assert cache.get("t") is not None
+    clock.now = 1030
+    assert cache.get("t") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_request_decodes_token_once_and_reuses_it(client, app, monkeypatch):
+    headers = auth_headers(register(client, "cache@elte.hu"))
+
+    decodes = []
+    original = auth.decode_jwt_token
+    monkeypatch.setattr(auth, "decode_jwt_token", lambda token: decodes.append(token) or original(token))
+
+    for _ in range(3):
+        assert client.get("/groups/my-groups", headers=headers).status_code == 200
+    assert len(decodes) == 1
+    assert app.extensions["token_cache"].stats()["hits"] == 2
+
+
+def test_expired_or_forged_tokens_are_rejected(client):
+    expired = jwt.encode({"user_id": 1, "exp": datetime.now(timezone.utc) - timedelta(seconds=1)},
+                         Config.SECRET_KEY, algorithm="HS256")
+    forged = create_jwt_token(1)[:-2] + "xx"
+
+    for token in (expired, forged, "invalid"):
+        res = client.get("/groups/my-groups", headers=auth_headers(token))
+        assert res.status_code == 401
+        assert res.get_json()["error"] == "Érvénytelen vagy lejárt token"
+    assert client.get("/groups/my-groups", headers={"Authorization": "Bearer"}).get_json()["error"] == "Hibás token"
@@ -0,0 +1,126 @@
+from datetime import datetime
+
+from models import db, Post
+from unread_counters import DictUnreadCounterStore, rebuild_unread_counters
+from conftest import FakeClock, auth_headers, register, shared_group
+
+
+def test_store_only_touches_known_entries():
+    store = DictUnreadCounterStore()
+    store.incr([1], 5, 1)
+    store.set_count(1, 5, 0)
+    assert store.get(1) is None
+
+    store.replace(1, {5: 2})
+    store.incr([1, 2], 5, 1)
+    store.incr([1], 6, 1)  # ismeretlen csoport mezője nem jön létre
+    assert store.get(1) == {5: 3}
+    store.incr([1], 5, -10)
+    assert store.get(1) == {5: 0}
+
+    store.forget([1], 5)
+    assert store.get(1) == {}
+    store.forget([1])
+    assert store.get(1) is None
+
+
+def test_store_entries_expire_after_ttl():
+    clock = FakeClock()
+    store = DictUnreadCounterStore(ttl=30, clock=clock)
+    store.replace(1, {5: 2})
+
+    clock.now = 29
+    assert store.get(1) == {5: 2}
+    clock.now = 30
+    assert store.get(1) is None
+
+
+def test_post_writes_update_counters_without_recount(client, app):
+    reader = register(client, "reader@elte.hu")
+    reader_headers, reader_id = auth_headers(reader), reader["user"]["id"]
+    author = register(client, "author@elte.hu")
+    author_headers, author_id = auth_headers(author), author["user"]["id"]
+    group_id = shared_group(reader_id, author_id)
+
+    assert client.get("/groups/unread-counts", headers=reader_headers).get_json()["unread_counts"] == {
+        str(group_id): 0
+    }
+
+    res = client.post(f"/groups/{group_id}/posts", json={"title": "Új", "content": "..."}, headers=author_headers)
+    post_id = res.get_json()["post"]["id"]
+    client.post(f"/groups/{group_id}/posts", json={"title": "Még egy", "content": "..."}, headers=author_headers)
+    assert app.extensions["unread_counters"].get(reader_id) == {group_id: 2}
+
+    client.delete(f"/posts/{post_id}", headers=author_headers)
+    assert app.extensions["unread_counters"].get(reader_id) == {group_id: 1}
+
+    client.post(f"/groups/{group_id}/mark-posts-read", headers=reader_headers)
+    assert app.extensions["unread_counters"].get(reader_id) == {group_id: 0}
+
+
+def test_large_groups_are_counted_on_read(client, app):
+    app.config["UNREAD_FANOUT_MAX_MEMBERS"] = 1
+    reader = register(client, "reader@elte.hu")
+    reader_headers, reader_id = auth_headers(reader), reader["user"]["id"]
+    author = register(client, "author@elte.hu")
+    author_headers, author_id = auth_headers(author), author["user"]["id"]
+    group_id = shared_group(reader_id, author_id)
+
+    client.get("/groups/unread-counts", headers=reader_headers)
+    client.post(f"/groups/{group_id}/posts", json={"title": "Új", "content": "..."}, headers=author_headers)
+
+    # A nagy csoport nem kerül a store-ba, mégis friss a szám
+    assert app.extensions["unread_counters"].get(reader_id) == {}
+    counts = client.get("/groups/unread-counts", headers=reader_headers).get_json()["unread_counts"]
+    assert counts == {str(group_id): 1}
+
+
+def test_rebuild_reloads_counters_from_db(client, app):
+    reader_id = register(client, "reader@elte.hu")["user"]["id"]
+    author_id = register(client, "author@elte.hu")["user"]["id"]
+    group_id = shared_group(reader_id, author_id)
+    store = app.extensions["unread_counters"]
+    store.replace(reader_id, {group_id: 42})
+
+    db.session.add(Post(title="Régi", content="...", group_id=group_id, author_id=author_id,
+                        created_at=datetime(2026, 1, 2)))
+    db.session.commit()
+
+    assert rebuild_unread_counters(batch_size=1) == 2
+    assert store.get(reader_id) == {group_id: 1}
+    assert store.get(author_id) == {group_id: 0}
+
+
+def test_two_workers_without_redis_see_each_others_writes(tmp_path):
+    from app import create_app
+
+    config = {
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'workers.db'}",
+        "WEB_CONCURRENCY": 2,
+    }
+    worker_a, worker_b = create_app(config), create_app(config)
+    client_a, client_b = worker_a.test_client(), worker_b.test_client()
+
+    with worker_a.app_context():
+        reader = register(client_a, "reader@elte.hu")
+        reader_headers, reader_id = auth_headers(reader), reader["user"]["id"]
+        author = register(client_a, "author@elte.hu")
+        author_headers, author_id = auth_headers(author), author["user"]["id"]
+        group_id = shared_group(reader_id, author_id)
+        db.session.remove()
+
+    def poll_b():
+        with worker_b.app_context():
+            counts = client_b.get("/groups/unread-counts", headers=reader_headers).get_json()["unread_counts"]
+            db.session.remove()
+            return counts
+
+    assert poll_b() == {str(group_id): 0}
+    with worker_a.app_context():
+        client_a.post(f"/groups/{group_id}/posts", json={"title": "Új", "content": "..."}, headers=author_headers)
+    assert poll_b() == {str(group_id): 1}
+
+    with worker_a.app_context():
+        client_a.post(f"/groups/{group_id}/mark-posts-read", headers=reader_headers)
+    assert poll_b() == {str(group_id): 0}
@@ -0,0 +1,307 @@
+import threading
+import time
+
+from flask import current_app  # pyright: ignore[reportMissingImports]
+from sqlalchemy import and_, func, or_, select  # pyright: ignore[reportMissingImports]
+from models import db, Group, GroupMember, GroupReadMark, Post, PostView
+
+
+def unread_post_filter(user_id):
+    """Poszt feltétel: a user vízjele (GroupReadMark, LEFT JOIN-olva) fölött van, és nincs rá PostView."""
+    viewed = (
+        select(PostView.id)
+        .where(PostView.user_id == user_id, PostView.post_id == Post.id)
+        .exists()
+    )
+    after_watermark = or_(
+        GroupReadMark.last_read_seq.is_(None),
+        Post.group_seq > GroupReadMark.last_read_seq
+    )
+    return and_(after_watermark, ~viewed)
+
+
+def unread_post_counts(user_id, group_ids=None):
+    """(group_id, olvasatlan) párok a user összes csoportjára, egyetlen csoportosított lekérdezéssel.
+
+    Olvasatlan a csatlakozás után készült, nem törölt, nem saját poszt a csoport vízjele
+    fölött, amit egyenként sem nézett meg. A vízjel a (group_id, group_seq) indexen tartomány.
+    A LEFT JOIN miatt a poszt nélküli csoportok is 0-val szerepelnek.
+    """
+    query = (
+        db.session.query(GroupMember.group_id, func.count(Post.id))
+        .outerjoin(GroupReadMark, and_(
+            GroupReadMark.user_id == GroupMember.user_id,
+            GroupReadMark.group_id == GroupMember.group_id
+        ))
+        .outerjoin(Post, and_(
+            Post.group_id == GroupMember.group_id,
+            Post.deleted_at.is_(None),
+            Post.created_at >= GroupMember.joined_at,
+            Post.author_id != user_id,
+            unread_post_filter(user_id)
+        ))
+        .filter(GroupMember.user_id == user_id)
+        .group_by(GroupMember.group_id)
+    )
+    if group_ids is not None:
+        query = query.filter(GroupMember.group_id.in_(group_ids))
+    return query
+
+
+def users_with_post_unread(post):
+    """Azok a tagok, akiknek `post` olvasatlanként számít (a törlés ezeknél csökkent)."""
+    viewed = (
+        select(PostView.id)
+        .where(PostView.user_id == GroupMember.user_id, PostView.post_id == post.id)
+        .exists()
+    )
+    return [
+        user_id for (user_id,) in
+        db.session.query(GroupMember.user_id)
+        .outerjoin(GroupReadMark, and_(
+            GroupReadMark.user_id == GroupMember.user_id,
+            GroupReadMark.group_id == GroupMember.group_id
+        ))
+        .filter(
+            GroupMember.group_id == post.group_id,
+            GroupMember.user_id != post.author_id,
+            GroupMember.joined_at <= post.created_at,
+            or_(
+                GroupReadMark.last_read_seq.is_(None),
+                GroupReadMark.last_read_seq < post.group_seq
+            ),
+            ~viewed
+        )
+        .all()
+    ]
+
+
+class DictUnreadCounterStore:
+    """Folyamaton belüli stand-in: user_id -> {group_id: olvasatlan}, lejárati idővel.
+
+    Hiányzó user = ismeretlen állapot, ilyenkor olvasáskor újraszámolunk; a növelés és a
+    beállítás ezért csak meglévő bejegyzést módosít.
+    """
+
+    def __init__(self, ttl=600, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._counts.get(user_id)
+            if entry is None or entry[0] <= self.clock():
+                self._counts.pop(user_id, None)
+                return None
+            return dict(entry[1])
+
+    def replace(self, user_id, counts):
+        with self._lock:
+            self._counts[user_id] = (self.clock() + self.ttl, dict(counts))
+
+    def incr(self, user_ids, group_id, delta):
+        with self._lock:
+            for user_id in user_ids:
+                entry = self._counts.get(user_id)
+                if entry is not None and group_id in entry[1]:
+                    entry[1][group_id] = max(entry[1][group_id] + delta, 0)
+
+    def set_count(self, user_id, group_id, value):
+        with self._lock:
+            entry = self._counts.get(user_id)
+            if entry is not None:
+                entry[1][group_id] = value
+
+    def forget(self, user_ids, group_id=None):
+        """A user(ek) teljes bejegyzését, vagy csak egy csoport mezőjét dobja el."""
+        with self._lock:
+            for user_id in user_ids:
+                if group_id is None:
+                    self._counts.pop(user_id, None)
+                else:
+                    entry = self._counts.get(user_id)
+                    if entry is not None:
+                        entry[1].pop(group_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+
+
+class NullUnreadCounterStore:
+    """Több worker, megosztott store nélkül: nincs cache, minden olvasás újraszámol.
+
+    Egy folyamaton belüli dict-et a többi worker írásai nem frissítenének, így az
+    olvasó akár UNREAD_COUNTER_TTL-ig elavult számot kapna.
+    """
+
+    def get(self, user_id):
+        return None
+
+    def replace(self, user_id, counts):
+        pass
+
+    def incr(self, user_ids, group_id, delta):
+        pass
+
+    def set_count(self, user_id, group_id, value):
+        pass
+
+    def forget(self, user_ids, group_id=None):
+        pass
+
+    def clear(self):
+        pass
+
+
+# Csak meglévő hash mezőt módosít, hogy egy hiányos hash ne jöjjön létre
+_INCR_EXISTING = """
+for i, key in ipairs(KEYS) do
+    if redis.call('HEXISTS', key, ARGV[1]) == 1 then
+        local value = redis.call('HINCRBY', key, ARGV[1], ARGV[2])
+        if value < 0 then redis.call('HSET', key, ARGV[1], 0) end
+    end
+end
+"""
+_SET_EXISTING = """
+if redis.call('EXISTS', KEYS[1]) == 1 then redis.call('HSET', KEYS[1], ARGV[1], ARGV[2]) end
+"""
+
+
+class RedisUnreadCounterStore:
+    """Megosztott számlálók Redis-kompatibilis kliensen: userenként egy hash (group_id -> szám)."""
+
+    def __init__(self, client, ttl=600, prefix="studybuddy:unread"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def _key(self, user_id):
+        return f"{self.prefix}:{user_id}"
+
+    def get(self, user_id):
+        raw = self.client.hgetall(self._key(user_id))
+        if not raw:
+            return None
+        return {int(group_id): int(count) for group_id, count in raw.items() if group_id != "0"}
+
+    def replace(self, user_id, counts):
+        key = self._key(user_id)
+        pipe = self.client.pipeline()
+        pipe.delete(key)
+        # Üres hash nem létezik Redis-ben, ezért egy jelölő mező is kerül bele
+        pipe.hset(key, mapping={**{str(g): c for g, c in counts.items()}, "0": 0})
+        pipe.expire(key, self.ttl)
+        pipe.execute()
+
+    def incr(self, user_ids, group_id, delta):
+        keys = [self._key(u) for u in user_ids]
+        if keys:
+            self.client.eval(_INCR_EXISTING, len(keys), *keys, group_id, delta)
+
+    def set_count(self, user_id, group_id, value):
+        self.client.eval(_SET_EXISTING, 1, self._key(user_id), group_id, value)
+
+    def forget(self, user_ids, group_id=None):
+        keys = [self._key(u) for u in user_ids]
+        if not keys:
+            return
+        if group_id is None:
+            self.client.delete(*keys)
+        else:
+            pipe = self.client.pipeline()
+            for key in keys:
+                pipe.hdel(key, group_id)
+            pipe.execute()
+
+    def clear(self):
+        keys = list(self.client.scan_iter(f"{self.prefix}:*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+def init_unread_counters(app):
+    """UNREAD_COUNTER_REDIS_URL esetén megosztott Redis store, egyébként folyamaton belüli dict.
+
+    Több worker (WEB_CONCURRENCY > 1) Redis nélkül: nincs számláló cache, olvasáskor számolunk.
+    """
+    ttl = app.config.get("UNREAD_COUNTER_TTL", 600)
+    redis_url = app.config.get("UNREAD_COUNTER_REDIS_URL")
+    if redis_url:
+        import redis  # pyright: ignore[reportMissingImports]
+        store = RedisUnreadCounterStore(redis.Redis.from_url(redis_url, decode_responses=True), ttl)
+    elif app.config.get("WEB_CONCURRENCY", 1) > 1:
+        store = NullUnreadCounterStore()
+    else:
+        store = DictUnreadCounterStore(ttl)
+    app.extensions["unread_counters"] = store
+    return store
+
+
+def unread_counter_store():
+    return current_app.extensions["unread_counters"]
+
+
+def fanout_limit():
+    """Ennél több tagú csoportnál nincs fan-out-on-write: olvasáskor számolunk."""
+    if isinstance(unread_counter_store(), NullUnreadCounterStore):
+        return 0
+    return current_app.config.get("UNREAD_FANOUT_MAX_MEMBERS", 500)
+
+
+def unread_counts_for(user_id):
+    """A user olvasatlan számai csoportonként, a számláló store-ból ahol lehet.
+
+    Kis csoportoknál a store írásidőben frissül (create_post, poszt törlés); nagy
+    csoportoknál, vagy ha a user bejegyzése hiányzik, a DB-ből számolunk.
+    """
+    memberships = (
+        db.session.query(GroupMember.group_id, Group.member_count)
+        .join(Group, Group.id == GroupMember.group_id)
+        .filter(GroupMember.user_id == user_id)
+        .all()
+    )
+    limit = fanout_limit()
+    small = [group_id for group_id, member_count in memberships if member_count <= limit]
+    large = [group_id for group_id, member_count in memberships if member_count > limit]
+
+    store = unread_counter_store()
+    cached = store.get(user_id)
+    if cached is None or any(group_id not in cached for group_id in small):
+        counts = dict(unread_post_counts(user_id).all())
+        store.replace(user_id, {group_id: counts.get(group_id, 0) for group_id in small})
+        return counts
+
+    counts = {group_id: cached[group_id] for group_id in small}
+    if large:
+        counts.update(unread_post_counts(user_id, large).all())
+    return counts
+
+
+def rebuild_unread_counters(batch_size=1000):
+    """Eldobja a store tartalmát, és újratölti minden csoporttag userre. Visszaadja a userek számát."""
+    store = unread_counter_store()
+    store.clear()
+
+    last_id = 0
+    rebuilt = 0
+    while True:
+        user_ids = [
+            user_id for (user_id,) in
+            db.session.query(GroupMember.user_id)
+            .filter(GroupMember.user_id > last_id)
+            .distinct()
+            .order_by(GroupMember.user_id)
+            .limit(batch_size)
+            .all()
+        ]
+        if not user_ids:
+            break
+        for user_id in user_ids:
+            unread_counts_for(user_id)
+        last_id = user_ids[-1]
+        rebuilt += len(user_ids)
+        db.session.remove()
+    return rebuilt
@@ -0,0 +1,26 @@
+"""composite index for forum keyset pagination
+
+Revision ID: 0b7e2d9c4f15
+Revises: f4c19d7e8b62
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b7e2d9c4f15'
+down_revision = 'f4c19d7e8b62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    indexes = {i['name'] for i in sa.inspect(op.get_bind()).get_indexes('posts')}
+    if 'ix_posts_group_created_id' not in indexes:
+        op.create_index('ix_posts_group_created_id', 'posts', ['group_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_posts_group_created_id', table_name='posts')
@@ -0,0 +1,33 @@
+"""denormalized comment_count on posts
+
+Revision ID: 1c8f3a6d2e74
+Revises: 0b7e2d9c4f15
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1c8f3a6d2e74'
+down_revision = '0b7e2d9c4f15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    post_columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('posts')}
+    if 'comment_count' not in post_columns:
+        with op.batch_alter_table('posts', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('comment_count', sa.Integer(), server_default='0', nullable=False))
+
+    op.execute(
+        "UPDATE posts SET comment_count = "
+        "(SELECT COUNT(*) FROM comments WHERE comments.post_id = posts.id AND comments.deleted_at IS NULL)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.drop_column('comment_count')
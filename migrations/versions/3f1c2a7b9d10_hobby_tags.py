@@ -0,0 +1,101 @@
+"""hobby tags and user hobby bitmask
+
+Revision ID: 3f1c2a7b9d10
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a7b9d10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+HOBBY_MASK_BITS = 63
+
+# A választható hobbik (backend/hobbies.py HOBBIES): csak ezekből lesz tag, mint futásidőben,
+# különben a régi szabad szöveges hobbik 63 fölé vinnék a tag ID-kat
+HOBBIES = frozenset(name.lower() for name in (
+    "Sport", "Olvasás", "Zene", "Film", "Fotózás", "Főzés", "Utazás", "Rajzolás", "Festés",
+    "Kertészkedés", "Tánc", "Színház", "Játék", "Programozás", "Matematika", "Tudomány",
+    "Nyelvtanulás", "Jóga", "Meditáció", "Kézműves", "Horgászat", "Kerékpározás", "Futás",
+    "Úszás", "Társasjáték",
+))
+
+
+def _normalize(raw):
+    names = []
+    for item in (raw or "").split(","):
+        name = item.strip().lower()
+        if name in HOBBIES and name not in names:
+            names.append(name)
+    return names
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = inspector.get_table_names()
+
+    # Az app induláskor db.create_all()-t futtat, ezért a táblák már létezhetnek
+    if 'hobby_tags' not in tables:
+        op.create_table(
+            'hobby_tags',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('name')
+        )
+    if 'user_hobbies' not in tables:
+        op.create_table(
+            'user_hobbies',
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('tag_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['tag_id'], ['hobby_tags.id']),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('user_id', 'tag_id')
+        )
+        op.create_index(op.f('ix_user_hobbies_tag_id'), 'user_hobbies', ['tag_id'], unique=False)
+
+    user_columns = {c['name'] for c in inspector.get_columns('users')}
+    if 'hobby_mask' not in user_columns:
+        with op.batch_alter_table('users', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('hobby_mask', sa.BigInteger(), server_default='0', nullable=False))
+
+    # Backfill: a meglévő vesszős hobbi stringek katalógusbeli elemeiből tagek, kapcsolatok és maszk
+    meta = sa.MetaData()
+    users = sa.Table('users', meta, sa.Column('id', sa.Integer, primary_key=True),
+                     sa.Column('hobbies', sa.Text), sa.Column('hobby_mask', sa.BigInteger))
+    hobby_tags = sa.Table('hobby_tags', meta, sa.Column('id', sa.Integer, primary_key=True),
+                          sa.Column('name', sa.String(100)))
+    user_hobbies = sa.Table('user_hobbies', meta, sa.Column('user_id', sa.Integer, primary_key=True),
+                            sa.Column('tag_id', sa.Integer, primary_key=True))
+
+    tag_ids = {name: tag_id for tag_id, name in bind.execute(sa.select(hobby_tags.c.id, hobby_tags.c.name))}
+    linked = {(u, t) for u, t in bind.execute(sa.select(user_hobbies.c.user_id, user_hobbies.c.tag_id))}
+
+    rows = bind.execute(sa.select(users.c.id, users.c.hobbies).where(users.c.hobbies.isnot(None))).fetchall()
+    for user_id, hobbies in rows:
+        mask = 0
+        for name in _normalize(hobbies):
+            if name not in tag_ids:
+                tag_ids[name] = bind.execute(hobby_tags.insert().values(name=name)).inserted_primary_key[0]
+            tag_id = tag_ids[name]
+            if (user_id, tag_id) not in linked:
+                bind.execute(user_hobbies.insert().values(user_id=user_id, tag_id=tag_id))
+                linked.add((user_id, tag_id))
+            mask |= 1 << ((tag_id - 1) % HOBBY_MASK_BITS)
+        bind.execute(users.update().where(users.c.id == user_id).values(hobby_mask=mask))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('hobby_mask')
+
+    op.drop_index(op.f('ix_user_hobbies_tag_id'), table_name='user_hobbies')
+    op.drop_table('user_hobbies')
+    op.drop_table('hobby_tags')
@@ -0,0 +1,28 @@
+"""per-group content_version for forum ETags
+
+Revision ID: 5e2a9c7b1d38
+Revises: 1c8f3a6d2e74
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2a9c7b1d38'
+down_revision = '1c8f3a6d2e74'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    group_columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('study_groups')}
+    if 'content_version' not in group_columns:
+        with op.batch_alter_table('study_groups', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('content_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('study_groups', schema=None) as batch_op:
+        batch_op.drop_column('content_version')
@@ -0,0 +1,34 @@
+"""sync_version on posts for delta sync
+
+Revision ID: 7d4b1e9f3a26
+Revises: 5e2a9c7b1d38
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d4b1e9f3a26'
+down_revision = '5e2a9c7b1d38'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    post_columns = {c['name'] for c in inspector.get_columns('posts')}
+    if 'sync_version' not in post_columns:
+        with op.batch_alter_table('posts', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('sync_version', sa.Integer(), server_default='0', nullable=False))
+
+    indexes = {i['name'] for i in inspector.get_indexes('posts')}
+    if 'ix_posts_group_sync_version' not in indexes:
+        op.create_index('ix_posts_group_sync_version', 'posts', ['group_id', 'sync_version'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_posts_group_sync_version', table_name='posts')
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.drop_column('sync_version')
@@ -0,0 +1,43 @@
+"""per-group interest histogram
+
+Revision ID: 8a4d6e2f1b37
+Revises: 3f1c2a7b9d10
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4d6e2f1b37'
+down_revision = '3f1c2a7b9d10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    if 'group_interest_counts' not in sa.inspect(bind).get_table_names():
+        op.create_table(
+            'group_interest_counts',
+            sa.Column('group_id', sa.Integer(), nullable=False),
+            sa.Column('hobby_mask', sa.BigInteger(), autoincrement=False, nullable=False),
+            sa.Column('member_count', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['group_id'], ['study_groups.id']),
+            sa.PrimaryKeyConstraint('group_id', 'hobby_mask')
+        )
+
+    # Backfill a meglévő tagságokból
+    op.execute("DELETE FROM group_interest_counts")
+    op.execute(
+        "INSERT INTO group_interest_counts (group_id, hobby_mask, member_count) "
+        "SELECT gm.group_id, u.hobby_mask, COUNT(*) "
+        "FROM group_members gm JOIN users u ON u.id = gm.user_id "
+        "GROUP BY gm.group_id, u.hobby_mask"
+    )
+
+
+def downgrade():
+    op.drop_table('group_interest_counts')
@@ -0,0 +1,88 @@
+"""per-group read watermarks replacing per-post PostView rows
+
+Revision ID: 9a6c2f4e8b13
+Revises: 7d4b1e9f3a26
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a6c2f4e8b13'
+down_revision = '7d4b1e9f3a26'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    if 'group_read_marks' not in sa.inspect(bind).get_table_names():
+        op.create_table(
+            'group_read_marks',
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('group_id', sa.Integer(), nullable=False),
+            sa.Column('last_read_at', sa.DateTime(), nullable=False),
+            sa.Column('last_read_post_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['group_id'], ['study_groups.id'], ),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+            sa.PrimaryKeyConstraint('user_id', 'group_id')
+        )
+
+    # PostView -> vízjel: tagságonként a legkorábbi olvasatlan (számító) poszt előtti
+    # utolsó poszt lesz a vízjel; az alatta lévő PostView sorok törölhetők, a fölöttiek maradnak
+    memberships = bind.execute(sa.text(
+        "SELECT DISTINCT gm.user_id, gm.group_id, gm.joined_at FROM group_members gm "
+        "JOIN posts p ON p.group_id = gm.group_id "
+        "JOIN post_views pv ON pv.post_id = p.id AND pv.user_id = gm.user_id"
+    )).fetchall()
+
+    for user_id, group_id, joined_at in memberships:
+        params = {"user_id": user_id, "group_id": group_id, "joined_at": joined_at}
+        first_unread = bind.execute(sa.text(
+            "SELECT p.created_at, p.id FROM posts p "
+            "WHERE p.group_id = :group_id AND p.deleted_at IS NULL "
+            "AND p.created_at >= :joined_at AND p.author_id != :user_id "
+            "AND NOT EXISTS (SELECT 1 FROM post_views pv WHERE pv.user_id = :user_id AND pv.post_id = p.id) "
+            "ORDER BY p.created_at, p.id LIMIT 1"
+        ), params).first()
+
+        below = ""
+        if first_unread is not None:
+            params.update(unread_at=first_unread[0], unread_id=first_unread[1])
+            below = (
+                "AND (p.created_at < :unread_at OR (p.created_at = :unread_at AND p.id < :unread_id)) "
+            )
+        watermark = bind.execute(sa.text(
+            "SELECT p.created_at, p.id FROM posts p WHERE p.group_id = :group_id " + below +
+            "ORDER BY p.created_at DESC, p.id DESC LIMIT 1"
+        ), params).first()
+        if watermark is None:
+            continue
+
+        params.update(read_at=watermark[0], read_id=watermark[1])
+        bind.execute(sa.text(
+            "DELETE FROM group_read_marks WHERE user_id = :user_id AND group_id = :group_id"
+        ), params)
+        bind.execute(sa.text(
+            "INSERT INTO group_read_marks (user_id, group_id, last_read_at, last_read_post_id) "
+            "VALUES (:user_id, :group_id, :read_at, :read_id)"
+        ), params)
+        bind.execute(sa.text(
+            "DELETE FROM post_views WHERE user_id = :user_id AND post_id IN ("
+            "SELECT p.id FROM posts p WHERE p.group_id = :group_id "
+            "AND (p.created_at < :read_at OR (p.created_at = :read_at AND p.id <= :read_id)))"
+        ), params)
+
+
+def downgrade():
+    # A vízjelek alatti posztokra visszaírjuk a PostView sorokat
+    op.execute(
+        "INSERT INTO post_views (user_id, post_id, viewed_at) "
+        "SELECT m.user_id, p.id, m.last_read_at FROM group_read_marks m "
+        "JOIN posts p ON p.group_id = m.group_id "
+        "WHERE (p.created_at < m.last_read_at OR (p.created_at = m.last_read_at AND p.id <= m.last_read_post_id)) "
+        "AND NOT EXISTS (SELECT 1 FROM post_views pv WHERE pv.user_id = m.user_id AND pv.post_id = p.id)"
+    )
+    op.drop_table('group_read_marks')
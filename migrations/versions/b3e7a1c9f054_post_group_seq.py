@@ -0,0 +1,91 @@
+"""per-group post sequence as the read watermark key
+
+Revision ID: b3e7a1c9f054
+Revises: 9a6c2f4e8b13
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e7a1c9f054'
+down_revision = '9a6c2f4e8b13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    group_columns = {c['name'] for c in inspector.get_columns('study_groups')}
+    if 'post_seq' not in group_columns:
+        with op.batch_alter_table('study_groups', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('post_seq', sa.Integer(), server_default='0', nullable=False))
+
+    post_columns = {c['name'] for c in inspector.get_columns('posts')}
+    if 'group_seq' not in post_columns:
+        with op.batch_alter_table('posts', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('group_seq', sa.Integer(), server_default='0', nullable=False))
+
+    indexes = {i['name'] for i in inspector.get_indexes('posts')}
+    if 'ix_posts_group_seq' not in indexes:
+        op.create_index('ix_posts_group_seq', 'posts', ['group_id', 'group_seq'], unique=False)
+
+    # Meglévő posztok: csoportonként (created_at, id) sorrendben számozzuk
+    group_ids = [row[0] for row in bind.execute(sa.text("SELECT DISTINCT group_id FROM posts")).fetchall()]
+    for group_id in group_ids:
+        post_ids = [row[0] for row in bind.execute(sa.text(
+            "SELECT id FROM posts WHERE group_id = :group_id ORDER BY created_at, id"
+        ), {"group_id": group_id}).fetchall()]
+        if not post_ids:
+            continue
+        bind.execute(
+            sa.text("UPDATE posts SET group_seq = :seq WHERE id = :id"),
+            [{"seq": seq, "id": post_id} for seq, post_id in enumerate(post_ids, start=1)]
+        )
+        bind.execute(
+            sa.text("UPDATE study_groups SET post_seq = :seq WHERE id = :group_id"),
+            {"seq": len(post_ids), "group_id": group_id}
+        )
+
+    # A régi (created_at, id) vízjel -> az alatta lévő legnagyobb sorszám
+    mark_columns = {c['name'] for c in inspector.get_columns('group_read_marks')}
+    if 'last_read_seq' not in mark_columns:
+        with op.batch_alter_table('group_read_marks', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('last_read_seq', sa.Integer(), server_default='0', nullable=False))
+    if 'last_read_at' in mark_columns:
+        op.execute(
+            "UPDATE group_read_marks SET last_read_seq = COALESCE(("
+            "SELECT MAX(p.group_seq) FROM posts p WHERE p.group_id = group_read_marks.group_id "
+            "AND (p.created_at < group_read_marks.last_read_at OR (p.created_at = group_read_marks.last_read_at "
+            "AND p.id <= group_read_marks.last_read_post_id))), 0)"
+        )
+        with op.batch_alter_table('group_read_marks', schema=None) as batch_op:
+            batch_op.drop_column('last_read_post_id')
+            batch_op.drop_column('last_read_at')
+
+
+def downgrade():
+    with op.batch_alter_table('group_read_marks', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('last_read_at', sa.DateTime(), server_default='1970-01-01 00:00:00', nullable=False))
+        batch_op.add_column(sa.Column('last_read_post_id', sa.Integer(), server_default='0', nullable=False))
+
+    # A vízjel sorszámához tartozó poszt (created_at, id) kulcsa
+    op.execute(
+        "UPDATE group_read_marks SET "
+        "last_read_at = COALESCE((SELECT p.created_at FROM posts p WHERE p.group_id = group_read_marks.group_id "
+        "AND p.group_seq = group_read_marks.last_read_seq), '1970-01-01 00:00:00'), "
+        "last_read_post_id = COALESCE((SELECT p.id FROM posts p WHERE p.group_id = group_read_marks.group_id "
+        "AND p.group_seq = group_read_marks.last_read_seq), 0)"
+    )
+    with op.batch_alter_table('group_read_marks', schema=None) as batch_op:
+        batch_op.drop_column('last_read_seq')
+
+    op.drop_index('ix_posts_group_seq', table_name='posts')
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.drop_column('group_seq')
+    with op.batch_alter_table('study_groups', schema=None) as batch_op:
+        batch_op.drop_column('post_seq')
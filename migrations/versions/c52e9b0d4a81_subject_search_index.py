@@ -0,0 +1,70 @@
+"""normalized subject key and trigram index for group search
+
+Revision ID: c52e9b0d4a81
+Revises: 8a4d6e2f1b37
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c52e9b0d4a81'
+down_revision = '8a4d6e2f1b37'
+branch_labels = None
+depends_on = None
+
+
+def _normalize(text):
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    group_columns = {c['name'] for c in inspector.get_columns('study_groups')}
+    if 'subject_key' not in group_columns:
+        with op.batch_alter_table('study_groups', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('subject_key', sa.String(length=100), server_default='', nullable=False))
+            batch_op.create_index(batch_op.f('ix_study_groups_subject_key'), ['subject_key'], unique=False)
+
+    if 'subject_trigrams' not in inspector.get_table_names():
+        op.create_table(
+            'subject_trigrams',
+            sa.Column('trigram', sa.String(length=3), nullable=False),
+            sa.Column('group_id', sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(['group_id'], ['study_groups.id']),
+            sa.PrimaryKeyConstraint('trigram', 'group_id')
+        )
+        op.create_index(op.f('ix_subject_trigrams_group_id'), 'subject_trigrams', ['group_id'], unique=False)
+
+    # Backfill: normalizált kulcs és trigramok a meglévő csoportokhoz
+    meta = sa.MetaData()
+    groups = sa.Table('study_groups', meta, sa.Column('id', sa.Integer, primary_key=True),
+                      sa.Column('subject', sa.String(100)), sa.Column('subject_key', sa.String(100)))
+    trigrams = sa.Table('subject_trigrams', meta, sa.Column('trigram', sa.String(3), primary_key=True),
+                        sa.Column('group_id', sa.Integer, primary_key=True))
+
+    bind.execute(trigrams.delete())
+    for group_id, subject in bind.execute(sa.select(groups.c.id, groups.c.subject)).fetchall():
+        key = _normalize(subject)
+        bind.execute(groups.update().where(groups.c.id == group_id).values(subject_key=key))
+        rows = [{"trigram": key[i:i + 3], "group_id": group_id} for i in range(len(key) - 2)]
+        rows = list({r["trigram"]: r for r in rows}.values())
+        if rows:
+            bind.execute(trigrams.insert(), rows)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_subject_trigrams_group_id'), table_name='subject_trigrams')
+    op.drop_table('subject_trigrams')
+
+    with op.batch_alter_table('study_groups', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_study_groups_subject_key'))
+        batch_op.drop_column('subject_key')
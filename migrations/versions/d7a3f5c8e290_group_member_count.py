@@ -0,0 +1,33 @@
+"""denormalized member_count on study_groups
+
+Revision ID: d7a3f5c8e290
+Revises: c52e9b0d4a81
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a3f5c8e290'
+down_revision = 'c52e9b0d4a81'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    group_columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('study_groups')}
+    if 'member_count' not in group_columns:
+        with op.batch_alter_table('study_groups', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('member_count', sa.Integer(), server_default='0', nullable=False))
+
+    op.execute(
+        "UPDATE study_groups SET member_count = "
+        "(SELECT COUNT(*) FROM group_members WHERE group_members.group_id = study_groups.id)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('study_groups', schema=None) as batch_op:
+        batch_op.drop_column('member_count')
@@ -0,0 +1,31 @@
+"""per-subject slot counter for automatic group creation
+
+Revision ID: e1b84c6a2f53
+Revises: d7a3f5c8e290
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1b84c6a2f53'
+down_revision = 'd7a3f5c8e290'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # A hiányzó sorokat az első keresés a meglévő csoportok számából pótolja
+    if 'subject_group_slots' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            'subject_group_slots',
+            sa.Column('subject', sa.String(length=100), nullable=False),
+            sa.Column('last_slot', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('subject')
+        )
+
+
+def downgrade():
+    op.drop_table('subject_group_slots')
@@ -0,0 +1,28 @@
+"""membership_version on users for /groups/my-groups ETags
+
+Revision ID: f4c19d7e8b62
+Revises: e1b84c6a2f53
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4c19d7e8b62'
+down_revision = 'e1b84c6a2f53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    user_columns = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('users')}
+    if 'membership_version' not in user_columns:
+        with op.batch_alter_table('users', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('membership_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('membership_version')